@@ -1,4 +1,5 @@
 from enum import Enum
+from operator import attrgetter
 from typing import Any, TypeVar
 
 from sqladmin import ModelView
@@ -8,6 +9,7 @@ from app.models.db_models import (
     Chat,
     Message,
     MessageAttachment,
+    MessageEvent,
     UserSettings,
 )
 from wtforms import PasswordField, SelectField
@@ -20,7 +22,7 @@ from app.models.db_models.enums import (
 from markupsafe import Markup
 from app.core.security import get_password_hash
 from datetime import datetime, timezone
-from sqlalchemy import Select, select
+from sqlalchemy import Select, or_, select
 from sqlalchemy.orm import selectinload
 from starlette.requests import Request
 
@@ -37,6 +39,16 @@ def _coerce_enum(enum_class: type[E]) -> Any:
     return coerce
 
 
+def _message_content(message: Message) -> str:
+    # Assistant messages keep their event log in message_events; the views
+    # below load it with the message
+    content: str = message.content
+    if not content and message.events:
+        events = sorted(message.events, key=attrgetter("seq"))
+        content = "[" + ",".join(event.payload for event in events) + "]"
+    return content
+
+
 def _calculate_remaining_messages(user: User) -> str | int:
     if user.daily_message_limit is None:
         return "Unlimited"
@@ -279,9 +291,9 @@ class MessageAdmin(ModelView, model=Message):
     ]
 
     column_formatters = {
-        "content": lambda m, _: m.content[:100] + "..."
-        if len(m.content) > 100
-        else m.content,
+        "content": lambda m, _: _message_content(m)[:100] + "..."
+        if len(_message_content(m)) > 100
+        else _message_content(m),
         "total_cost_usd": lambda m, _: f"${m.total_cost_usd:.4f}"
         if m.total_cost_usd is not None
         else "$0.0000",
@@ -308,6 +320,27 @@ class MessageAdmin(ModelView, model=Message):
         "stream_status": "Stream Status",
     }
 
+    def list_query(self, request: Request) -> Select[tuple[Message]]:
+        return select(Message).options(selectinload(Message.events))
+
+    def details_query(self, request: Request) -> Select[tuple[Message]]:
+        return super().details_query(request).options(selectinload(Message.events))
+
+    def search_query(self, stmt: Select[Any], term: str) -> Select[Any]:
+        pattern = f"%{term}%"
+        return stmt.filter(
+            or_(
+                Message.content.ilike(pattern),
+                Message.events.any(MessageEvent.payload.ilike(pattern)),
+            )
+        )
+
+    async def get_prop_value(self, obj: Any, prop: str) -> Any:
+        # Covers the detail view and exports, which read attributes directly
+        if prop == "content":
+            return _message_content(obj)
+        return await super().get_prop_value(obj, prop)
+
     form_overrides = {
         "role": SelectField,
         "stream_status": SelectField,
@@ -1,4 +1,3 @@
-import asyncio
 import json
 import logging
 from collections.abc import AsyncIterator
@@ -6,7 +5,17 @@ from typing import Any, Literal, cast
 from uuid import UUID
 
 from celery.exceptions import NotRegistered
-from fastapi import APIRouter, Depends, Form, HTTPException, UploadFile, status, Request
+from fastapi import (
+    APIRouter,
+    Depends,
+    Form,
+    HTTPException,
+    Query,
+    UploadFile,
+    status,
+    Request,
+)
+from fastapi.responses import FileResponse
 from redis.asyncio import Redis
 from redis.exceptions import RedisError
 from sqlalchemy.exc import SQLAlchemyError
@@ -34,6 +43,7 @@ from app.models.schemas import (
     ChatUpdate,
     ChatRequest,
     ContextUsage,
+    CursorPaginatedMessageEvents,
     CursorPaginatedMessages,
     CursorPaginationParams,
     EnhancePromptResponse,
@@ -56,7 +66,13 @@ from app.services.exceptions import (
 )
 from app.services.permission_manager import PermissionManager
 from app.services.queue import QueueService
-from app.utils.redis import redis_connection, redis_pubsub
+from app.services.streaming.hub import (
+    CANCELLED_EVENT,
+    TERMINAL_EVENTS,
+    format_stream_entry,
+    stream_hub,
+)
+from app.utils.redis import redis_connection
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -80,30 +96,6 @@ async def _ensure_chat_access(
         )
 
 
-async def _monitor_stream_cancellation(
-    chat_id: UUID, cancel_event: asyncio.Event, redis: "Redis[str]"
-) -> None:
-    try:
-        async with redis_pubsub(
-            redis, REDIS_KEY_CHAT_CANCEL.format(chat_id=chat_id)
-        ) as pubsub:
-            while True:
-                message = await pubsub.get_message(
-                    ignore_subscribe_messages=True, timeout=1.0
-                )
-                if message and message.get("type") == "message":
-                    logger.info("Stream cancellation received for chat %s", chat_id)
-                    cancel_event.set()
-                    break
-    except asyncio.CancelledError:
-        logger.debug("Cancellation monitor task cancelled for chat %s", chat_id)
-        raise
-    except Exception as e:
-        logger.error(
-            "Error monitoring cancellation for chat %s: %s", chat_id, e, exc_info=True
-        )
-
-
 async def _replay_stream_backlog(
     redis: "Redis[str]", stream_name: str, min_id: str
 ) -> AsyncIterator[dict[str, Any]]:
@@ -117,116 +109,39 @@ async def _replay_stream_backlog(
         backlog = []
 
     for entry_id, fields in backlog:
-        formatted = {
-            "id": entry_id,
-            "event": fields.get("kind", "content"),
-            "data": fields.get("payload", "") or "",
-        }
+        formatted = format_stream_entry(entry_id, fields)
         yield formatted
-        if formatted["event"] in {"complete", "error"}:
+        if formatted["event"] in TERMINAL_EVENTS:
             return
 
 
-async def _stream_live_redis_events(
-    redis: "Redis[str]",
-    stream_name: str,
-    chat_id: UUID,
-    last_id: str,
-    cancel_event: asyncio.Event,
-) -> AsyncIterator[dict[str, Any]]:
-    # Polls Redis stream for new events using XREAD with 5s blocking timeout.
-    # Checks cancellation flag before each poll to enable responsive stream termination.
-    if (
-        await redis.get(REDIS_KEY_CHAT_REVOKED.format(chat_id=chat_id))
-        or cancel_event.is_set()
-    ):
-        logger.info("Stream already cancelled for chat %s", chat_id)
-        yield {
-            "event": "complete",
-            "data": json.dumps({"status": "cancelled"}),
-        }
-        return
-
-    while True:
-        if cancel_event.is_set():
-            logger.info("Stream cancelled for chat %s", chat_id)
-            yield {
-                "event": "complete",
-                "data": json.dumps({"status": "cancelled"}),
-            }
-            return
-
-        try:
-            # XREAD blocks up to 1s waiting for new entries after last_id.
-            # Returns immediately if new data arrives, or empty after timeout.
-            response = await redis.xread(
-                {stream_name: last_id},
-                block=1000,
-                count=10,
-            )
-        except Exception as e:
-            logger.debug("Redis xread error, retrying: %s", e)
-            await asyncio.sleep(0.5)
-            continue
-
-        if not response:
-            continue
-
-        _, messages = response[0]
-        for entry_id, fields in messages:
-            if entry_id == last_id:
-                continue
-
-            formatted = {
-                "id": entry_id,
-                "event": fields.get("kind", "content"),
-                "data": fields.get("payload", "") or "",
-            }
-            yield formatted
-            last_id = entry_id
-
-            if formatted["event"] in {"complete", "error"}:
-                return
-
-
 async def _create_event_stream(
     chat_id: UUID, last_event_id: str | None
 ) -> AsyncIterator[dict[str, Any]]:
-    # Two-phase SSE streaming: first replays any missed events (backlog), then switches
-    # to live polling. A concurrent monitor task watches for cancellation requests.
+    # Subscribes to the process-wide hub before replaying the backlog so nothing
+    # appended in between is lost; the subscription drops entries the replay
+    # already delivered. Live entries and cancellations come from the chat's
+    # shared reader instead of a per-connection XREAD loop and pub/sub.
     try:
         async with redis_connection() as redis:
             stream_name = REDIS_KEY_CHAT_STREAM.format(chat_id=chat_id)
-            min_id = f"({last_event_id})" if last_event_id else "-"
+            min_id = f"({last_event_id}" if last_event_id else "-"
             last_id = last_event_id
 
-            async for item in _replay_stream_backlog(redis, stream_name, min_id):
-                yield item
-                last_id = item["id"]
-                if item.get("event") in {"complete", "error"}:
-                    return
-
-            if not last_id:
-                last_id = "0-0"
+            async with stream_hub.subscribe(str(chat_id)) as subscription:
+                async for item in _replay_stream_backlog(redis, stream_name, min_id):
+                    yield item
+                    last_id = item["id"]
+                    if item["event"] in TERMINAL_EVENTS:
+                        return
 
-            cancel_event = asyncio.Event()
-            monitor_task = asyncio.create_task(
-                _monitor_stream_cancellation(chat_id, cancel_event, redis)
-            )
+                if await redis.get(REDIS_KEY_CHAT_REVOKED.format(chat_id=chat_id)):
+                    logger.info("Stream already cancelled for chat %s", chat_id)
+                    yield CANCELLED_EVENT
+                    return
 
-            try:
-                async for event in _stream_live_redis_events(
-                    redis, stream_name, chat_id, last_id, cancel_event
-                ):
+                async for event in subscription.events(last_id):
                     yield event
-                    if event.get("event") in {"complete", "error"}:
-                        return
-            finally:
-                monitor_task.cancel()
-                try:
-                    await monitor_task
-                except asyncio.CancelledError:
-                    pass
 
     except Exception as exc:
         logger.error(
@@ -443,6 +358,39 @@ async def get_chat_messages(
     )
 
 
+@router.get(
+    "/chats/{chat_id}/messages/{message_id}/events",
+    response_model=CursorPaginatedMessageEvents,
+)
+async def get_message_events(
+    chat_id: UUID,
+    message_id: UUID,
+    cursor: str | None = Query(default=None),
+    limit: int = Query(default=settings.MESSAGE_EVENTS_PAGE_SIZE, ge=1, le=1000),
+    current_user: User = Depends(get_current_user),
+    chat_service: ChatService = Depends(get_chat_service),
+) -> CursorPaginatedMessageEvents:
+    return await chat_service.get_message_events(
+        chat_id, message_id, current_user, cursor, limit
+    )
+
+
+@router.get("/chats/{chat_id}/tool-results/{tool_use_id}")
+async def get_tool_result(
+    chat_id: UUID,
+    tool_use_id: str,
+    current_user: User = Depends(get_current_user),
+    chat_service: ChatService = Depends(get_chat_service),
+) -> FileResponse:
+    # FileResponse answers Range requests with 206 partial content
+    path = await chat_service.get_tool_result_path(chat_id, tool_use_id, current_user)
+    return FileResponse(
+        path=path,
+        media_type="text/plain; charset=utf-8",
+        headers={"Cache-Control": "private, max-age=3600"},
+    )
+
+
 @router.post("/chats/{chat_id}/restore", status_code=status.HTTP_204_NO_CONTENT)
 async def restore_chat(
     chat_id: UUID,
@@ -742,17 +690,10 @@ async def queue_message(
 
     attachments: list[MessageAttachmentDict] | None = None
     if attached_files:
-        attachments = list(
-            await asyncio.gather(
-                *[
-                    chat_service.storage_service.save_file(
-                        file,
-                        sandbox_id=chat.sandbox_id,
-                        user_id=str(current_user.id),
-                    )
-                    for file in attached_files
-                ]
-            )
+        attachments = await chat_service.storage_service.save_files(
+            attached_files,
+            sandbox_id=chat.sandbox_id,
+            user_id=str(current_user.id),
         )
 
     try:
@@ -1,8 +1,23 @@
-from collections.abc import Awaitable, Callable
+import json
+import mimetypes
+from collections.abc import AsyncIterator, Awaitable, Callable
+from dataclasses import asdict
+from email.utils import formatdate
 from functools import wraps
-from typing import ParamSpec, TypeVar
-
-from fastapi import APIRouter, Depends, HTTPException, Response, status
+from pathlib import Path
+from typing import Any, ParamSpec, TypeVar
+from urllib.parse import quote
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from sse_starlette.sse import EventSourceResponse
+
+from app.constants import (
+    SANDBOX_BINARY_EXTENSIONS,
+    SANDBOX_FILE_CHANGES_MAX_WAIT_SECONDS,
+    SANDBOX_FILE_TREE_MAX_PAGE_SIZE,
+    SANDBOX_FILE_TREE_PAGE_SIZE,
+)
 
 from app.core.deps import (
     SandboxContext,
@@ -12,8 +27,11 @@ from app.core.deps import (
 from app.models.schemas import (
     AddSecretRequest,
     BrowserStatusResponse,
+    FileChange,
+    FileChangesResponse,
     FileContentResponse,
     FileMetadata,
+    FileTreeResponse,
     IDEUrlResponse,
     MessageResponse,
     PortPreviewLink,
@@ -30,6 +48,7 @@ from app.models.schemas import (
 )
 from app.services.exceptions import SandboxException
 from app.services.sandbox import SandboxService
+from app.services.sandbox.types import FileChangeSet
 
 
 router = APIRouter()
@@ -133,6 +152,117 @@ async def get_files_metadata(
     return SandboxFilesMetadataResponse(files=[FileMetadata(**f) for f in files])
 
 
+def _parse_etag(value: str | None) -> tuple[str, int] | None:
+    # ETags look like "<index>.<version>"; anything else never matches
+    if not value:
+        return None
+    index, _, version = value.strip().removeprefix("W/").strip('"').rpartition(".")
+    if not index or not version.isdigit():
+        return None
+    return index, int(version)
+
+
+def _file_changes_response(change_set: FileChangeSet) -> FileChangesResponse:
+    return FileChangesResponse(
+        index=change_set.index,
+        version=change_set.version,
+        reset=change_set.reset,
+        changes=[
+            FileChange(
+                version=change.version,
+                path=change.path,
+                file=FileMetadata(**asdict(change.metadata))
+                if change.metadata
+                else None,
+            )
+            for change in change_set.changes
+        ],
+    )
+
+
+@router.get("/{sandbox_id}/files/tree", response_model=FileTreeResponse)
+@handle_sandbox_errors("get file tree")
+async def get_file_tree(
+    response: Response,
+    path: str = "",
+    cursor: str | None = None,
+    limit: int = Query(
+        default=SANDBOX_FILE_TREE_PAGE_SIZE, ge=1, le=SANDBOX_FILE_TREE_MAX_PAGE_SIZE
+    ),
+    depth: int | None = Query(default=None, ge=1),
+    if_none_match: str | None = Header(default=None),
+    context: SandboxContext = Depends(get_sandbox_context),
+    sandbox_service: SandboxService = Depends(get_sandbox_service_for_context),
+) -> Response | FileTreeResponse:
+    page = await sandbox_service.get_file_tree(
+        context.sandbox_id,
+        path=path,
+        cursor=cursor,
+        limit=limit,
+        depth=depth,
+        if_none_match=_parse_etag(if_none_match),
+    )
+    if page.not_modified:
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": page.etag}
+        )
+    response.headers["ETag"] = page.etag
+    return FileTreeResponse(
+        index=page.index,
+        version=page.version,
+        files=[FileMetadata(**asdict(item)) for item in page.entries],
+        next_cursor=page.next_cursor,
+    )
+
+
+@router.get("/{sandbox_id}/files/changes", response_model=FileChangesResponse)
+@handle_sandbox_errors("get file changes")
+async def get_file_changes(
+    index: str | None = None,
+    since: int = Query(default=0, ge=0),
+    wait: float = Query(default=0, ge=0, le=SANDBOX_FILE_CHANGES_MAX_WAIT_SECONDS),
+    context: SandboxContext = Depends(get_sandbox_context),
+    sandbox_service: SandboxService = Depends(get_sandbox_service_for_context),
+) -> FileChangesResponse:
+    change_set = await sandbox_service.get_file_changes(
+        context.sandbox_id, index, since, wait
+    )
+    return _file_changes_response(change_set)
+
+
+@router.get("/{sandbox_id}/files/changes/stream")
+async def stream_file_changes(
+    index: str | None = None,
+    since: int = Query(default=0, ge=0),
+    last_event_id: str | None = Header(default=None),
+    context: SandboxContext = Depends(get_sandbox_context),
+    sandbox_service: SandboxService = Depends(get_sandbox_service_for_context),
+) -> EventSourceResponse:
+    # Event ids are ETags without quotes, so a reconnecting EventSource
+    # resumes where it left off
+    resume = _parse_etag(last_event_id)
+    if resume is not None:
+        index, since = resume
+
+    async def events() -> AsyncIterator[dict[str, Any]]:
+        try:
+            async for change_set in sandbox_service.stream_file_changes(
+                context.sandbox_id, index, since
+            ):
+                yield {
+                    "event": "reset" if change_set.reset else "changes",
+                    "id": f"{change_set.index}.{change_set.version}",
+                    "data": _file_changes_response(change_set).model_dump_json(),
+                }
+        except SandboxException as e:
+            yield {"event": "error", "data": json.dumps({"error": str(e)})}
+
+    return EventSourceResponse(
+        events(),
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get(
     "/{sandbox_id}/files/content/{file_path:path}", response_model=FileContentResponse
 )
@@ -158,6 +288,138 @@ async def get_file_content(
         )
 
 
+def _file_media_type(file_path: str) -> tuple[str, bool]:
+    # The media type and whether it may be shown inline. Sandbox files are
+    # untrusted and served from the API's origin, so only plain text, JSON
+    # and raster images keep their own type; other text (HTML, SVG, ...) is
+    # sent as text/plain and other binaries as a download.
+    media_type, _ = mimetypes.guess_type(file_path)
+    if media_type in ("text/plain", "application/json") or (
+        media_type and media_type.startswith("image/") and media_type != "image/svg+xml"
+    ):
+        return media_type, True
+    if Path(file_path).suffix.lstrip(".").lower() in SANDBOX_BINARY_EXTENSIONS:
+        return "application/octet-stream", False
+    return "text/plain", True
+
+
+def _content_disposition(file_path: str, inline: bool) -> str:
+    filename = Path(file_path).name or "file"
+    ascii_filename = (
+        filename.encode("ascii", "ignore").decode("ascii").replace('"', "") or "file"
+    )
+    disposition = "inline" if inline else "attachment"
+    return (
+        f'{disposition}; filename="{ascii_filename}"; '
+        f"filename*=UTF-8''{quote(filename, safe='')}"
+    )
+
+
+def _parse_byte_range(value: str, size: int) -> tuple[int, int] | None:
+    # A single "bytes=" range as [start, end); anything else is ignored and
+    # the whole window is served, as RFC 9110 allows
+    unit, _, spec = value.partition("=")
+    first, separator, last = spec.strip().partition("-")
+    if unit.strip().lower() != "bytes" or not separator or "," in spec:
+        return None
+    if not (first.isdigit() or first == "") or not (last.isdigit() or last == ""):
+        return None
+
+    if not first:
+        if not last:
+            return None
+        start, end = max(size - int(last), 0), size
+    else:
+        start = int(first)
+        end = min(int(last) + 1, size) if last else size
+        if last and int(last) < start:
+            return None
+
+    if start >= end:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+    return start, end
+
+
+@router.get("/{sandbox_id}/files/raw/{file_path:path}")
+@handle_sandbox_errors("stream file")
+async def stream_file_content(
+    file_path: str,
+    head: int | None = Query(default=None, ge=0),
+    tail: int | None = Query(default=None, ge=0),
+    max_bytes: int | None = Query(default=None, ge=1),
+    range_header: str | None = Header(default=None, alias="Range"),
+    context: SandboxContext = Depends(get_sandbox_context),
+    sandbox_service: SandboxService = Depends(get_sandbox_service_for_context),
+) -> Response:
+    # Raw bytes instead of base64 in JSON. A Range header takes precedence
+    # over the head/tail windows; max_bytes caps whichever applies, keeping
+    # the end of the file for tail windows.
+    if head is not None and tail is not None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Only one of head and tail can be given",
+        )
+
+    metadata = await sandbox_service.stat_file(context.sandbox_id, file_path)
+    if metadata is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"File not found: {file_path}",
+        )
+    if metadata.type != "file":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Not a regular file: {file_path}",
+        )
+
+    size = metadata.size
+    byte_range = _parse_byte_range(range_header, size) if range_header else None
+    if byte_range is not None:
+        start, end = byte_range
+    elif tail is not None:
+        start, end = max(size - tail, 0), size
+    elif head is not None:
+        start, end = 0, min(head, size)
+    else:
+        start, end = 0, size
+
+    if max_bytes is not None and end - start > max_bytes:
+        if tail is not None and byte_range is None:
+            start = end - max_bytes
+        else:
+            end = start + max_bytes
+
+    # No Content-Length: the file can shrink between the stat and the read,
+    # and a short body would break a connection that promised more bytes
+    media_type, inline = _file_media_type(file_path)
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": _content_disposition(file_path, inline),
+        "Content-Security-Policy": "sandbox",
+        "X-Content-Type-Options": "nosniff",
+        "Last-Modified": formatdate(metadata.modified, usegmt=True),
+        "X-File-Size": str(size),
+    }
+    status_code = status.HTTP_200_OK
+    if byte_range is not None:
+        status_code = status.HTTP_206_PARTIAL_CONTENT
+        headers["Content-Range"] = f"bytes {start}-{end - 1}/{size}"
+
+    chunks = await sandbox_service.stream_file(
+        context.sandbox_id, file_path, start, end - start
+    )
+    return StreamingResponse(
+        chunks,
+        status_code=status_code,
+        media_type=media_type,
+        headers=headers,
+    )
+
+
 @router.put("/{sandbox_id}/files", response_model=UpdateFileResponse)
 @handle_sandbox_errors("update file")
 async def update_file_in_sandbox(
@@ -236,9 +498,9 @@ async def download_sandbox_files(
     context: SandboxContext = Depends(get_sandbox_context),
     sandbox_service: SandboxService = Depends(get_sandbox_service_for_context),
 ) -> Response:
-    zip_bytes = await sandbox_service.generate_zip_download(context.sandbox_id)
-    return Response(
-        content=zip_bytes,
+    zip_stream = await sandbox_service.stream_zip_download(context.sandbox_id)
+    return StreamingResponse(
+        zip_stream,
         media_type="application/zip",
         headers={
             "Content-Disposition": f'attachment; filename="sandbox_{context.sandbox_id}.zip"'
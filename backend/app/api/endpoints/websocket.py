@@ -16,7 +16,7 @@ from app.db.session import SessionLocal
 from sqlalchemy import select
 
 from app.models.db_models import Chat, User
-from app.services.sandbox import DockerConfig, LocalDockerProvider, SandboxService
+from app.services.sandbox import DockerConfig, SandboxService, get_shared_provider
 from app.utils.queue import drain_queue, put_with_overflow
 
 settings = get_settings()
@@ -196,7 +196,7 @@ async def terminal_websocket(
         sandbox_domain=settings.DOCKER_SANDBOX_DOMAIN,
         traefik_network=settings.DOCKER_TRAEFIK_NETWORK,
     )
-    provider = LocalDockerProvider(config=docker_config)
+    provider = get_shared_provider(docker_config)
     sandbox_service = SandboxService(provider)
     session = TerminalSession(sandbox_service, sandbox_id, websocket)
 
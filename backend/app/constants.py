@@ -4,6 +4,8 @@ MAX_RESOURCE_NAME_LENGTH: Final[int] = 50
 MIN_RESOURCE_NAME_LENGTH: Final[int] = 2
 MAX_RESOURCES_PER_USER: Final[int] = 10
 MAX_RESOURCE_SIZE_BYTES: Final[int] = 100 * 1024
+# Prebuilt sandbox resource bundles kept on disk, least recently used go first
+RESOURCE_BUNDLE_CACHE_MAX_ENTRIES: Final[int] = 256
 
 REDIS_KEY_CHAT_TASK: Final[str] = "chat:{chat_id}:task"
 REDIS_KEY_CHAT_STREAM: Final[str] = "chat:{chat_id}:stream"
@@ -14,12 +16,24 @@ REDIS_KEY_PERMISSION_RESPONSE: Final[str] = "permission_response:{request_id}"
 REDIS_KEY_USER_SETTINGS: Final[str] = "user_settings:{user_id}"
 REDIS_KEY_MODELS_LIST: Final[str] = "models:list:{active_only}"
 REDIS_KEY_CHAT_CONTEXT_USAGE: Final[str] = "chat:{chat_id}:context_usage"
+REDIS_KEY_CHAT_CONTEXT_CALIBRATED: Final[str] = "chat:{chat_id}:context_calibrated"
 REDIS_KEY_CHAT_QUEUE: Final[str] = "chat:{chat_id}:queue"
+REDIS_KEY_CHAT_CLI_OWNER: Final[str] = "chat:{chat_id}:cli_owner"
+REDIS_KEY_SANDBOX_WARM_POOL: Final[str] = "sandbox:warm_pool"
+REDIS_KEY_SANDBOX_WARM_POOL_REFILL_LOCK: Final[str] = "sandbox:warm_pool:refill_lock"
 
 QUEUE_MESSAGE_TTL_SECONDS: Final[int] = 3600
 
 SANDBOX_AUTO_PAUSE_TIMEOUT: Final[int] = 3000
 SANDBOX_DEFAULT_COMMAND_TIMEOUT: Final[int] = 120
+# Backstop for cached containers and port mappings; Docker events invalidate sooner
+SANDBOX_CONTAINER_CACHE_TTL_SECONDS: Final[int] = 300
+# How long a container is trusted to still be running without a reload
+SANDBOX_CONTAINER_STATUS_TTL_SECONDS: Final[int] = 10
+SANDBOX_FILE_TREE_PAGE_SIZE: Final[int] = 1000
+SANDBOX_FILE_TREE_MAX_PAGE_SIZE: Final[int] = 10000
+# Upper bound for long-polling the file index for changes
+SANDBOX_FILE_CHANGES_MAX_WAIT_SECONDS: Final[int] = 30
 MAX_CHECKPOINTS_PER_SANDBOX: Final[int] = 20
 CHECKPOINT_BASE_DIR: Final[str] = "/home/user/.checkpoints"
 PTY_OUTPUT_QUEUE_SIZE: Final[int] = 512
@@ -17,7 +17,7 @@ from app.services.command import CommandService
 from app.services.exceptions import UserException
 from app.services.message import MessageService
 from app.services.refresh_token import RefreshTokenService
-from app.services.sandbox import DockerConfig, LocalDockerProvider, SandboxService
+from app.services.sandbox import DockerConfig, SandboxService, get_shared_provider
 from app.services.scheduler import SchedulerService
 from app.services.marketplace import MarketplaceService
 from app.services.plugin_installer import PluginInstallerService
@@ -85,7 +85,7 @@ def get_scheduler_service() -> SchedulerService:
     return SchedulerService(session_factory=SessionLocal)
 
 
-def _create_docker_config() -> DockerConfig:
+def create_docker_config() -> DockerConfig:
     from app.core.config import get_settings
 
     settings = get_settings()
@@ -100,11 +100,11 @@ def _create_docker_config() -> DockerConfig:
 
 
 async def get_sandbox_service() -> AsyncIterator[SandboxService]:
-    provider = LocalDockerProvider(config=_create_docker_config())
+    sandbox_service = SandboxService(get_shared_provider(create_docker_config()))
     try:
-        yield SandboxService(provider)
+        yield sandbox_service
     finally:
-        await provider.cleanup()
+        await sandbox_service.cleanup()
 
 
 async def get_storage_service(
@@ -143,11 +143,11 @@ async def get_sandbox_context(
 async def get_sandbox_service_for_context(
     context: SandboxContext = Depends(get_sandbox_context),
 ) -> AsyncIterator[SandboxService]:
-    provider = LocalDockerProvider(config=_create_docker_config())
+    sandbox_service = SandboxService(get_shared_provider(create_docker_config()))
     try:
-        yield SandboxService(provider)
+        yield sandbox_service
     finally:
-        await provider.cleanup()
+        await sandbox_service.cleanup()
 
 
 async def get_chat_service(
@@ -165,8 +165,19 @@ def setup_middleware(app: FastAPI) -> None:
             "X-Requested-With",
             "Accept",
             "Origin",
+            "Range",
+            "If-None-Match",
+            "Last-Event-ID",
+        ],
+        expose_headers=[
+            "X-Message-Id",
+            "X-Request-ID",
+            "X-Process-Time",
+            "Accept-Ranges",
+            "Content-Range",
+            "ETag",
+            "X-File-Size",
         ],
-        expose_headers=["X-Message-Id", "X-Request-ID", "X-Process-Time"],
     )
 
     session_secret = settings.SESSION_SECRET_KEY or settings.SECRET_KEY
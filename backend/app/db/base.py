@@ -1,2 +1,3 @@
 from app.db.base_class import Base  # noqa
-from app.models.db_models import User, Chat, Message, MessageAttachment, UserSettings  # noqa
+from app.models.db_models import User, Chat, Message, MessageAttachment  # noqa
+from app.models.db_models import MessageEvent, UserSettings  # noqa
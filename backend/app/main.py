@@ -27,7 +27,12 @@ from app.core.config import get_settings
 from app.core.middleware import (
     setup_middleware,
 )
+from app.core.deps import create_docker_config
 from app.db.session import engine, celery_engine, SessionLocal
+from app.services.sandbox import SandboxService, get_shared_provider
+from app.services.sandbox.docker_pool import docker_manager
+from app.services.sandbox.warm_pool import warm_sandbox_pool
+from app.utils.redis import redis_manager
 from app.admin.config import create_admin
 from app.admin.views import (
     AIModelAdmin,
@@ -46,9 +51,16 @@ settings = get_settings()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    if warm_sandbox_pool.enabled:
+        warm_sandbox_pool.start(
+            SandboxService(get_shared_provider(create_docker_config()))
+        )
     yield
+    await warm_sandbox_pool.stop()
+    await redis_manager.close()
     await engine.dispose()
     await celery_engine.dispose()
+    docker_manager.close()
 
 
 def create_application() -> FastAPI:
@@ -8,7 +8,7 @@ from .enums import (
     TaskStatus,
 )
 from .ai_model import AIModel
-from .chat import Chat, Message, MessageAttachment
+from .chat import Chat, Message, MessageAttachment, MessageEvent
 from .refresh_token import RefreshToken
 from .scheduled_tasks import ScheduledTask, TaskExecution
 from .user import User, UserSettings
@@ -25,6 +25,7 @@ __all__ = [
     "Chat",
     "Message",
     "MessageAttachment",
+    "MessageEvent",
     "RefreshToken",
     "ScheduledTask",
     "TaskExecution",
@@ -83,6 +83,12 @@ class Message(Base):
     attachments = relationship(
         "MessageAttachment", back_populates="message", cascade="all, delete-orphan"
     )
+    events = relationship(
+        "MessageEvent",
+        back_populates="message",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
 
     __table_args__ = (
         Index("idx_messages_chat_id_created_at", "chat_id", "created_at"),
@@ -117,3 +123,22 @@ class MessageAttachment(Base):
     filename: Mapped[str | None] = mapped_column(String, nullable=True)
 
     message = relationship("Message", back_populates="attachments")
+
+
+class MessageEvent(Base):
+    __tablename__ = "message_events"
+
+    id: Mapped[UUID] = mapped_column(GUID(), primary_key=True, default=uuid.uuid4)
+    message_id: Mapped[UUID] = mapped_column(
+        GUID(),
+        ForeignKey("messages.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    seq: Mapped[int] = mapped_column(Integer, nullable=False)
+    payload: Mapped[str] = mapped_column(String, nullable=False)
+
+    message = relationship("Message", back_populates="events")
+
+    __table_args__ = (
+        Index("idx_message_events_message_id_seq", "message_id", "seq", unique=True),
+    )
@@ -17,6 +17,7 @@ from .chat import (
     ChatStatusResponse,
     ChatUpdate,
     ContextUsage,
+    CursorPaginatedMessageEvents,
     CursorPaginatedMessages,
     EnhancePromptResponse,
     ForkChatRequest,
@@ -40,8 +41,11 @@ from .permissions import PermissionRequest, PermissionRequestResponse, Permissio
 from .sandbox import (
     AddSecretRequest,
     BrowserStatusResponse,
+    FileChange,
+    FileChangesResponse,
     FileContentResponse,
     FileMetadata,
+    FileTreeResponse,
     IDEUrlResponse,
     SandboxFilesMetadataResponse,
     StartBrowserRequest,
@@ -109,6 +113,7 @@ __all__ = [
     "Message",
     "MessageAttachment",
     "CursorPaginatedMessages",
+    "CursorPaginatedMessageEvents",
     "PaginatedChats",
     "PaginatedMessages",
     "PermissionRespondResponse",
@@ -127,8 +132,11 @@ __all__ = [
     # sandbox
     "AddSecretRequest",
     "BrowserStatusResponse",
+    "FileChange",
+    "FileChangesResponse",
     "FileContentResponse",
     "FileMetadata",
+    "FileTreeResponse",
     "IDEUrlResponse",
     "SandboxFilesMetadataResponse",
     "StartBrowserRequest",
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Literal
+from typing import Any, Literal
 from uuid import UUID
 
 from fastapi import UploadFile
@@ -121,6 +121,10 @@ class CursorPaginatedMessages(CursorPaginatedResponse[Message]):
     pass
 
 
+class CursorPaginatedMessageEvents(CursorPaginatedResponse[dict[str, Any]]):
+    pass
+
+
 class ChatCompletionResponse(BaseModel):
     chat_id: UUID
     message_id: UUID
@@ -32,6 +32,26 @@ class SandboxFilesMetadataResponse(BaseModel):
     files: list[FileMetadata]
 
 
+class FileTreeResponse(BaseModel):
+    index: str
+    version: int
+    files: list[FileMetadata]
+    next_cursor: str | None = None
+
+
+class FileChange(BaseModel):
+    version: int
+    path: str
+    file: FileMetadata | None = None
+
+
+class FileChangesResponse(BaseModel):
+    index: str
+    version: int
+    reset: bool
+    changes: list[FileChange]
+
+
 class FileContentResponse(BaseModel):
     content: str
     path: str
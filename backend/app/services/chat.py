@@ -2,6 +2,7 @@ import asyncio
 import logging
 import math
 from datetime import datetime, timezone
+from pathlib import Path
 from typing import cast
 from uuid import UUID
 
@@ -25,6 +26,7 @@ from app.models.schemas import (
     ChatCreate,
     ChatRequest,
     ChatUpdate,
+    CursorPaginatedMessageEvents,
     CursorPaginatedMessages,
     PaginatedChats,
     PaginationParams,
@@ -34,10 +36,11 @@ from app.prompts.system_prompt import build_system_prompt_for_chat
 from app.services.ai_model import AIModelService
 from app.services.base import BaseDbService, SessionFactoryType
 from app.services.claude_agent import ClaudeAgentService
-from app.services.exceptions import ChatException, ErrorCode
+from app.services.exceptions import ChatException, ErrorCode, StorageException
 from app.services.message import MessageService
-from app.services.sandbox import DockerConfig, LocalDockerProvider, SandboxService
+from app.services.sandbox import DockerConfig, SandboxService, get_shared_provider
 from app.services.storage import StorageService
+from app.services.streaming.tool_results import ToolResultStore
 from app.services.user import UserService
 from app.tasks.chat_processor import process_chat
 from app.utils.message_events import extract_user_prompt_and_reviews
@@ -116,7 +119,7 @@ class ChatService(BaseDbService[Chat]):
         )
         await self._validate_api_keys(user_settings, chat_data.model_id)
 
-        sandbox_id = await self.sandbox_service.create_sandbox()
+        sandbox_id, prewarmed = await self.sandbox_service.claim_sandbox()
 
         github_token = user_settings.github_personal_access_token
         openrouter_api_key = user_settings.openrouter_api_key
@@ -138,6 +141,7 @@ class ChatService(BaseDbService[Chat]):
             user_id=str(user.id),
             auto_compact_disabled=auto_compact_disabled,
             codex_auth_json=codex_auth_json,
+            prewarmed=prewarmed,
         )
 
         async with self.session_factory() as db:
@@ -256,6 +260,8 @@ class ChatService(BaseDbService[Chat]):
             if chat.sandbox_id:
                 await self.sandbox_service.delete_sandbox(chat.sandbox_id)
 
+        await asyncio.to_thread(ToolResultStore().delete_chat_results, str(chat_id))
+
     async def get_chat_sandbox_id(self, chat_id: UUID, user: User) -> str | None:
         async with self.session_factory() as db:
             result = await db.execute(
@@ -357,6 +363,48 @@ class ChatService(BaseDbService[Chat]):
 
         return await self.message_service.get_chat_messages(chat_id, cursor, limit)
 
+    async def get_message_events(
+        self,
+        chat_id: UUID,
+        message_id: UUID,
+        user: User,
+        cursor: str | None = None,
+        limit: int = settings.MESSAGE_EVENTS_PAGE_SIZE,
+    ) -> CursorPaginatedMessageEvents:
+        has_access = await self._verify_chat_access(chat_id, user.id)
+        if not has_access:
+            raise ChatException(
+                "Chat not found or you don't have permission to access messages",
+                error_code=ErrorCode.CHAT_ACCESS_DENIED,
+                details={"chat_id": str(chat_id)},
+                status_code=403,
+            )
+
+        return await self.message_service.get_message_events(
+            chat_id, message_id, cursor, limit
+        )
+
+    async def get_tool_result_path(
+        self, chat_id: UUID, tool_use_id: str, user: User
+    ) -> Path:
+        has_access = await self._verify_chat_access(chat_id, user.id)
+        if not has_access:
+            raise ChatException(
+                "Chat not found or you don't have permission to access it",
+                error_code=ErrorCode.CHAT_ACCESS_DENIED,
+                details={"chat_id": str(chat_id)},
+                status_code=403,
+            )
+
+        path = ToolResultStore().get_path(str(chat_id), tool_use_id)
+        if not path.is_file():
+            raise StorageException(
+                "Tool result not found",
+                details={"tool_use_id": tool_use_id},
+                status_code=404,
+            )
+        return path
+
     async def initiate_chat_completion(
         self,
         request: ChatRequest,
@@ -380,17 +428,10 @@ class ChatService(BaseDbService[Chat]):
 
         attachments: list[MessageAttachmentDict] | None = None
         if request.attached_files:
-            attachments = list(
-                await asyncio.gather(
-                    *[
-                        self.storage_service.save_file(
-                            file,
-                            sandbox_id=chat.sandbox_id,
-                            user_id=str(current_user.id),
-                        )
-                        for file in request.attached_files
-                    ]
-                )
+            attachments = await self.storage_service.save_files(
+                request.attached_files,
+                sandbox_id=chat.sandbox_id,
+                user_id=str(current_user.id),
             )
 
         try:
@@ -543,7 +584,7 @@ class ChatService(BaseDbService[Chat]):
             sandbox_domain=settings.DOCKER_SANDBOX_DOMAIN,
             traefik_network=settings.DOCKER_TRAEFIK_NETWORK,
         )
-        provider = LocalDockerProvider(config=docker_config)
+        provider = get_shared_provider(docker_config)
         fork_sandbox_service = SandboxService(provider)
 
         try:
@@ -611,6 +652,13 @@ class ChatService(BaseDbService[Chat]):
                     await db.commit()
                     await db.refresh(new_chat)
 
+                await asyncio.to_thread(
+                    ToolResultStore().copy_chat_results,
+                    str(source_chat_id),
+                    str(new_chat.id),
+                    [msg.content for msg in messages],
+                )
+
                 return (new_chat, len(messages))
 
             except Exception:
@@ -620,7 +668,7 @@ class ChatService(BaseDbService[Chat]):
                     pass
                 raise
         finally:
-            await provider.cleanup()
+            await fork_sandbox_service.cleanup()
 
     async def _verify_chat_access(self, chat_id: UUID, user_id: UUID) -> bool:
         async with self.session_factory() as db:
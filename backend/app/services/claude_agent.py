@@ -1,6 +1,7 @@
 import logging
 import re
 from collections.abc import AsyncIterator, Callable
+from contextlib import aclosing
 from types import TracebackType
 from typing import Any, Literal, Self
 
@@ -19,6 +20,7 @@ from app.models.db_models import Chat, User, UserSettings
 from app.models.db_models.enums import ModelProvider
 from app.prompts.enhance_prompt import get_enhance_prompt
 from app.services.ai_model import AIModelService
+from app.services.claude_sessions import claude_session_pool
 from app.services.exceptions import ClaudeAgentException
 from app.services.sandbox import DockerConfig, DockerSandboxTransport
 from app.services.streaming.events import StreamEvent
@@ -101,6 +103,7 @@ class ClaudeAgentService:
         self.session_factory = session_factory or SessionLocal
         self._total_cost_usd = 0.0
         self._active_transport: DockerSandboxTransport | None = None
+        self._persistent_chat_id: str | None = None
 
     async def __aenter__(self) -> Self:
         return self
@@ -127,12 +130,14 @@ class ClaudeAgentService:
         sandbox_id: str,
         prompt_iterable: AsyncIterator[dict[str, Any]],
         options: ClaudeAgentOptions,
+        multi_turn: bool = False,
     ) -> DockerSandboxTransport:
         return DockerSandboxTransport(
             sandbox_id=sandbox_id,
             docker_config=_create_docker_config(),
             prompt=prompt_iterable,
             options=options,
+            multi_turn=multi_turn,
         )
 
     async def get_ai_stream(
@@ -185,6 +190,17 @@ class ClaudeAgentService:
         }
         prompt_iterable = self._create_prompt_iterable(prompt_message)
 
+        if settings.CLAUDE_PERSISTENT_SESSIONS_ENABLED:
+            async for event in self._stream_persistent_turn(
+                chat_id=chat_id,
+                sandbox_id=sandbox_id_str,
+                options=options,
+                prompt_message=prompt_message,
+                session_callback=session_callback,
+            ):
+                yield event
+            return
+
         transport = self._create_sandbox_transport(
             sandbox_id=sandbox_id_str,
             prompt_iterable=prompt_iterable,
@@ -219,6 +235,55 @@ class ClaudeAgentService:
             finally:
                 self._active_transport = None
 
+    async def _stream_persistent_turn(
+        self,
+        *,
+        chat_id: str,
+        sandbox_id: str,
+        options: ClaudeAgentOptions,
+        prompt_message: dict[str, Any],
+        session_callback: Callable[[str], None] | None,
+    ) -> AsyncIterator[StreamEvent]:
+        # The CLI process stays up between turns; later turns are written to
+        # its stdin instead of booting the CLI and its MCP servers again
+        processor = StreamProcessor(
+            tool_registry=self.tool_registry,
+            session_handler=self._create_session_handler(session_callback),
+        )
+        self._persistent_chat_id = chat_id
+
+        try:
+            async with aclosing(
+                claude_session_pool.stream_turn(
+                    chat_id=chat_id,
+                    options=options,
+                    message=prompt_message,
+                    transport_factory=lambda: self._create_sandbox_transport(
+                        sandbox_id=sandbox_id,
+                        prompt_iterable=self._create_prompt_iterable(prompt_message),
+                        options=options,
+                        multi_turn=True,
+                    ),
+                )
+            ) as messages:
+                async for message in messages:
+                    for event in processor.emit_events_for_message(message):
+                        if event:
+                            yield event
+                            if event.get("tool", {}).get("name") == "ExitPlanMode":
+                                await claude_session_pool.set_permission_mode(
+                                    chat_id, "auto"
+                                )
+
+            # The pool rewrites the CLI's running total to this turn's cost
+            self._total_cost_usd = processor.total_cost_usd
+
+        except ClaudeSDKError as e:
+            raise ClaudeAgentException(f"Claude SDK error: {str(e)}")
+
+        finally:
+            self._persistent_chat_id = None
+
     def get_total_cost_usd(self) -> float:
         return self._total_cost_usd
 
@@ -228,6 +293,14 @@ class ClaudeAgentService:
         return SessionHandler(session_callback)
 
     async def cancel_active_stream(self) -> None:
+        if self._persistent_chat_id:
+            try:
+                await claude_session_pool.discard(self._persistent_chat_id)
+            except Exception as e:
+                logger.error("Error closing persistent Claude session: %s", e)
+            finally:
+                self._persistent_chat_id = None
+
         if self._active_transport:
             try:
                 await self._active_transport.close()
@@ -291,7 +364,14 @@ class ClaudeAgentService:
     def _build_permission_server(
         self, permission_mode: str, chat_id: str
     ) -> dict[str, Any]:
-        chat_token = create_chat_scoped_token(chat_id)
+        expires_minutes = None
+        if settings.CLAUDE_PERSISTENT_SESSIONS_ENABLED:
+            # A persistent CLI keeps the token it was started with
+            expires_minutes = (
+                settings.CHAT_SCOPED_TOKEN_EXPIRE_MINUTES
+                + settings.CLAUDE_PERSISTENT_SESSION_MAX_AGE_SECONDS // 60
+            )
+        chat_token = create_chat_scoped_token(chat_id, expires_minutes)
 
         if settings.DOCKER_PERMISSION_API_URL:
             api_base_url = settings.DOCKER_PERMISSION_API_URL
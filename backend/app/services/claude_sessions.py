@@ -0,0 +1,439 @@
+import asyncio
+import atexit
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections.abc import AsyncGenerator, AsyncIterator, Callable, Coroutine
+from contextlib import suppress
+from dataclasses import replace
+from typing import Any, TypeVar
+
+from celery.signals import worker_process_shutdown, worker_shutdown
+from claude_agent_sdk import ClaudeAgentOptions, ClaudeSDKClient, ResultMessage
+from claude_agent_sdk._errors import CLIConnectionError
+
+from app.constants import REDIS_KEY_CHAT_CLI_OWNER
+from app.core.config import get_settings
+from app.services.sandbox import DockerSandboxTransport
+from app.utils.redis import redis_connection
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Credentials minted per turn; rotating them must not force a new process
+VOLATILE_MCP_ENV_KEYS = frozenset({"CHAT_TOKEN"})
+REAP_INTERVAL_SECONDS = 30.0
+SHUTDOWN_TIMEOUT_SECONDS = 10.0
+_TURN_END = object()
+
+# Deletes an owner key only while it still holds this worker's token
+_RELEASE_OWNER_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+def _without_volatile_env(config: Any) -> Any:
+    if not isinstance(config, dict) or not isinstance(config.get("env"), dict):
+        return config
+    env = {
+        key: value
+        for key, value in config["env"].items()
+        if key not in VOLATILE_MCP_ENV_KEYS
+    }
+    return {**config, "env": env}
+
+
+def options_fingerprint(options: ClaudeAgentOptions) -> str:
+    # Everything that ends up on the CLI command line or in its environment;
+    # a turn whose options differ needs a fresh process
+    mcp_servers: Any = options.mcp_servers
+    if isinstance(mcp_servers, dict):
+        mcp_servers = {
+            name: _without_volatile_env(config) for name, config in mcp_servers.items()
+        }
+    fields = {
+        "system_prompt": options.system_prompt,
+        "model": options.model,
+        "permission_mode": options.permission_mode,
+        "allowed_tools": options.allowed_tools,
+        "disallowed_tools": options.disallowed_tools,
+        "mcp_servers": mcp_servers,
+        "env": options.env,
+        "cwd": str(options.cwd) if options.cwd else None,
+        "user": options.user,
+        "setting_sources": options.setting_sources,
+        "permission_prompt_tool_name": options.permission_prompt_tool_name,
+        "max_thinking_tokens": options.max_thinking_tokens,
+    }
+    payload = json.dumps(fields, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+async def _single_message(message: dict[str, Any]) -> AsyncIterator[dict[str, Any]]:
+    yield message
+
+
+class PersistentClaudeSession:
+    # One long-lived CLI process for a chat. The SDK client keeps an anyio
+    # task group open for the life of the process, so connect and disconnect
+    # both happen in the session's own owner task.
+    def __init__(
+        self,
+        chat_id: str,
+        fingerprint: str,
+        transport: DockerSandboxTransport,
+        options: ClaudeAgentOptions,
+    ) -> None:
+        self.chat_id = chat_id
+        self.fingerprint: str | None = fingerprint
+        self.owner_token = uuid.uuid4().hex
+        self.session_id: str | None = options.resume
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.busy = False
+        # The CLI reports the running total for its process in each result
+        self.total_cost_usd = 0.0
+        self._transport = transport
+        self._options = options
+        self._client: ClaudeSDKClient | None = None
+        self._closing = asyncio.Event()
+        self._owner_task: asyncio.Task[None] | None = None
+
+    @property
+    def alive(self) -> bool:
+        return (
+            self._client is not None
+            and not self._closing.is_set()
+            and self._transport.is_ready()
+        )
+
+    def expired(self, now: float) -> bool:
+        return (
+            now - self.last_used
+            > settings.CLAUDE_PERSISTENT_SESSION_IDLE_TIMEOUT_SECONDS
+            or now - self.created_at
+            > settings.CLAUDE_PERSISTENT_SESSION_MAX_AGE_SECONDS
+        )
+
+    async def start(self) -> None:
+        ready: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._owner_task = asyncio.create_task(self._own(ready))
+        await ready
+
+    async def _own(self, ready: asyncio.Future[None]) -> None:
+        try:
+            async with self._transport:
+                async with ClaudeSDKClient(
+                    options=self._options, transport=self._transport
+                ) as client:
+                    self._client = client
+                    ready.set_result(None)
+                    await self._closing.wait()
+        except Exception as exc:
+            if not ready.done():
+                ready.set_exception(exc)
+            else:
+                logger.warning(
+                    "Persistent Claude session for chat %s ended: %s",
+                    self.chat_id,
+                    exc,
+                )
+        finally:
+            self._client = None
+            self._closing.set()
+            if not ready.done():
+                ready.cancel()
+
+    async def run_turn(
+        self, message: dict[str, Any], sink: Callable[[Any], None]
+    ) -> None:
+        client = self._client
+        if client is None or not self.alive:
+            raise CLIConnectionError("Persistent Claude session is closed")
+
+        self.busy = True
+        try:
+            await client.query(_single_message(message))
+            async for sdk_message in client.receive_response():
+                if isinstance(sdk_message, ResultMessage):
+                    self.session_id = sdk_message.session_id
+                    sdk_message = self._with_turn_cost(sdk_message)
+                sink(sdk_message)
+        except BaseException:
+            # A turn that stopped before its result leaves output in flight
+            self._closing.set()
+            raise
+        finally:
+            self.busy = False
+            self.last_used = time.monotonic()
+
+    def _with_turn_cost(self, result: ResultMessage) -> ResultMessage:
+        if result.total_cost_usd is None:
+            return result
+        previous_total, self.total_cost_usd = self.total_cost_usd, result.total_cost_usd
+        return replace(result, total_cost_usd=result.total_cost_usd - previous_total)
+
+    async def set_permission_mode(self, mode: str) -> None:
+        if self._client is None:
+            return
+        await self._client.set_permission_mode(mode)
+        # The CLI no longer matches the options it was started with
+        self.fingerprint = None
+
+    async def close(self) -> None:
+        self._closing.set()
+        if self._owner_task:
+            with suppress(asyncio.CancelledError):
+                await self._owner_task
+
+
+class ClaudeSessionPool:
+    # Sessions outlive the Celery task (and event loop) that started them, so
+    # they run on a worker-wide loop thread. Each turn is driven there and
+    # its SDK messages are handed back to the calling task's loop. A Redis
+    # owner key makes a worker drop its process once another worker has
+    # served a turn for the same chat.
+    def __init__(self) -> None:
+        self._sessions: dict[str, PersistentClaudeSession] = {}
+        self._lock = threading.Lock()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._reaper: asyncio.Task[None] | None = None
+        os.register_at_fork(after_in_child=self._reset_after_fork)
+
+    def _reset_after_fork(self) -> None:
+        # The parent's loop thread does not exist in the child
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self._loop = None
+        self._reaper = None
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=loop.run_forever, name="claude-sessions", daemon=True
+                ).start()
+                self._loop = loop
+            return self._loop
+
+    async def _call(self, coro: Coroutine[Any, Any, T]) -> T:
+        future = asyncio.run_coroutine_threadsafe(coro, self._get_loop())
+        return await asyncio.wrap_future(future)
+
+    async def stream_turn(
+        self,
+        *,
+        chat_id: str,
+        options: ClaudeAgentOptions,
+        message: dict[str, Any],
+        transport_factory: Callable[[], DockerSandboxTransport],
+    ) -> AsyncGenerator[Any, None]:
+        owned = await self._owns_chat(chat_id)
+        owner_token = await self._call(
+            self._checkout(
+                chat_id,
+                options_fingerprint(options),
+                message.get("session_id"),
+                owned,
+                transport_factory,
+                options,
+            )
+        )
+        await self._claim_chat(chat_id, owner_token)
+
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue[Any] = asyncio.Queue()
+
+        def sink(item: Any) -> None:
+            loop.call_soon_threadsafe(queue.put_nowait, item)
+
+        turn = asyncio.ensure_future(self._call(self._run_turn(chat_id, message, sink)))
+        turn.add_done_callback(lambda _: queue.put_nowait(_TURN_END))
+        try:
+            while (item := await queue.get()) is not _TURN_END:
+                yield item
+            await turn
+        finally:
+            if not turn.done():
+                turn.cancel()
+                with suppress(asyncio.CancelledError):
+                    await turn
+
+    async def set_permission_mode(self, chat_id: str, mode: str) -> None:
+        await self._call(self._set_permission_mode(chat_id, mode))
+
+    def shutdown(self) -> None:
+        # Blocking; called from worker shutdown signals and at exit
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is None or loop.is_closed():
+            return
+        future = asyncio.run_coroutine_threadsafe(self._close_all(), loop)
+        try:
+            future.result(SHUTDOWN_TIMEOUT_SECONDS)
+        except Exception as exc:
+            logger.warning("Error closing persistent Claude sessions: %s", exc)
+        loop.call_soon_threadsafe(loop.stop)
+
+    async def discard(self, chat_id: str) -> None:
+        if self._loop is None:
+            return
+        await self._call(self._discard(chat_id))
+
+    async def _owns_chat(self, chat_id: str) -> bool:
+        session = self._sessions.get(chat_id)
+        if session is None:
+            return False
+        try:
+            async with redis_connection() as redis:
+                owner = await redis.get(
+                    REDIS_KEY_CHAT_CLI_OWNER.format(chat_id=chat_id)
+                )
+        except Exception as exc:
+            logger.warning("Failed to read CLI owner for chat %s: %s", chat_id, exc)
+            return False
+        return bool(owner == session.owner_token)
+
+    async def _claim_chat(self, chat_id: str, owner_token: str) -> None:
+        try:
+            async with redis_connection() as redis:
+                await redis.set(
+                    REDIS_KEY_CHAT_CLI_OWNER.format(chat_id=chat_id),
+                    owner_token,
+                    ex=settings.CLAUDE_PERSISTENT_SESSION_MAX_AGE_SECONDS,
+                )
+        except Exception as exc:
+            logger.warning("Failed to claim CLI owner for chat %s: %s", chat_id, exc)
+
+    # Everything below runs on the pool's loop
+
+    def _is_reusable(
+        self,
+        session: PersistentClaudeSession,
+        fingerprint: str,
+        session_id: str | None,
+        owned: bool,
+    ) -> bool:
+        return (
+            owned
+            and session.alive
+            and not session.busy
+            and session.fingerprint == fingerprint
+            and session.session_id == session_id
+            and not session.expired(time.monotonic())
+        )
+
+    async def _checkout(
+        self,
+        chat_id: str,
+        fingerprint: str,
+        session_id: str | None,
+        owned: bool,
+        transport_factory: Callable[[], DockerSandboxTransport],
+        options: ClaudeAgentOptions,
+    ) -> str:
+        session = self._sessions.get(chat_id)
+        if session and self._is_reusable(session, fingerprint, session_id, owned):
+            logger.debug("Reusing Claude CLI process for chat %s", chat_id)
+            return session.owner_token
+
+        if session:
+            await self._discard(chat_id)
+        await self._evict_idle(settings.CLAUDE_PERSISTENT_SESSIONS_PER_WORKER - 1)
+
+        session = PersistentClaudeSession(
+            chat_id, fingerprint, transport_factory(), options
+        )
+        await session.start()
+        self._sessions[chat_id] = session
+        if self._reaper is None or self._reaper.done():
+            self._reaper = asyncio.create_task(self._reap())
+        logger.info("Started persistent Claude CLI process for chat %s", chat_id)
+        return session.owner_token
+
+    async def _run_turn(
+        self, chat_id: str, message: dict[str, Any], sink: Callable[[Any], None]
+    ) -> None:
+        session = self._sessions.get(chat_id)
+        if session is None:
+            raise CLIConnectionError("Persistent Claude session is closed")
+        try:
+            await session.run_turn(message, sink)
+        finally:
+            if not session.alive and self._sessions.get(chat_id) is session:
+                await self._discard(chat_id)
+
+    async def _set_permission_mode(self, chat_id: str, mode: str) -> None:
+        session = self._sessions.get(chat_id)
+        if session:
+            await session.set_permission_mode(mode)
+
+    async def _discard(self, chat_id: str) -> None:
+        session = self._sessions.pop(chat_id, None)
+        if session is None:
+            return
+        try:
+            await session.close()
+        except Exception as exc:
+            logger.warning(
+                "Error closing Claude CLI process for chat %s: %s", chat_id, exc
+            )
+
+    async def _close_all(self) -> None:
+        if self._reaper:
+            self._reaper.cancel()
+        owners = {
+            chat_id: session.owner_token for chat_id, session in self._sessions.items()
+        }
+        await asyncio.gather(*(self._discard(chat_id) for chat_id in owners))
+        if not owners:
+            return
+        try:
+            async with redis_connection() as redis:
+                for chat_id, owner_token in owners.items():
+                    await redis.eval(
+                        _RELEASE_OWNER_SCRIPT,
+                        1,
+                        REDIS_KEY_CHAT_CLI_OWNER.format(chat_id=chat_id),
+                        owner_token,
+                    )
+        except Exception as exc:
+            logger.warning("Failed to release CLI owner keys: %s", exc)
+
+    async def _evict_idle(self, limit: int) -> None:
+        idle = sorted(
+            (s for s in self._sessions.values() if not s.busy),
+            key=lambda s: s.last_used,
+        )
+        for session in idle[: max(len(self._sessions) - limit, 0)]:
+            await self._discard(session.chat_id)
+
+    async def _reap(self) -> None:
+        while self._sessions:
+            await asyncio.sleep(REAP_INTERVAL_SECONDS)
+            now = time.monotonic()
+            for chat_id, session in list(self._sessions.items()):
+                if not session.busy and (session.expired(now) or not session.alive):
+                    await self._discard(chat_id)
+
+
+claude_session_pool = ClaudeSessionPool()
+
+
+@worker_shutdown.connect
+@worker_process_shutdown.connect
+def _close_sessions_on_shutdown(**kwargs: Any) -> None:
+    claude_session_pool.shutdown()
+
+
+atexit.register(claude_session_pool.shutdown)
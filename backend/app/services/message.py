@@ -1,20 +1,25 @@
+import json
 import logging
+from collections import defaultdict
+from collections.abc import Mapping, Sequence
 from datetime import datetime, timezone
-from typing import cast
+from typing import Any, cast
 from uuid import UUID
 
-from sqlalchemy import select, delete, update, or_, and_
+from sqlalchemy import select, delete, insert, update, or_, and_
 from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import get_settings
 from app.models.db_models import (
     Message,
     MessageAttachment,
+    MessageEvent,
     MessageRole,
     MessageStreamStatus,
 )
-from app.models.schemas import CursorPaginatedMessages
+from app.models.schemas import CursorPaginatedMessageEvents, CursorPaginatedMessages
 from app.models.types import MessageAttachmentDict
 from app.services.base import BaseDbService, SessionFactoryType
 from app.services.exceptions import MessageException, ErrorCode
@@ -104,6 +109,9 @@ class MessageService(BaseDbService[Message]):
             message.content = content
             message.updated_at = datetime.now(timezone.utc)
 
+            await db.execute(
+                delete(MessageEvent).where(MessageEvent.message_id == message_id)
+            )
             db.add(message)
             await db.commit()
             await db.refresh(message, ["attachments"])
@@ -168,6 +176,7 @@ class MessageService(BaseDbService[Message]):
 
             has_more = len(rows) > limit
             items = rows[:limit]
+            await self._load_event_content(db, items)
 
             next_cursor = None
             if has_more and items:
@@ -276,4 +285,139 @@ class MessageService(BaseDbService[Message]):
                 .order_by(Message.created_at.asc(), Message.id.asc())
             )
             result = await db.execute(query)
-            return list(result.scalars().all())
+            messages = list(result.scalars().all())
+            await self._load_event_content(db, messages)
+            return messages
+
+    async def append_message_events(
+        self,
+        message_id: UUID,
+        events: Sequence[Mapping[str, Any]],
+        start_seq: int,
+        total_cost_usd: float | None = None,
+        stream_status: MessageStreamStatus | None = None,
+    ) -> None:
+        async with self.session_factory() as db:
+            if events:
+                await db.execute(
+                    insert(MessageEvent),
+                    [
+                        {
+                            "message_id": message_id,
+                            "seq": start_seq + offset,
+                            "payload": json.dumps(event, ensure_ascii=False),
+                        }
+                        for offset, event in enumerate(events)
+                    ],
+                )
+
+            values: dict[str, Any] = {}
+            if total_cost_usd is not None:
+                values["total_cost_usd"] = total_cost_usd
+            if stream_status is not None:
+                values["stream_status"] = stream_status
+            if values:
+                await db.execute(
+                    update(Message).where(Message.id == message_id).values(**values)
+                )
+
+            await db.commit()
+
+    async def get_message_events(
+        self,
+        chat_id: UUID,
+        message_id: UUID,
+        cursor: str | None = None,
+        limit: int = settings.MESSAGE_EVENTS_PAGE_SIZE,
+    ) -> CursorPaginatedMessageEvents:
+        after_seq = -1
+        if cursor:
+            try:
+                after_seq = int(cursor)
+            except ValueError:
+                raise MessageException(
+                    "Invalid pagination cursor",
+                    error_code=ErrorCode.VALIDATION_ERROR,
+                    status_code=400,
+                )
+
+        async with self.session_factory() as db:
+            message_result = await db.execute(
+                select(Message.content).filter(
+                    Message.id == message_id,
+                    Message.chat_id == chat_id,
+                    Message.deleted_at.is_(None),
+                )
+            )
+            legacy_content = message_result.scalar_one_or_none()
+            if legacy_content is None:
+                raise MessageException(
+                    "Message not found in this chat",
+                    error_code=ErrorCode.MESSAGE_NOT_FOUND,
+                    details={"message_id": str(message_id), "chat_id": str(chat_id)},
+                    status_code=404,
+                )
+
+            query = (
+                select(MessageEvent.seq, MessageEvent.payload)
+                .filter(
+                    MessageEvent.message_id == message_id,
+                    MessageEvent.seq > after_seq,
+                )
+                .order_by(MessageEvent.seq.asc())
+                .limit(limit + 1)
+            )
+            result = await db.execute(query)
+            rows = [(seq, json.loads(payload)) for seq, payload in result.all()]
+
+        if not rows:
+            # Messages written before message_events existed keep their log inline
+            rows = self._legacy_event_rows(legacy_content, after_seq, limit)
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        return CursorPaginatedMessageEvents(
+            items=[event for _, event in rows],
+            next_cursor=str(rows[-1][0]) if has_more and rows else None,
+            has_more=has_more,
+        )
+
+    @staticmethod
+    def _legacy_event_rows(
+        content: str, after_seq: int, limit: int
+    ) -> list[tuple[int, Any]]:
+        try:
+            events = json.loads(content) if content else []
+        except json.JSONDecodeError:
+            return []
+        if not isinstance(events, list):
+            return []
+
+        start = after_seq + 1
+        return list(enumerate(events[start : start + limit + 1], start=start))
+
+    async def _load_event_content(
+        self, db: AsyncSession, messages: list[Message]
+    ) -> None:
+        message_ids = [m.id for m in messages if m.role == MessageRole.ASSISTANT]
+        if not message_ids:
+            return
+
+        result = await db.execute(
+            select(MessageEvent.message_id, MessageEvent.payload)
+            .filter(MessageEvent.message_id.in_(message_ids))
+            .order_by(MessageEvent.message_id, MessageEvent.seq.asc())
+        )
+        payloads: dict[UUID, list[str]] = defaultdict(list)
+        for message_id, payload in result.all():
+            payloads[message_id].append(payload)
+
+        for message in messages:
+            message_payloads = payloads.get(message.id)
+            if message_payloads:
+                # Payloads are stored serialized, so joining them avoids a
+                # decode/encode round-trip per event
+                set_committed_value(
+                    message, "content", "[" + ",".join(message_payloads) + "]"
+                )
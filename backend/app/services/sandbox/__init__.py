@@ -1,4 +1,8 @@
-from app.services.sandbox.provider import LocalDockerProvider, SandboxProvider
+from app.services.sandbox.provider import (
+    LocalDockerProvider,
+    SandboxProvider,
+    get_shared_provider,
+)
 from app.services.sandbox.service import SandboxService
 from app.services.sandbox.transport import DockerSandboxTransport
 from app.services.sandbox.types import (
@@ -29,4 +33,5 @@ __all__ = [
     "SandboxProvider",
     "SandboxService",
     "SecretEntry",
+    "get_shared_provider",
 ]
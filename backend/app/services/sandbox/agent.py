@@ -0,0 +1,246 @@
+import asyncio
+import base64
+import itertools
+import json
+import logging
+import os
+import shlex
+import threading
+from collections.abc import Coroutine
+from concurrent.futures import Executor
+from typing import Any, TypeVar
+
+from app.services.exceptions import SandboxException
+from app.services.sandbox.exec_socket import AsyncExecSocket
+from app.services.sandbox.framing import (
+    STREAM_STDOUT,
+    AdaptiveReadSize,
+    DockerFrameDemuxer,
+)
+from app.services.sandbox.ndjson import NdjsonDecoder
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+SANDBOX_AGENT_PATH = "/usr/local/bin/sandbox_agent.py"
+AGENT_START_TIMEOUT_SECONDS = 5.0
+AGENT_MAX_BUFFER_SIZE = 256 * 1024 * 1024
+# Base64 grows a read by a third, so each reply stays far below the line limit
+AGENT_READ_CHUNK_SIZE = 32 * 1024 * 1024
+
+
+class SandboxAgentError(Exception):
+    # The agent connection is gone; callers fall back to plain docker exec
+    pass
+
+
+class SandboxAgentRequestError(SandboxException):
+    def __init__(self, message: str, code: str | None) -> None:
+        super().__init__(message)
+        self.code = code
+
+
+def decode_content(result: dict[str, Any], key: str) -> bytes:
+    return base64.b64decode(result.get(key) or "")
+
+
+def encode_content(data: bytes) -> str:
+    return base64.b64encode(data).decode("ascii")
+
+
+class AgentLoop:
+    # Agent connections outlive the Celery task (and event loop) that opened
+    # them, so they are driven from one process-wide loop thread and callers
+    # on any loop hand their requests over to it
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        os.register_at_fork(after_in_child=self._reset_after_fork)
+
+    def _reset_after_fork(self) -> None:
+        # The parent's loop thread does not exist in the child
+        self._lock = threading.Lock()
+        self._loop = None
+
+    def get(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=loop.run_forever, name="sandbox-agents", daemon=True
+                ).start()
+                self._loop = loop
+            return self._loop
+
+    async def run(self, coro: Coroutine[Any, Any, T]) -> T:
+        future = asyncio.run_coroutine_threadsafe(coro, self.get())
+        return await asyncio.wrap_future(future)
+
+
+agent_loop = AgentLoop()
+
+
+class SandboxAgentClient:
+    # Talks to sandbox/sandbox_agent.py over one attached, non-TTY exec.
+    # Requests carry ids so any number can be in flight at once; replies are
+    # matched back to their callers as they arrive. Clients are created and
+    # driven on agent_loop, so one connection serves every task.
+    def __init__(self, exec_id: str, handle: Any, exec_socket: AsyncExecSocket) -> None:
+        self.exec_id = exec_id
+        self._handle = handle
+        self._socket = exec_socket
+        self._loop = asyncio.get_running_loop()
+        self._ids = itertools.count(1)
+        self._pending: dict[int, asyncio.Future[dict[str, Any]]] = {}
+        self._send_lock = asyncio.Lock()
+        self._closed = False
+        self._reader = self._loop.create_task(self._read())
+
+    @classmethod
+    async def start(
+        cls, container: Any, executor: Executor, workdir: str
+    ) -> "SandboxAgentClient | None":
+        # Returns None when the image has no agent or the daemon connection
+        # cannot be driven from the loop (TLS)
+        return await agent_loop.run(cls._start(container, executor, workdir))
+
+    @classmethod
+    async def _start(
+        cls, container: Any, executor: Executor, workdir: str
+    ) -> "SandboxAgentClient | None":
+        def create_exec() -> tuple[str, Any]:
+            agent = shlex.quote(SANDBOX_AGENT_PATH)
+            exec_id = container.client.api.exec_create(
+                container.id,
+                cmd=["bash", "-c", f"test -f {agent} && exec python3 -u {agent}"],
+                stdin=True,
+                tty=False,
+                workdir=workdir,
+            )["Id"]
+            handle = container.client.api.exec_start(exec_id, socket=True, tty=False)
+            return exec_id, handle
+
+        loop = asyncio.get_running_loop()
+        exec_id, handle = await loop.run_in_executor(executor, create_exec)
+        exec_socket = AsyncExecSocket.wrap(handle)
+        if exec_socket is None:
+            _close_handle(handle)
+            return None
+
+        client = cls(exec_id, handle, exec_socket)
+        try:
+            await client._call("ping", None, AGENT_START_TIMEOUT_SECONDS)
+        except Exception:
+            client.close()
+            return None
+        return client
+
+    @property
+    def usable(self) -> bool:
+        return not self._closed
+
+    async def call(
+        self,
+        op: str,
+        params: dict[str, Any] | None = None,
+        timeout: float | None = None,
+    ) -> dict[str, Any]:
+        if self._closed:
+            raise SandboxAgentError("Sandbox agent connection is closed")
+        future = asyncio.run_coroutine_threadsafe(
+            self._call(op, params, timeout), self._loop
+        )
+        return await asyncio.wrap_future(future)
+
+    async def _call(
+        self, op: str, params: dict[str, Any] | None, timeout: float | None
+    ) -> dict[str, Any]:
+        if self._closed:
+            raise SandboxAgentError("Sandbox agent connection is closed")
+
+        request_id = next(self._ids)
+        future: asyncio.Future[dict[str, Any]] = self._loop.create_future()
+        self._pending[request_id] = future
+        line = json.dumps(
+            {"id": request_id, "op": op, "params": params or {}},
+            separators=(",", ":"),
+        )
+        try:
+            async with self._send_lock:
+                await self._socket.sendall(line.encode("utf-8") + b"\n")
+            response = await asyncio.wait_for(future, timeout)
+        except OSError as e:
+            self.close()
+            raise SandboxAgentError(f"Sandbox agent connection failed: {e}") from e
+        finally:
+            self._pending.pop(request_id, None)
+
+        if not response.get("ok"):
+            raise SandboxAgentRequestError(
+                str(response.get("error") or "Sandbox agent request failed"),
+                response.get("code"),
+            )
+        return dict(response.get("result") or {})
+
+    async def _read(self) -> None:
+        demuxer = DockerFrameDemuxer(AGENT_MAX_BUFFER_SIZE)
+        decoder = NdjsonDecoder(AGENT_MAX_BUFFER_SIZE)
+        read_size = AdaptiveReadSize()
+        try:
+            while data := await self._socket.recv(read_size.size):
+                read_size.update(len(data))
+                for stream_type, text in demuxer.feed(data):
+                    if stream_type != STREAM_STDOUT:
+                        logger.debug("Sandbox agent stderr: %s", text.rstrip())
+                        continue
+                    for response in decoder.feed(text):
+                        self._resolve(response)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.warning("Sandbox agent reader failed: %s", e)
+        finally:
+            self._closed = True
+            self._fail_pending()
+
+    def _resolve(self, response: Any) -> None:
+        if not isinstance(response, dict):
+            return
+        future = self._pending.get(response.get("id"))  # type: ignore[arg-type]
+        if future is not None and not future.done():
+            future.set_result(response)
+
+    def _fail_pending(self) -> None:
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(
+                    SandboxAgentError("Sandbox agent connection closed")
+                )
+
+    def discard(self) -> None:
+        # Safe from any thread
+        try:
+            self._loop.call_soon_threadsafe(self.close)
+        except RuntimeError:
+            self._closed = True
+            _close_handle(self._handle)
+
+    def close(self) -> None:
+        self._closed = True
+        if not self._reader.done():
+            self._reader.cancel()
+        try:
+            # EOF on stdin tells the agent to exit
+            self._socket.shutdown_write()
+        except OSError:
+            pass
+        _close_handle(self._handle)
+        self._fail_pending()
+
+
+def _close_handle(handle: Any) -> None:
+    try:
+        handle.close()
+    except Exception:
+        pass
@@ -0,0 +1,144 @@
+import asyncio
+import logging
+import tarfile
+import threading
+import time
+import zipfile
+from collections.abc import AsyncIterator, Iterable, Iterator
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import IO, Any, cast
+
+logger = logging.getLogger(__name__)
+
+COPY_CHUNK_SIZE = 256 * 1024
+# Chunks handed to the event loop but not yet sent to the client
+MAX_BUFFERED_CHUNKS = 8
+# The range of local date_time tuples a ZIP header can store
+ZIP_MIN_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+ZIP_MAX_DATE_TIME = (2107, 12, 31, 23, 59, 59)
+_END = object()
+
+
+class _ChunkReader:
+    # File-like view of an iterator of byte chunks, for tarfile's stream mode
+    def __init__(self, chunks: Iterable[bytes]) -> None:
+        self._chunks = iter(chunks)
+        self._buffer = bytearray()
+
+    def read(self, size: int = -1) -> bytes:
+        while size < 0 or len(self._buffer) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._buffer += chunk
+        if size < 0:
+            size = len(self._buffer)
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+
+class _ZipSink:
+    # Write-only target for ZipFile; without tell() or seek() ZipFile writes
+    # data descriptors, so nothing already produced is ever revisited
+    def __init__(self) -> None:
+        self._buffer = bytearray()
+
+    def write(self, data: bytes) -> int:
+        self._buffer += data
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def drain(self) -> Iterator[bytes]:
+        if self._buffer:
+            data = bytes(self._buffer)
+            self._buffer.clear()
+            yield data
+
+
+def tar_to_zip(tar_chunks: Iterable[bytes]) -> Iterator[bytes]:
+    # Transcodes a tar stream into a ZIP stream one member at a time, so
+    # memory use does not grow with the archive. Only regular files are
+    # kept, matching what list_files reports as files.
+    sink = _ZipSink()
+    # Stream mode only ever calls read(), so the reader does not implement
+    # the seek() and tell() the tarfile stubs ask for
+    source_file = cast(IO[bytes], _ChunkReader(tar_chunks))
+    with (
+        tarfile.open(fileobj=source_file, mode="r|") as tar,
+        zipfile.ZipFile(sink, "w", zipfile.ZIP_DEFLATED) as zip_file,
+    ):
+        for member in tar:
+            name = member.name.removeprefix("./").lstrip("/")
+            if not member.isfile() or not name:
+                continue
+            source = tar.extractfile(member)
+            if source is None:
+                continue
+
+            # Clamp after the local conversion, as an epoch clamp still
+            # lands in 1979 west of UTC and ZipInfo would raise mid-stream
+            date_time = time.localtime(member.mtime)[:6]
+            date_time = min(max(date_time, ZIP_MIN_DATE_TIME), ZIP_MAX_DATE_TIME)
+            info = zipfile.ZipInfo(name, date_time=date_time)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            info.external_attr = (member.mode & 0xFFFF) << 16
+            info.file_size = member.size
+            with zip_file.open(info, "w") as target:
+                while chunk := source.read(COPY_CHUNK_SIZE):
+                    target.write(chunk)
+                    yield from sink.drain()
+            yield from sink.drain()
+    yield from sink.drain()
+
+
+async def iterate_in_thread(
+    iterator: Iterator[bytes], max_buffered: int = MAX_BUFFERED_CHUNKS
+) -> AsyncIterator[bytes]:
+    # Runs a blocking iterator on its own thread and hands its chunks to the
+    # loop through a bounded queue, so a slow client slows the producer down
+    # instead of letting output pile up. Closing the async iterator early
+    # stops the producer and closes the source iterator.
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue[Any] = asyncio.Queue(max_buffered)
+    stopped = threading.Event()
+
+    def put(item: Any) -> bool:
+        future = asyncio.run_coroutine_threadsafe(queue.put(item), loop)
+        while True:
+            try:
+                future.result(timeout=1.0)
+                return True
+            except FutureTimeoutError:
+                if stopped.is_set():
+                    future.cancel()
+                    return False
+
+    def produce() -> None:
+        try:
+            for chunk in iterator:
+                if stopped.is_set() or not put(chunk):
+                    return
+            put(_END)
+        except Exception as e:
+            if not stopped.is_set():
+                put(e)
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+
+    thread = threading.Thread(target=produce, name="archive-stream", daemon=True)
+    thread.start()
+    try:
+        while (item := await queue.get()) is not _END:
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stopped.set()
@@ -0,0 +1,129 @@
+import logging
+import os
+import threading
+import time
+from collections.abc import Callable
+from typing import Any
+
+from app.services.sandbox.docker_pool import docker_manager
+
+logger = logging.getLogger(__name__)
+
+RECONNECT_DELAY_SECONDS = 1.0
+# Container lifecycle changes plus exec exits, on one subscription
+CONTAINER_EVENTS = (
+    "exec_die",
+    "start",
+    "restart",
+    "die",
+    "stop",
+    "kill",
+    "pause",
+    "unpause",
+    "destroy",
+)
+SANDBOX_CONTAINER_PREFIX = "claudex-sandbox-"
+
+DockerEventListener = Callable[[dict[str, Any]], None]
+DockerGapListener = Callable[[], None]
+
+
+def event_action(event: dict[str, Any]) -> str:
+    action = event.get("Action") or event.get("status") or ""
+    # Exec events carry the command after a colon, e.g. "exec_die: claude ..."
+    return str(action).split(":", 1)[0]
+
+
+def event_sandbox_id(event: dict[str, Any]) -> str | None:
+    name = event.get("Actor", {}).get("Attributes", {}).get("name", "")
+    if not name.startswith(SANDBOX_CONTAINER_PREFIX):
+        return None
+    return str(name[len(SANDBOX_CONTAINER_PREFIX) :])
+
+
+class DockerEventStream:
+    # One Docker events subscription per process, fanned out to listeners on
+    # the subscription thread. Listeners must be quick and thread-safe. Gap
+    # listeners run whenever the stream (re)connects, since anything that
+    # happened while it was down was missed.
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._listeners: list[DockerEventListener] = []
+        self._gap_listeners: list[DockerGapListener] = []
+        self._thread: threading.Thread | None = None
+        self._connected = threading.Event()
+        os.register_at_fork(after_in_child=self._reset_after_fork)
+
+    def _reset_after_fork(self) -> None:
+        self._lock = threading.Lock()
+        self._thread = None
+        self._connected = threading.Event()
+
+    @property
+    def connected(self) -> bool:
+        return self._connected.is_set()
+
+    def subscribe(
+        self,
+        listener: DockerEventListener,
+        docker_host: str | None,
+        on_gap: DockerGapListener | None = None,
+    ) -> None:
+        with self._lock:
+            if listener not in self._listeners:
+                self._listeners.append(listener)
+            if on_gap and on_gap not in self._gap_listeners:
+                self._gap_listeners.append(on_gap)
+            self._ensure_started(docker_host)
+
+    def _ensure_started(self, docker_host: str | None) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(docker_host,),
+            name="docker-events",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def _run(self, docker_host: str | None) -> None:
+        while True:
+            events: Any = None
+            try:
+                client = docker_manager.get_client(docker_host)
+                events = client.events(
+                    decode=True,
+                    filters={"type": "container", "event": list(CONTAINER_EVENTS)},
+                )
+                self._connected.set()
+                self._notify_gap()
+                for event in events:
+                    self._dispatch(event)
+            except Exception as e:
+                logger.warning("Docker event stream failed: %s", e)
+            finally:
+                self._connected.clear()
+                if events is not None:
+                    try:
+                        events.close()
+                    except Exception:
+                        pass
+            time.sleep(RECONNECT_DELAY_SECONDS)
+
+    def _notify_gap(self) -> None:
+        for on_gap in list(self._gap_listeners):
+            try:
+                on_gap()
+            except Exception as e:
+                logger.warning("Docker event gap listener failed: %s", e)
+
+    def _dispatch(self, event: dict[str, Any]) -> None:
+        for listener in list(self._listeners):
+            try:
+                listener(event)
+            except Exception as e:
+                logger.warning("Docker event listener failed: %s", e)
+
+
+docker_event_stream = DockerEventStream()
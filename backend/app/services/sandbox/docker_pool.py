@@ -0,0 +1,172 @@
+import os
+import threading
+import time
+from collections.abc import Callable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, TypeVar
+
+from prometheus_client.core import (
+    CounterMetricFamily,
+    GaugeMetricFamily,
+    SummaryMetricFamily,
+)
+from prometheus_client.registry import REGISTRY, Collector
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+T = TypeVar("T")
+
+
+class InstrumentedExecutor(ThreadPoolExecutor):
+    # Counts how long blocking Docker calls wait for a worker thread, so an
+    # undersized pool shows up as acquire latency instead of slow requests
+    def __init__(self, max_workers: int) -> None:
+        super().__init__(max_workers=max_workers, thread_name_prefix="docker")
+        self.max_workers = max_workers
+        self._stats_lock = threading.Lock()
+        self.waiting = 0
+        self.in_use = 0
+        self.acquired = 0
+        self.released = 0
+        self.wait_seconds = 0.0
+
+    def submit(self, fn: Callable[..., T], /, *args: Any, **kwargs: Any) -> "Future[T]":
+        submitted = time.monotonic()
+        with self._stats_lock:
+            self.waiting += 1
+
+        def run() -> T:
+            with self._stats_lock:
+                self.waiting -= 1
+                self.in_use += 1
+                self.acquired += 1
+                self.wait_seconds += time.monotonic() - submitted
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._stats_lock:
+                    self.in_use -= 1
+                    self.released += 1
+
+        try:
+            return super().submit(run)
+        except RuntimeError:
+            with self._stats_lock:
+                self.waiting -= 1
+            raise
+
+
+class DockerConnectionManager:
+    # One Docker client per daemon and one bounded executor per process,
+    # shared by transports, providers, the terminal websocket and the
+    # scheduler. The client's HTTP session keeps connections to the daemon
+    # alive between calls instead of reconnecting for every request.
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._clients: dict[str | None, Any] = {}
+        self._executor: InstrumentedExecutor | None = None
+        os.register_at_fork(after_in_child=self._reset_after_fork)
+
+    def _reset_after_fork(self) -> None:
+        # Neither the parent's sockets nor its worker threads survive a fork
+        self._lock = threading.Lock()
+        self._clients = {}
+        self._executor = None
+
+    @property
+    def executor(self) -> InstrumentedExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = InstrumentedExecutor(
+                    settings.DOCKER_EXECUTOR_MAX_WORKERS
+                )
+            return self._executor
+
+    def get_client(self, host: str | None) -> Any:
+        with self._lock:
+            client = self._clients.get(host)
+            if client is None:
+                import docker
+
+                if host:
+                    client = docker.DockerClient(
+                        base_url=host, max_pool_size=settings.DOCKER_CLIENT_POOL_SIZE
+                    )
+                else:
+                    client = docker.from_env(
+                        max_pool_size=settings.DOCKER_CLIENT_POOL_SIZE
+                    )
+                self._clients[host] = client
+            return client
+
+    def iter_executors(self) -> Iterator[InstrumentedExecutor]:
+        return iter([self._executor] if self._executor else [])
+
+    @property
+    def client_count(self) -> int:
+        return len(self._clients)
+
+    def close(self) -> None:
+        with self._lock:
+            clients = list(self._clients.values())
+            executor = self._executor
+            self._clients = {}
+            self._executor = None
+        for client in clients:
+            try:
+                client.close()
+            except Exception:
+                pass
+        if executor:
+            executor.shutdown(wait=False)
+
+
+class DockerPoolCollector(Collector):
+    def __init__(self, manager: DockerConnectionManager) -> None:
+        self._manager = manager
+
+    def collect(self) -> Iterator[Any]:
+        executors = list(self._manager.iter_executors())
+
+        yield GaugeMetricFamily(
+            "docker_clients",
+            "Docker clients shared in this process",
+            value=self._manager.client_count,
+        )
+        yield GaugeMetricFamily(
+            "docker_executor_max_workers",
+            "Configured Docker executor threads",
+            value=settings.DOCKER_EXECUTOR_MAX_WORKERS,
+        )
+        yield GaugeMetricFamily(
+            "docker_executor_in_use",
+            "Docker calls currently holding an executor thread",
+            value=sum(executor.in_use for executor in executors),
+        )
+        yield GaugeMetricFamily(
+            "docker_executor_waiting",
+            "Docker calls queued for an executor thread",
+            value=sum(executor.waiting for executor in executors),
+        )
+        yield CounterMetricFamily(
+            "docker_executor_acquired",
+            "Docker calls that acquired an executor thread",
+            value=sum(executor.acquired for executor in executors),
+        )
+        yield CounterMetricFamily(
+            "docker_executor_released",
+            "Docker calls that released an executor thread",
+            value=sum(executor.released for executor in executors),
+        )
+        yield SummaryMetricFamily(
+            "docker_executor_acquire_wait_seconds",
+            "Time Docker calls waited for an executor thread",
+            count_value=sum(executor.acquired for executor in executors),
+            sum_value=sum(executor.wait_seconds for executor in executors),
+        )
+
+
+docker_manager = DockerConnectionManager()
+REGISTRY.register(DockerPoolCollector(docker_manager))
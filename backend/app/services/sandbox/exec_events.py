@@ -0,0 +1,86 @@
+import asyncio
+import os
+import threading
+from collections import OrderedDict
+from typing import Any
+
+from app.services.sandbox.docker_events import docker_event_stream, event_action
+
+RECENT_EXITS_SIZE = 1024
+
+
+def _resolve(future: "asyncio.Future[int]", exit_code: int) -> None:
+    if not future.done():
+        future.set_result(exit_code)
+
+
+class ExecExitWatcher:
+    # The process-wide Docker event stream reports exec_die for every exec,
+    # and each waiting transport is resolved on its own event loop. Celery
+    # runs a new loop per task, so waiters carry their loop with them.
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._waiters: dict[str, list[asyncio.Future[int]]] = {}
+        # Exits seen before anyone asked, e.g. a CLI that failed immediately
+        self._recent: OrderedDict[str, int] = OrderedDict()
+        os.register_at_fork(after_in_child=self._reset_after_fork)
+
+    def _reset_after_fork(self) -> None:
+        self._lock = threading.Lock()
+        self._waiters = {}
+        self._recent = OrderedDict()
+
+    @property
+    def connected(self) -> bool:
+        return docker_event_stream.connected
+
+    def watch(self, exec_id: str, docker_host: str | None) -> "asyncio.Future[int]":
+        future: asyncio.Future[int] = asyncio.get_running_loop().create_future()
+        with self._lock:
+            exit_code = self._recent.pop(exec_id, None)
+            if exit_code is not None:
+                future.set_result(exit_code)
+                return future
+            self._waiters.setdefault(exec_id, []).append(future)
+        docker_event_stream.subscribe(self._dispatch, docker_host)
+        return future
+
+    def unwatch(self, exec_id: str, future: "asyncio.Future[int]") -> None:
+        with self._lock:
+            waiters = self._waiters.get(exec_id)
+            if not waiters:
+                return
+            remaining = [waiter for waiter in waiters if waiter is not future]
+            if remaining:
+                self._waiters[exec_id] = remaining
+            else:
+                del self._waiters[exec_id]
+
+    def _dispatch(self, event: dict[str, Any]) -> None:
+        if event_action(event) != "exec_die":
+            return
+        attributes = event.get("Actor", {}).get("Attributes", {})
+        exec_id = attributes.get("execID")
+        if not exec_id:
+            return
+        try:
+            exit_code = int(attributes.get("exitCode", -1))
+        except (TypeError, ValueError):
+            exit_code = -1
+
+        with self._lock:
+            waiters = self._waiters.pop(exec_id, None)
+            if not waiters:
+                self._recent[exec_id] = exit_code
+                if len(self._recent) > RECENT_EXITS_SIZE:
+                    self._recent.popitem(last=False)
+                return
+
+        for future in waiters:
+            try:
+                future.get_loop().call_soon_threadsafe(_resolve, future, exit_code)
+            except RuntimeError:
+                pass
+
+
+exec_exit_watcher = ExecExitWatcher()
@@ -0,0 +1,49 @@
+import asyncio
+import socket
+import ssl
+from typing import Any
+
+
+def unwrap_exec_socket(handle: Any) -> socket.socket | None:
+    # exec_start(socket=True) returns a SocketIO around the daemon connection
+    # (or the bare socket for https). TLS sockets cannot be driven by the
+    # loop's sock_* API, so those callers keep their threaded fallback.
+    for candidate in (handle, getattr(handle, "_sock", None)):
+        if isinstance(candidate, socket.socket) and not isinstance(
+            candidate, ssl.SSLSocket
+        ):
+            return candidate
+    return None
+
+
+class AsyncExecSocket:
+    # Drives a hijacked Docker exec socket from the event loop: reads and
+    # writes wait on fd readiness instead of parking an executor thread
+    def __init__(self, sock: socket.socket) -> None:
+        self._sock = sock
+        self._sock.setblocking(False)
+
+    @classmethod
+    def wrap(cls, handle: Any) -> "AsyncExecSocket | None":
+        sock = unwrap_exec_socket(handle)
+        if sock is None:
+            return None
+        try:
+            return cls(sock)
+        except OSError:
+            return None
+
+    async def recv(self, size: int) -> bytes:
+        # An empty result means the exec side closed the stream
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.sock_recv(self._sock, size)
+        except (ConnectionError, OSError):
+            return b""
+
+    async def sendall(self, data: bytes) -> None:
+        loop = asyncio.get_running_loop()
+        await loop.sock_sendall(self._sock, data)
+
+    def shutdown_write(self) -> None:
+        self._sock.shutdown(socket.SHUT_WR)
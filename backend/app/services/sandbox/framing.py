@@ -0,0 +1,128 @@
+import codecs
+import logging
+
+logger = logging.getLogger(__name__)
+
+STREAM_STDOUT = 1
+STREAM_STDERR = 2
+FRAME_HEADER_SIZE = 8
+
+MIN_READ_SIZE = 64 * 1024
+MAX_READ_SIZE = 1024 * 1024
+
+
+class DockerFrameDemuxer:
+    # Splits the multiplexed stream of a non-TTY exec into stdout/stderr text.
+    # Frames are parsed in place from one bytearray and the consumed prefix is
+    # dropped once per feed, so a large output costs O(n) instead of copying
+    # the remaining buffer on every frame. UTF-8 is decoded incrementally per
+    # stream, which keeps multibyte characters that straddle frames intact.
+    def __init__(self, max_frame_size: int) -> None:
+        self._max_frame_size = max_frame_size
+        self._buffer = bytearray()
+        self._decoders = {
+            STREAM_STDOUT: codecs.getincrementaldecoder("utf-8")(errors="replace"),
+            STREAM_STDERR: codecs.getincrementaldecoder("utf-8")(errors="replace"),
+        }
+
+    @property
+    def buffered(self) -> int:
+        return len(self._buffer)
+
+    def feed(self, data: bytes | bytearray | memoryview) -> list[tuple[int, str]]:
+        self._buffer += data
+        chunks: list[tuple[int, str]] = []
+        parts: list[str] = []
+        parts_type = STREAM_STDOUT
+        offset = 0
+        size = len(self._buffer)
+
+        with memoryview(self._buffer) as view:
+            while size - offset >= FRAME_HEADER_SIZE:
+                stream_type = view[offset]
+                frame_size = int.from_bytes(view[offset + 4 : offset + 8], "big")
+
+                if frame_size > self._max_frame_size:
+                    logger.warning(
+                        "Dropping %d buffered bytes after oversized frame of %d bytes",
+                        size - offset,
+                        frame_size,
+                    )
+                    offset = size
+                    break
+
+                end = offset + FRAME_HEADER_SIZE + frame_size
+                if end > size:
+                    break
+
+                decoder = self._decoders.get(stream_type)
+                if decoder is not None:
+                    text = decoder.decode(view[offset + FRAME_HEADER_SIZE : end])
+                    if text:
+                        # Adjacent frames of one stream are handed out joined
+                        if parts and stream_type != parts_type:
+                            chunks.append((parts_type, "".join(parts)))
+                            parts = []
+                        parts_type = stream_type
+                        parts.append(text)
+                offset = end
+
+        if parts:
+            chunks.append((parts_type, "".join(parts)))
+        if offset:
+            del self._buffer[:offset]
+        return chunks
+
+    def flush(self) -> list[tuple[int, str]]:
+        chunks: list[tuple[int, str]] = []
+        for stream_type, decoder in self._decoders.items():
+            text = decoder.decode(b"", final=True)
+            if text:
+                chunks.append((stream_type, text))
+        self._buffer.clear()
+        return chunks
+
+
+class AdaptiveReadSize:
+    # Grows the recv size while reads come back full and shrinks it again
+    # once the stream goes quiet
+    def __init__(
+        self, minimum: int = MIN_READ_SIZE, maximum: int = MAX_READ_SIZE
+    ) -> None:
+        self.minimum = minimum
+        self.maximum = maximum
+        self.size = minimum
+
+    def update(self, received: int) -> None:
+        if received >= self.size:
+            self.size = min(self.size * 2, self.maximum)
+        elif received < self.size // 4:
+            self.size = max(self.size // 2, self.minimum)
+
+
+class DockerBinaryDemuxer:
+    # Same framing as DockerFrameDemuxer for exec output that is not text,
+    # such as a tar stream
+    def __init__(self) -> None:
+        self._buffer = bytearray()
+
+    def feed(self, data: bytes | bytearray | memoryview) -> list[tuple[int, bytes]]:
+        self._buffer += data
+        frames: list[tuple[int, bytes]] = []
+        offset = 0
+        size = len(self._buffer)
+
+        with memoryview(self._buffer) as view:
+            while size - offset >= FRAME_HEADER_SIZE:
+                frame_size = int.from_bytes(view[offset + 4 : offset + 8], "big")
+                end = offset + FRAME_HEADER_SIZE + frame_size
+                if end > size:
+                    break
+                frames.append(
+                    (view[offset], bytes(view[offset + FRAME_HEADER_SIZE : end]))
+                )
+                offset = end
+
+        if offset:
+            del self._buffer[:offset]
+        return frames
@@ -0,0 +1,124 @@
+import json
+import re
+from collections.abc import Callable
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+ANSI_ESCAPE_RE = re.compile(r"\x1B\[[0-?]*[ -/]*[@-~]")
+
+JSONLoads = Callable[[str], Any]
+
+
+def _default_loads() -> JSONLoads:
+    if orjson is not None:
+        orjson_loads: JSONLoads = orjson.loads
+        return orjson_loads
+    return json.loads
+
+
+class NdjsonDecoder:
+    # Decodes the CLI's stream-json output. Text is only parsed once a full
+    # line is available, so a multi-megabyte message is decoded once instead
+    # of being re-parsed from its start on every chunk. Lines that do not
+    # form a complete value (pretty-printed or split output) are carried
+    # over and retried with the next line.
+    def __init__(self, max_buffer_size: int, loads: JSONLoads | None = None) -> None:
+        self._max_buffer_size = max_buffer_size
+        self._loads = loads or _default_loads()
+        self._raw_decoder = json.JSONDecoder()
+        self._partial: list[str] = []
+        self._partial_size = 0
+        self._pending = ""
+
+    @property
+    def buffered(self) -> int:
+        return self._partial_size + len(self._pending)
+
+    def feed(self, chunk: str) -> list[Any]:
+        if "\x1b" in chunk:
+            chunk = ANSI_ESCAPE_RE.sub("", chunk)
+        if "\r" in chunk:
+            chunk = chunk.replace("\r", "")
+
+        messages: list[Any] = []
+        start = 0
+        while (newline := chunk.find("\n", start)) != -1:
+            piece = chunk[start:newline]
+            if self._partial:
+                self._partial.append(piece)
+                piece = "".join(self._partial)
+                self._partial = []
+                self._partial_size = 0
+            self._decode_line(piece, messages)
+            start = newline + 1
+
+        if start < len(chunk):
+            rest = chunk[start:] if start else chunk
+            self._partial.append(rest)
+            self._partial_size += len(rest)
+            if self.buffered > self._max_buffer_size:
+                self.reset()
+                raise ValueError(
+                    f"CLI output exceeded max buffer size of {self._max_buffer_size}"
+                )
+
+        return messages
+
+    def finish(self) -> tuple[list[Any], str]:
+        # Returns what can still be decoded plus any undecodable remainder
+        messages: list[Any] = []
+        if self._partial:
+            line = "".join(self._partial)
+            self._partial = []
+            self._partial_size = 0
+            self._decode_line(line, messages)
+        leftover, self._pending = self._pending, ""
+        return messages, leftover
+
+    def reset(self) -> None:
+        self._partial = []
+        self._partial_size = 0
+        self._pending = ""
+
+    def _decode_line(self, line: str, messages: list[Any]) -> None:
+        line = line.strip()
+        if not line:
+            return
+
+        if self._pending:
+            line = self._pending + line
+            self._pending = ""
+        else:
+            # Anything printed before the JSON starts (shell noise) is dropped
+            starts = [pos for pos in (line.find("{"), line.find("[")) if pos != -1]
+            if not starts:
+                return
+            line = line[min(starts) :]
+
+        try:
+            messages.append(self._loads(line))
+            return
+        except ValueError:
+            pass
+
+        # Several values on one line, or a value that continues on the next
+        working = line
+        while working:
+            try:
+                data, offset = self._raw_decoder.raw_decode(working)
+            except json.JSONDecodeError:
+                break
+            messages.append(data)
+            working = working[offset:].lstrip()
+
+        if working:
+            self._pending = working
+            if len(self._pending) > self._max_buffer_size:
+                self.reset()
+                raise ValueError(
+                    f"CLI output exceeded max buffer size of {self._max_buffer_size}"
+                )
@@ -1,14 +1,19 @@
 import asyncio
 import base64
+import hashlib
 import io
 import logging
+import os
 import shlex
 import tarfile
+import threading
+import time
 import uuid
 from abc import ABC, abstractmethod
-from concurrent.futures import ThreadPoolExecutor
+from dataclasses import astuple
 from datetime import datetime
 from pathlib import Path, PurePosixPath
+from collections.abc import Iterable, Iterator
 from typing import Any, Awaitable, Callable, TypeVar
 
 import posixpath
@@ -18,19 +23,41 @@ from app.constants import (
     DOCKER_AVAILABLE_PORTS,
     MAX_CHECKPOINTS_PER_SANDBOX,
     SANDBOX_BINARY_EXTENSIONS,
+    SANDBOX_CONTAINER_CACHE_TTL_SECONDS,
+    SANDBOX_CONTAINER_STATUS_TTL_SECONDS,
     SANDBOX_DEFAULT_COMMAND_TIMEOUT,
     SANDBOX_EXCLUDED_PATHS,
+    SANDBOX_FILE_TREE_PAGE_SIZE,
     SANDBOX_RESTORE_EXCLUDE_PATTERNS,
     SANDBOX_SYSTEM_VARIABLES,
     VNC_WEBSOCKET_PORT,
 )
 from app.services.exceptions import SandboxException
+from app.services.sandbox.agent import (
+    AGENT_READ_CHUNK_SIZE,
+    SandboxAgentClient,
+    SandboxAgentError,
+    SandboxAgentRequestError,
+    decode_content,
+    encode_content,
+)
+from app.services.sandbox.docker_events import (
+    docker_event_stream,
+    event_action,
+    event_sandbox_id,
+)
+from app.services.sandbox.docker_pool import docker_manager
+from app.services.sandbox.exec_socket import AsyncExecSocket
+from app.services.sandbox.framing import STREAM_STDOUT, DockerBinaryDemuxer
 from app.services.sandbox.types import (
     CheckpointInfo,
     CommandResult,
     DockerConfig,
+    FileChange,
+    FileChangeSet,
     FileContent,
     FileMetadata,
+    FileTreePage,
     PreviewLink,
     PtyDataCallbackType,
     PtySession,
@@ -42,11 +69,20 @@ logger = logging.getLogger(__name__)
 
 T = TypeVar("T")
 
+PTY_READ_SIZE = 64 * 1024
+ARCHIVE_READ_SIZE = 256 * 1024
+ARCHIVE_STDERR_LIMIT = 4096
 LISTENING_PORTS_COMMAND = "ss -tuln | grep LISTEN | awk '{print $5}' | sed 's/.*://g' | grep -E '^[0-9]+$' | sort -u"
 
 
 class SandboxProvider(ABC):
     _pty_sessions: dict[str, dict[str, Any]]
+    # Shared providers live for the whole process and are never cleaned up
+    # by the services that borrow them
+    shared: bool = False
+    # uid and gid for archive members; ignored when the archive is unpacked
+    # by the sandbox user
+    file_owner: tuple[int, int] = (0, 0)
 
     @staticmethod
     def normalize_path(file_path: str, base: str = "/home/user") -> str:
@@ -158,7 +194,7 @@ class SandboxProvider(ABC):
         pass
 
     @abstractmethod
-    async def connect_sandbox(self, sandbox_id: str) -> bool:
+    async def connect_sandbox(self, sandbox_id: str, start_ide: bool = True) -> bool:
         pass
 
     @abstractmethod
@@ -196,6 +232,47 @@ class SandboxProvider(ABC):
     ) -> None:
         pass
 
+    async def write_files(
+        self,
+        sandbox_id: str,
+        files: dict[str, str | bytes],
+    ) -> None:
+        # Providers without a bulk upload write one file at a time
+        for path, content in files.items():
+            await self.write_file(sandbox_id, path, content)
+
+    async def missing_directories(
+        self, sandbox_id: str, directories: Iterable[PurePosixPath]
+    ) -> set[PurePosixPath]:
+        # The directories that do not exist yet, found with a single command
+        # for the whole batch
+        candidates = " ".join(
+            shlex.quote(str(directory)) for directory in sorted(set(directories))
+        )
+        if not candidates:
+            return set()
+        result = await self.execute_command(
+            sandbox_id,
+            f'for d in {candidates}; do [ -d "$d" ] || printf "%s\\n" "$d"; done',
+        )
+        return {PurePosixPath(line) for line in result.stdout.splitlines() if line}
+
+    async def upload_archive(self, sandbox_id: str, path: str, data: bytes) -> None:
+        # Unpacks a tar into path; without a native archive upload the tar
+        # goes up as a file and is extracted in the sandbox
+        remote_tar = f"/home/user/.upload_{uuid.uuid4().hex[:8]}.tar"
+        await self.write_file(sandbox_id, remote_tar, data)
+        result = await self.execute_command(
+            sandbox_id,
+            f"tar -xf {shlex.quote(remote_tar)} -C {shlex.quote(path)} "
+            f"--no-same-owner; status=$?; rm -f {shlex.quote(remote_tar)}; "
+            "exit $status",
+        )
+        if result.exit_code != 0:
+            raise SandboxException(
+                f"Failed to extract archive into {path}: {result.stdout.strip()}"
+            )
+
     @abstractmethod
     async def read_file(
         self,
@@ -204,14 +281,10 @@ class SandboxProvider(ABC):
     ) -> FileContent:
         pass
 
-    async def list_files(
-        self,
-        sandbox_id: str,
-        path: str = "/home/user",
-        excluded_patterns: list[str] | None = None,
-    ) -> list[FileMetadata]:
-        patterns = excluded_patterns or SANDBOX_EXCLUDED_PATHS
-
+    async def _list_entries(
+        self, sandbox_id: str, path: str, patterns: list[str]
+    ) -> list[list[str]]:
+        # Rows of path, find type letter, size and mtime
         exclude_conditions = []
         for pattern in patterns:
             if pattern.startswith("*."):
@@ -223,13 +296,19 @@ class SandboxProvider(ABC):
         find_command = f"find {path} {exclude_args} -printf '%p\t%y\t%s\t%T@\n'"
 
         result = await self.execute_command(sandbox_id, find_command, timeout=30)
+        return [line.split("\t") for line in result.stdout.strip().split("\n") if line]
 
-        metadata_items = []
-        for line in result.stdout.strip().split("\n"):
-            if not line:
-                continue
+    async def list_files(
+        self,
+        sandbox_id: str,
+        path: str = "/home/user",
+        excluded_patterns: list[str] | None = None,
+    ) -> list[FileMetadata]:
+        patterns = excluded_patterns or SANDBOX_EXCLUDED_PATHS
+        entries = await self._list_entries(sandbox_id, path, patterns)
 
-            parts = line.split("\t")
+        metadata_items = []
+        for parts in entries:
             if len(parts) < 4:
                 continue
 
@@ -273,6 +352,82 @@ class SandboxProvider(ABC):
 
         return metadata_items
 
+    def _entry_metadata(
+        self, path: str, file_type: str, size: int, mtime: float
+    ) -> FileMetadata | None:
+        # Same shape as list_files: only files and directories are reported
+        if file_type == "f":
+            return FileMetadata(
+                path=path,
+                type="file",
+                size=size,
+                modified=mtime,
+                is_binary=self._is_binary_file(path),
+            )
+        if file_type == "d":
+            return FileMetadata(path=path, type="directory", size=0, modified=mtime)
+        return None
+
+    @staticmethod
+    def _listing_digest(metadata: list[FileMetadata]) -> str:
+        listing = repr(sorted(astuple(item) for item in metadata))
+        return hashlib.blake2b(listing.encode("utf-8"), digest_size=8).hexdigest()
+
+    async def get_file_tree(
+        self,
+        sandbox_id: str,
+        path: str = "",
+        cursor: str | None = None,
+        limit: int = SANDBOX_FILE_TREE_PAGE_SIZE,
+        depth: int | None = None,
+        if_none_match: tuple[str, int] | None = None,
+    ) -> FileTreePage:
+        # Providers without a live index list the whole sandbox each time; the
+        # listing's digest stands in for the index so an unchanged tree keeps
+        # its ETag. Entries are ordered by path and cursor is the last path of
+        # the previous page.
+        metadata = await self.list_files(sandbox_id)
+        index = self._listing_digest(metadata)
+        if if_none_match == (index, 0):
+            return FileTreePage(index=index, version=0, not_modified=True)
+
+        # Accept the same absolute or home-relative paths as the agent
+        root = posixpath.relpath(self.normalize_path(path), "/home/user")
+        prefix = f"{root}/" if root != "." else ""
+        base_depth = prefix.count("/")
+        entries: list[FileMetadata] = []
+        next_cursor = None
+        for item in sorted(metadata, key=lambda m: m.path):
+            if not item.path.startswith(prefix) or (cursor and item.path <= cursor):
+                continue
+            if depth is not None and item.path.count("/") - base_depth >= depth:
+                continue
+            if len(entries) == limit:
+                next_cursor = entries[-1].path
+                break
+            entries.append(item)
+        return FileTreePage(
+            index=index, version=0, entries=entries, next_cursor=next_cursor
+        )
+
+    async def get_file_changes(
+        self,
+        sandbox_id: str,
+        index: str | None,
+        since: int,
+        wait: float = 0,
+        limit: int = SANDBOX_FILE_TREE_PAGE_SIZE,
+    ) -> FileChangeSet:
+        # Without a live index there are no deltas: an unchanged listing has
+        # nothing new, anything else sends the client back to get_file_tree
+        current = self._listing_digest(await self.list_files(sandbox_id))
+        if current == index and since == 0 and wait > 0:
+            await asyncio.sleep(wait)
+            current = self._listing_digest(await self.list_files(sandbox_id))
+        return FileChangeSet(
+            index=current, version=0, reset=current != index or since != 0
+        )
+
     @abstractmethod
     async def create_pty(
         self,
@@ -488,6 +643,49 @@ class SandboxProvider(ABC):
                         e,
                     )
 
+    @abstractmethod
+    async def open_archive(
+        self, sandbox_id: str, path: str, excluded_patterns: list[str]
+    ) -> Iterator[bytes]:
+        # A blocking iterator over one tar stream of path; consume it off the
+        # event loop
+        pass
+
+    @abstractmethod
+    async def open_file(
+        self, sandbox_id: str, path: str, offset: int = 0, length: int | None = None
+    ) -> Iterator[bytes]:
+        # A blocking iterator over the raw bytes of a window of the file
+        pass
+
+    def _stat_metadata(
+        self, path: str, file_type: str, size: int, mtime: float
+    ) -> FileMetadata:
+        # Unlike list_files, anything that is not a file or directory is kept
+        # with type "other" so callers can refuse it
+        metadata = self._entry_metadata(path, file_type, size, mtime)
+        if metadata is None:
+            return FileMetadata(path=path, type="other", size=size, modified=mtime)
+        if metadata.type == "directory":
+            metadata.size = size
+        return metadata
+
+    async def stat_file(self, sandbox_id: str, path: str) -> FileMetadata | None:
+        # None when the path does not exist; symlinks are followed
+        result = await self.execute_command(
+            sandbox_id,
+            f"stat -L -c '%F\t%s\t%Y' {shlex.quote(self.normalize_path(path))}",
+        )
+        fields = result.stdout.strip().split("\t")
+        if result.exit_code != 0 or len(fields) != 3:
+            return None
+        file_type = {
+            "directory": "d",
+            "regular file": "f",
+            "regular empty file": "f",
+        }.get(fields[0], "o")
+        return self._stat_metadata(path, file_type, int(fields[1]), float(fields[2]))
+
     @abstractmethod
     async def get_ide_url(self, sandbox_id: str) -> str | None:
         pass
@@ -509,23 +707,138 @@ class SandboxProvider(ABC):
 
 
 class LocalDockerProvider(SandboxProvider):
-    def __init__(self, config: DockerConfig) -> None:
+    def __init__(self, config: DockerConfig, shared: bool = False) -> None:
         self.config = config
-        self._executor = ThreadPoolExecutor(max_workers=10)
+        self.shared = shared
+        self._executor = docker_manager.executor
         self._containers: dict[str, Any] = {}
         self._pty_sessions: dict[str, dict[str, Any]] = {}
         self._port_mappings: dict[str, dict[int, int]] = {}
+        self._cached_at: dict[str, float] = {}
+        self._running_at: dict[str, float] = {}
+        self._agents: dict[str, SandboxAgentClient] = {}
+        self._agent_missing: set[str] = set()
         self._docker_client: Any = None
+        if shared:
+            # Lifecycle events invalidate cached containers and ports; the
+            # TTL covers anything the event stream misses
+            docker_event_stream.subscribe(
+                self._on_docker_event, config.host, on_gap=self.invalidate_all
+            )
+
+    def _cache_container(
+        self, sandbox_id: str, container: Any, port_map: dict[int, int]
+    ) -> None:
+        self._containers[sandbox_id] = container
+        self._port_mappings[sandbox_id] = port_map
+        self._cached_at[sandbox_id] = time.monotonic()
+        # Callers reload the container first, so its status is current
+        if container.status == "running":
+            self._mark_running(sandbox_id)
+        else:
+            self._running_at.pop(sandbox_id, None)
+
+    def _cached_container(self, sandbox_id: str) -> Any | None:
+        cached_at = self._cached_at.get(sandbox_id)
+        if (
+            cached_at is None
+            or time.monotonic() - cached_at > SANDBOX_CONTAINER_CACHE_TTL_SECONDS
+        ):
+            self.invalidate(sandbox_id)
+            return None
+        return self._containers.get(sandbox_id)
+
+    def _mark_running(self, sandbox_id: str) -> None:
+        self._running_at[sandbox_id] = time.monotonic()
+
+    def _known_running(self, sandbox_id: str) -> bool:
+        running_at = self._running_at.get(sandbox_id)
+        return (
+            running_at is not None
+            and time.monotonic() - running_at <= SANDBOX_CONTAINER_STATUS_TTL_SECONDS
+        )
+
+    def invalidate(self, sandbox_id: str) -> None:
+        self._cached_at.pop(sandbox_id, None)
+        self._running_at.pop(sandbox_id, None)
+        self._containers.pop(sandbox_id, None)
+        self._port_mappings.pop(sandbox_id, None)
+        self._agent_missing.discard(sandbox_id)
+        self._drop_agent(sandbox_id)
+
+    def invalidate_all(self) -> None:
+        for sandbox_id in list(self._cached_at):
+            self.invalidate(sandbox_id)
+
+    def _on_docker_event(self, event: dict[str, Any]) -> None:
+        # Runs on the event stream thread
+        if event_action(event) == "exec_die":
+            return
+        sandbox_id = event_sandbox_id(event)
+        if sandbox_id:
+            self.invalidate(sandbox_id)
+
+    def _drop_agent(self, sandbox_id: str) -> None:
+        agent = self._agents.pop(sandbox_id, None)
+        if agent is not None:
+            agent.discard()
+
+    async def _get_agent(self, sandbox_id: str) -> SandboxAgentClient | None:
+        # Images without sandbox_agent.py keep using one docker exec per call
+        if sandbox_id in self._agent_missing:
+            return None
+        agent = self._agents.get(sandbox_id)
+        if agent is not None:
+            if agent.usable:
+                return agent
+            self._drop_agent(sandbox_id)
+
+        container = await self._get_container(sandbox_id)
+        try:
+            agent = await SandboxAgentClient.start(
+                container, self._executor, self.config.user_home
+            )
+        except Exception as e:
+            logger.warning("Failed to start agent in sandbox %s: %s", sandbox_id, e)
+            agent = None
+        if agent is None:
+            self._agent_missing.add(sandbox_id)
+            return None
+
+        existing = self._agents.get(sandbox_id)
+        if existing is not None and existing.usable:
+            agent.discard()
+            return existing
+        self._agents[sandbox_id] = agent
+        return agent
+
+    async def _agent_call(
+        self,
+        sandbox_id: str,
+        op: str,
+        params: dict[str, Any],
+        idempotent: bool = True,
+    ) -> dict[str, Any] | None:
+        # None means the caller should fall back to docker exec
+        agent = await self._get_agent(sandbox_id)
+        if agent is None:
+            return None
+        try:
+            return await agent.call(op, params)
+        except SandboxAgentError as e:
+            self._drop_agent(sandbox_id)
+            if not idempotent:
+                # The request may already have run, so it is not repeated
+                raise SandboxException(f"Sandbox agent connection lost: {e}")
+            logger.warning(
+                "Sandbox agent for %s failed, using docker exec: %s", sandbox_id, e
+            )
+            return None
 
     def _get_docker_client(self) -> Any:
         if self._docker_client is None:
             try:
-                import docker
-
-                if self.config.host:
-                    self._docker_client = docker.DockerClient(base_url=self.config.host)
-                else:
-                    self._docker_client = docker.from_env()
+                self._docker_client = docker_manager.get_client(self.config.host)
             except ImportError:
                 raise SandboxException(
                     "Docker SDK not installed. Run: pip install docker"
@@ -595,12 +908,10 @@ class LocalDockerProvider(SandboxProvider):
             container = await loop.run_in_executor(
                 self._executor, lambda: self._create_container(sandbox_id)
             )
-            self._containers[sandbox_id] = container
-
             port_map = await loop.run_in_executor(
                 self._executor, lambda: self._extract_port_mappings(container)
             )
-            self._port_mappings[sandbox_id] = port_map
+            self._cache_container(sandbox_id, container, port_map)
 
             return sandbox_id
         except Exception as e:
@@ -662,34 +973,42 @@ class LocalDockerProvider(SandboxProvider):
         except Exception:
             return None
 
-    async def connect_sandbox(self, sandbox_id: str) -> bool:
-        if sandbox_id in self._containers:
-            container = self._containers[sandbox_id]
-            loop = asyncio.get_running_loop()
-
-            is_running = await loop.run_in_executor(
-                self._executor, lambda: self._is_container_running(container)
-            )
-            if is_running:
-                await self._ensure_ide_server_running(sandbox_id)
-                return True
-            del self._containers[sandbox_id]
+    async def connect_sandbox(self, sandbox_id: str, start_ide: bool = True) -> bool:
+        return await self._connect_container(sandbox_id, start_ide) is not None
 
+    async def _connect_container(
+        self, sandbox_id: str, start_ide: bool = True
+    ) -> Any | None:
+        # Returns the container it cached, which a concurrent invalidate()
+        # may already have dropped from self._containers
         loop = asyncio.get_running_loop()
+        cached = self._cached_container(sandbox_id)
+        if cached is not None:
+            is_running = self._known_running(sandbox_id)
+            if not is_running:
+                is_running = await loop.run_in_executor(
+                    self._executor, lambda: self._is_container_running(cached)
+                )
+            if is_running:
+                self._mark_running(sandbox_id)
+                if start_ide:
+                    await self._ensure_ide_server_running(sandbox_id)
+                return cached
+            self.invalidate(sandbox_id)
 
         container = await loop.run_in_executor(
             self._executor, lambda: self._get_container_by_id(sandbox_id)
         )
         if container:
-            self._containers[sandbox_id] = container
             port_mappings = await loop.run_in_executor(
                 self._executor, lambda: self._extract_port_mappings(container)
             )
-            self._port_mappings[sandbox_id] = port_mappings
-            await self._ensure_ide_server_running(sandbox_id)
-            return True
+            self._cache_container(sandbox_id, container, port_mappings)
+            if start_ide:
+                await self._ensure_ide_server_running(sandbox_id)
+            return container
 
-        return False
+        return None
 
     async def delete_sandbox(self, sandbox_id: str) -> None:
         container = self._containers.get(sandbox_id)
@@ -701,11 +1020,7 @@ class LocalDockerProvider(SandboxProvider):
                 return
 
         await self._destroy_container(container)
-
-        if sandbox_id in self._containers:
-            del self._containers[sandbox_id]
-        if sandbox_id in self._port_mappings:
-            del self._port_mappings[sandbox_id]
+        self.invalidate(sandbox_id)
 
         logger.info("Successfully deleted Docker sandbox %s", sandbox_id)
 
@@ -713,11 +1028,16 @@ class LocalDockerProvider(SandboxProvider):
         container = self._containers.get(sandbox_id)
         if not container:
             return False
+        if self._known_running(sandbox_id):
+            return True
 
         loop = asyncio.get_running_loop()
-        return await loop.run_in_executor(
+        is_running = await loop.run_in_executor(
             self._executor, lambda: self._is_container_running(container)
         )
+        if is_running:
+            self._mark_running(sandbox_id)
+        return is_running
 
     def _run_command(
         self,
@@ -739,6 +1059,37 @@ class LocalDockerProvider(SandboxProvider):
         stdout, stderr = result.output or (b"", b"")
         return exit_code, (stdout or b"") + (stderr or b"")
 
+    async def _exec(
+        self,
+        sandbox_id: str,
+        command: str,
+        envs: dict[str, str] | None,
+        background: bool,
+        timeout: int,
+    ) -> tuple[int, bytes]:
+        result = await self._agent_call(
+            sandbox_id,
+            "exec",
+            {
+                "command": command,
+                "env": envs or {},
+                "cwd": self.config.user_home,
+                "background": background,
+                "timeout": timeout,
+            },
+            idempotent=False,
+        )
+        if result is not None:
+            return int(result.get("exit_code") or 0), decode_content(result, "output")
+
+        env_list = [f"{k}={v}" for k, v in (envs or {}).items()]
+        return await self._run_in_container(
+            sandbox_id,
+            lambda container: self._run_command(
+                container, command, env_list, background
+            ),
+        )
+
     async def execute_command(
         self,
         sandbox_id: str,
@@ -747,41 +1098,83 @@ class LocalDockerProvider(SandboxProvider):
         envs: dict[str, str] | None = None,
         timeout: int | None = None,
     ) -> CommandResult:
-        container = await self._get_container(sandbox_id)
-        loop = asyncio.get_running_loop()
-        env_list = [f"{k}={v}" for k, v in (envs or {}).items()]
-
         effective_timeout = timeout or SANDBOX_DEFAULT_COMMAND_TIMEOUT
+        timeout_msg = f"Command execution timed out after {effective_timeout}s"
 
-        exit_code, output = await self._execute_with_timeout(
-            loop.run_in_executor(
-                self._executor,
-                lambda: self._run_command(container, command, env_list, background),
-            ),
-            effective_timeout,
-            f"Command execution timed out after {effective_timeout}s",
-        )
+        try:
+            exit_code, output = await self._execute_with_timeout(
+                self._exec(sandbox_id, command, envs, background, effective_timeout),
+                effective_timeout,
+                timeout_msg,
+            )
+        except SandboxAgentRequestError as e:
+            if e.code == "timeout":
+                raise TimeoutError(timeout_msg)
+            raise
 
         output_str = output.decode("utf-8", errors="replace")
         return CommandResult(stdout=output_str, stderr="", exit_code=exit_code)
 
-    def _write_container_file(
-        self,
-        container: Any,
-        normalized_path: str,
-        content_bytes: bytes,
-    ) -> None:
-        tar_stream = io.BytesIO()
-        with tarfile.open(fileobj=tar_stream, mode="w") as tar:
-            file_data = io.BytesIO(content_bytes)
-            info = tarfile.TarInfo(name=Path(normalized_path).name)
-            info.size = len(content_bytes)
-            tar.addfile(info, file_data)
-        tar_stream.seek(0)
-
-        parent_dir = str(Path(normalized_path).parent)
-        container.exec_run(f"mkdir -p {shlex.quote(parent_dir)}")
-        container.put_archive(parent_dir, tar_stream.read())
+    @property
+    def file_owner(self) -> tuple[int, int]:  # type: ignore[override]
+        return self.config.user_uid, self.config.user_gid
+
+    async def _missing_directories(
+        self, sandbox_id: str, files: dict[str, bytes]
+    ) -> set[PurePosixPath]:
+        # The parent directories below home that do not exist yet
+        home = PurePosixPath(self.config.user_home)
+        parents = {
+            parent
+            for file_path in files
+            for parent in PurePosixPath(file_path).parents
+            if parent != home and parent.is_relative_to(home)
+        }
+        return await self.missing_directories(sandbox_id, parents)
+
+    def _build_files_archive(
+        self, files: dict[str, bytes], missing: set[PurePosixPath]
+    ) -> bytes:
+        # Members are named relative to "/". Directories the files need that
+        # do not exist yet get entries of their own, so they are owned by the
+        # sandbox user instead of being created by the daemon as root. Entries
+        # for existing directories would reset their mode and mtime.
+        home = PurePosixPath(self.config.user_home)
+        now = time.time()
+        added: set[PurePosixPath] = set()
+        buffer = io.BytesIO()
+
+        def add(path: PurePosixPath, data: bytes | None) -> None:
+            info = tarfile.TarInfo(name=str(path.relative_to("/")))
+            info.uid, info.gid = self.file_owner
+            info.mtime = int(now)
+            if data is None:
+                info.type = tarfile.DIRTYPE
+                info.mode = 0o755
+                tar.addfile(info)
+            else:
+                info.mode = 0o644
+                info.size = len(data)
+                tar.addfile(info, io.BytesIO(data))
+
+        with tarfile.open(fileobj=buffer, mode="w") as tar:
+            for file_path, data in files.items():
+                path = PurePosixPath(file_path)
+                if path == home or path == PurePosixPath("/"):
+                    raise SandboxException(f"Cannot write to directory {file_path}")
+                for parent in reversed(path.parents):
+                    if parent in missing and parent not in added:
+                        add(parent, None)
+                        added.add(parent)
+                add(path, data)
+        return buffer.getvalue()
+
+    async def upload_archive(self, sandbox_id: str, path: str, data: bytes) -> None:
+        def put(container: Any) -> None:
+            if not container.put_archive(path, data):
+                raise SandboxException(f"Failed to upload archive to {path}")
+
+        await self._run_in_container(sandbox_id, put)
 
     async def write_file(
         self,
@@ -789,20 +1182,45 @@ class LocalDockerProvider(SandboxProvider):
         path: str,
         content: str | bytes,
     ) -> None:
-        container = await self._get_container(sandbox_id)
         normalized_path = self.normalize_path(path)
-        loop = asyncio.get_running_loop()
 
         if isinstance(content, str):
             content_bytes = content.encode("utf-8")
         else:
             content_bytes = content
 
-        await loop.run_in_executor(
-            self._executor,
-            lambda: self._write_container_file(
-                container, normalized_path, content_bytes
-            ),
+        result = await self._agent_call(
+            sandbox_id,
+            "write",
+            {"path": normalized_path, "content": encode_content(content_bytes)},
+        )
+        if result is not None:
+            return
+
+        files = {normalized_path: content_bytes}
+        missing = await self._missing_directories(sandbox_id, files)
+        await self.upload_archive(
+            sandbox_id, "/", self._build_files_archive(files, missing)
+        )
+
+    async def write_files(
+        self,
+        sandbox_id: str,
+        files: dict[str, str | bytes],
+    ) -> None:
+        # One tar and one put_archive for the whole batch, parent
+        # directories included
+        if not files:
+            return
+        normalized: dict[str, bytes] = {}
+        for path, content in files.items():
+            normalized[self.normalize_path(path)] = (
+                content.encode("utf-8") if isinstance(content, str) else content
+            )
+
+        missing = await self._missing_directories(sandbox_id, normalized)
+        await self.upload_archive(
+            sandbox_id, "/", self._build_files_archive(normalized, missing)
         )
 
     def _read_container_file(self, container: Any, normalized_path: str) -> bytes:
@@ -826,14 +1244,14 @@ class LocalDockerProvider(SandboxProvider):
         sandbox_id: str,
         path: str,
     ) -> FileContent:
-        container = await self._get_container(sandbox_id)
         normalized_path = self.normalize_path(path)
-        loop = asyncio.get_running_loop()
 
-        content_bytes = await loop.run_in_executor(
-            self._executor,
-            lambda: self._read_container_file(container, normalized_path),
-        )
+        content_bytes = await self._agent_read(sandbox_id, normalized_path)
+        if content_bytes is None:
+            content_bytes = await self._run_in_container(
+                sandbox_id,
+                lambda container: self._read_container_file(container, normalized_path),
+            )
 
         content, is_binary = self._encode_file_content(path, content_bytes)
 
@@ -844,6 +1262,24 @@ class LocalDockerProvider(SandboxProvider):
             is_binary=is_binary,
         )
 
+    async def _agent_read(self, sandbox_id: str, path: str) -> bytes | None:
+        # Read in windows so no reply comes near the agent's line limit
+        chunks: list[bytes] = []
+        offset = 0
+        while True:
+            result = await self._agent_call(
+                sandbox_id,
+                "read",
+                {"path": path, "offset": offset, "length": AGENT_READ_CHUNK_SIZE},
+            )
+            if result is None:
+                return None
+            chunk = decode_content(result, "content")
+            chunks.append(chunk)
+            offset += len(chunk)
+            if len(chunk) < AGENT_READ_CHUNK_SIZE:
+                return b"".join(chunks)
+
     def _create_pty_exec(self, container: Any) -> tuple[dict[str, Any], Any]:
         exec_id = container.client.api.exec_create(
             container.id,
@@ -881,6 +1317,7 @@ class LocalDockerProvider(SandboxProvider):
             {
                 "exec_id": exec_info["Id"],
                 "socket": socket,
+                "exec_socket": AsyncExecSocket.wrap(socket),
                 "container": container,
                 "on_data": on_data,
                 "reader_task": None,
@@ -910,6 +1347,21 @@ class LocalDockerProvider(SandboxProvider):
         socket: Any,
         on_data: PtyDataCallbackType,
     ) -> None:
+        session = self._get_pty_session(sandbox_id, session_id)
+        exec_socket = session.get("exec_socket") if session else None
+        if exec_socket:
+            try:
+                while True:
+                    data = await exec_socket.recv(PTY_READ_SIZE)
+                    if not data:
+                        break
+                    await on_data(data)
+            except asyncio.CancelledError:
+                pass
+            except Exception as e:
+                logger.error("PTY reader error: %s", e)
+            return
+
         loop = asyncio.get_running_loop()
 
         def read_socket() -> bytes | None:
@@ -939,6 +1391,11 @@ class LocalDockerProvider(SandboxProvider):
         if not session:
             return
 
+        exec_socket = session.get("exec_socket")
+        if exec_socket:
+            await exec_socket.sendall(data)
+            return
+
         socket = session.get("socket")
         if not socket:
             return
@@ -1053,19 +1510,147 @@ class LocalDockerProvider(SandboxProvider):
             container.start()
 
     async def _get_container(self, sandbox_id: str) -> Any:
-        if sandbox_id not in self._containers:
-            connected = await self.connect_sandbox(sandbox_id)
-            if not connected:
+        container = self._cached_container(sandbox_id)
+        if container is None:
+            container = await self._connect_container(sandbox_id)
+            if container is None:
                 raise SandboxException(f"Container {sandbox_id} not found")
 
-        container = self._containers[sandbox_id]
+        if self._known_running(sandbox_id):
+            return container
+
         loop = asyncio.get_running_loop()
 
         await loop.run_in_executor(
             self._executor, lambda: self._ensure_running(container)
         )
+        self._mark_running(sandbox_id)
         return container
 
+    @staticmethod
+    def _is_stale_status_error(error: Exception) -> bool:
+        # 404: the container is gone; 409: it is stopped or paused
+        return getattr(error, "status_code", None) in (404, 409)
+
+    async def _run_in_container(
+        self, sandbox_id: str, operation: Callable[[Any], T]
+    ) -> T:
+        container = await self._get_container(sandbox_id)
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(
+                self._executor, lambda: operation(container)
+            )
+        except Exception as e:
+            if not self._is_stale_status_error(e):
+                raise
+            # The cached status was wrong, so reload (starting it on demand)
+            # and retry once
+            self.invalidate(sandbox_id)
+            container = await self._get_container(sandbox_id)
+            return await loop.run_in_executor(
+                self._executor, lambda: operation(container)
+            )
+
+    def _create_stream_exec(self, container: Any, command: str) -> tuple[str, Any]:
+        exec_id = container.client.api.exec_create(
+            container.id,
+            cmd=["bash", "-c", command],
+            stdin=False,
+            tty=False,
+            workdir=self.config.user_home,
+        )["Id"]
+        handle = container.client.api.exec_start(exec_id, socket=True, tty=False)
+        return exec_id, handle
+
+    @staticmethod
+    def _read_exec_handle(handle: Any, size: int) -> bytes:
+        if hasattr(handle, "recv"):
+            return bytes(handle.recv(size))
+        return bytes(handle.read(size))
+
+    def _iter_exec_stream(
+        self,
+        container: Any,
+        exec_id: str,
+        handle: Any,
+        ok_exit_codes: tuple[int, ...] = (0,),
+    ) -> Iterator[bytes]:
+        demuxer = DockerBinaryDemuxer()
+        stderr = bytearray()
+        try:
+            while data := self._read_exec_handle(handle, ARCHIVE_READ_SIZE):
+                for stream_type, payload in demuxer.feed(data):
+                    if stream_type == STREAM_STDOUT:
+                        yield payload
+                    elif len(stderr) < ARCHIVE_STDERR_LIMIT:
+                        stderr += payload
+        finally:
+            try:
+                handle.close()
+            except Exception:
+                pass
+
+        exit_code = container.client.api.exec_inspect(exec_id).get("ExitCode")
+        if exit_code not in ok_exit_codes:
+            logger.warning(
+                "Stream exec in sandbox container %s exited with %s: %s",
+                container.id,
+                exit_code,
+                stderr.decode("utf-8", errors="replace").strip(),
+            )
+
+    async def _open_exec_stream(
+        self, sandbox_id: str, command: str, ok_exit_codes: tuple[int, ...] = (0,)
+    ) -> Iterator[bytes]:
+        container = await self._get_container(sandbox_id)
+        loop = asyncio.get_running_loop()
+        exec_id, handle = await loop.run_in_executor(
+            self._executor, lambda: self._create_stream_exec(container, command)
+        )
+        return self._iter_exec_stream(container, exec_id, handle, ok_exit_codes)
+
+    async def open_archive(
+        self, sandbox_id: str, path: str, excluded_patterns: list[str]
+    ) -> Iterator[bytes]:
+        excludes = " ".join(
+            f"--exclude={shlex.quote(pattern)}" for pattern in excluded_patterns
+        )
+        # tar exits 1 when a file changes while it is being read
+        return await self._open_exec_stream(
+            sandbox_id, f"tar -C {shlex.quote(path)} -cf - {excludes} .", (0, 1)
+        )
+
+    async def open_file(
+        self, sandbox_id: str, path: str, offset: int = 0, length: int | None = None
+    ) -> Iterator[bytes]:
+        if length == 0:
+            return iter(())
+        # dd streams the window straight from the file with no re-encoding
+        command = (
+            f"dd if={shlex.quote(self.normalize_path(path))} bs={ARCHIVE_READ_SIZE} "
+            f"iflag=skip_bytes,count_bytes skip={offset} status=none"
+        )
+        if length is not None:
+            command += f" count={length}"
+        return await self._open_exec_stream(sandbox_id, command)
+
+    async def stat_file(self, sandbox_id: str, path: str) -> FileMetadata | None:
+        normalized_path = self.normalize_path(path)
+        try:
+            result = await self._agent_call(
+                sandbox_id, "stat", {"path": normalized_path, "follow": True}
+            )
+        except SandboxAgentRequestError as e:
+            if e.code in ("ENOENT", "ENOTDIR"):
+                return None
+            raise
+        if result is None:
+            return await super().stat_file(sandbox_id, path)
+        return self._stat_metadata(
+            path, result["type"], result["size"], result["mtime"]
+        )
+
     async def get_ide_url(self, sandbox_id: str) -> str | None:
         if self.config.sandbox_domain:
             subdomain = f"sandbox-{sandbox_id}-{self.config.openvscode_port}"
@@ -1144,22 +1729,17 @@ class LocalDockerProvider(SandboxProvider):
                 self._executor,
                 lambda: self._create_container_from_image(new_sandbox_id, temp_image),
             )
-            self._containers[new_sandbox_id] = new_container
-
             port_map = await loop.run_in_executor(
                 self._executor, lambda: self._extract_port_mappings(new_container)
             )
-            self._port_mappings[new_sandbox_id] = port_map
+            self._cache_container(new_sandbox_id, new_container, port_map)
 
             if checkpoint_id:
                 await self.restore_checkpoint(new_sandbox_id, checkpoint_id)
 
             return new_sandbox_id
         except Exception:
-            if new_sandbox_id in self._containers:
-                del self._containers[new_sandbox_id]
-            if new_sandbox_id in self._port_mappings:
-                del self._port_mappings[new_sandbox_id]
+            self.invalidate(new_sandbox_id)
             if new_container is not None:
                 try:
                     await loop.run_in_executor(
@@ -1176,9 +1756,113 @@ class LocalDockerProvider(SandboxProvider):
             except Exception:
                 pass
 
+    async def _list_entries(
+        self, sandbox_id: str, path: str, patterns: list[str]
+    ) -> list[list[str]]:
+        result = await self._agent_call(
+            sandbox_id, "list", {"path": path, "excludes": patterns}
+        )
+        if result is None:
+            return await super()._list_entries(sandbox_id, path, patterns)
+        return [[str(field) for field in entry] for entry in result["entries"]]
+
+    async def get_file_tree(
+        self,
+        sandbox_id: str,
+        path: str = "",
+        cursor: str | None = None,
+        limit: int = SANDBOX_FILE_TREE_PAGE_SIZE,
+        depth: int | None = None,
+        if_none_match: tuple[str, int] | None = None,
+    ) -> FileTreePage:
+        # Served from the agent's inotify-backed index, built on first use
+        result = await self._agent_call(
+            sandbox_id,
+            "tree",
+            {
+                "path": self.normalize_path(path, self.config.user_home),
+                "after": cursor,
+                "limit": limit,
+                "depth": depth,
+                "excludes": SANDBOX_EXCLUDED_PATHS,
+                "if_none_match": list(if_none_match) if if_none_match else None,
+            },
+        )
+        if result is None:
+            return await super().get_file_tree(
+                sandbox_id, path, cursor, limit, depth, if_none_match
+            )
+
+        entries = []
+        for entry_path, file_type, size, mtime in result.get("entries") or []:
+            metadata = self._entry_metadata(entry_path, file_type, size, mtime)
+            if metadata is not None:
+                entries.append(metadata)
+        return FileTreePage(
+            index=result["index"],
+            version=result["version"],
+            entries=entries,
+            next_cursor=result.get("next"),
+            not_modified=bool(result.get("not_modified")),
+        )
+
+    async def get_file_changes(
+        self,
+        sandbox_id: str,
+        index: str | None,
+        since: int,
+        wait: float = 0,
+        limit: int = SANDBOX_FILE_TREE_PAGE_SIZE,
+    ) -> FileChangeSet:
+        result = await self._agent_call(
+            sandbox_id,
+            "changes",
+            {
+                "index": index,
+                "since": since,
+                "wait": wait,
+                "limit": limit,
+                "excludes": SANDBOX_EXCLUDED_PATHS,
+            },
+        )
+        if result is None:
+            return await super().get_file_changes(sandbox_id, index, since, wait, limit)
+
+        changes = []
+        for version, entry_path, entry in result.get("changes") or []:
+            metadata = None
+            if entry is not None:
+                metadata = self._entry_metadata(entry_path, *entry)
+                if metadata is None:
+                    continue
+            changes.append(FileChange(version, entry_path, metadata))
+        return FileChangeSet(
+            index=result["index"],
+            version=result["version"],
+            reset=bool(result.get("reset")),
+            changes=changes,
+        )
+
     async def cleanup(self) -> None:
         await super().cleanup()
-        self._executor.shutdown(wait=False)
-        if self._docker_client:
-            self._docker_client.close()
-            self._docker_client = None
+        for sandbox_id in list(self._agents):
+            self._drop_agent(sandbox_id)
+        # The client and executor are shared by the process and stay open
+        self._docker_client = None
+
+
+_shared_providers: dict[tuple[Any, ...], LocalDockerProvider] = {}
+_shared_providers_lock = threading.Lock()
+os.register_at_fork(after_in_child=_shared_providers.clear)
+
+
+def get_shared_provider(config: DockerConfig) -> LocalDockerProvider:
+    # One provider per process and config, so container and port-mapping
+    # caches survive across requests and tasks
+    key = astuple(config)
+    with _shared_providers_lock:
+        provider = _shared_providers.get(key)
+        if provider is None:
+            provider = LocalDockerProvider(config=config, shared=True)
+            _shared_providers[key] = provider
+        return provider
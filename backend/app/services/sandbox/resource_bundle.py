@@ -0,0 +1,208 @@
+import hashlib
+import io
+import json
+import logging
+import os
+import posixpath
+import tarfile
+import tempfile
+import time
+import zipfile
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from app.constants import RESOURCE_BUNDLE_CACHE_MAX_ENTRIES
+from app.core.config import get_settings
+from app.models.types import EnabledResourceInfo
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Part of the cache key, so a change to the bundle layout never reuses old files
+BUNDLE_FORMAT_VERSION = 1
+
+
+@dataclass
+class ResourceBundle:
+    # A tar laid out relative to the home directory, with the directories it
+    # has entries for
+    data: bytes
+    directories: list[str] = field(init=False)
+
+    def __post_init__(self) -> None:
+        with tarfile.open(fileobj=io.BytesIO(self.data)) as tar:
+            self.directories = [member.name for member in tar if member.isdir()]
+
+    def without_directories(self, existing: set[str]) -> bytes:
+        # Unpacking an entry for a directory that already exists resets its
+        # mode and mtime, so those entries are left out
+        if existing.isdisjoint(self.directories):
+            return self.data
+        buffer = io.BytesIO()
+        with (
+            tarfile.open(fileobj=io.BytesIO(self.data)) as source,
+            tarfile.open(fileobj=buffer, mode="w") as target,
+        ):
+            for member in source:
+                if member.isdir() and member.name in existing:
+                    continue
+                target.addfile(
+                    member, source.extractfile(member) if member.isfile() else None
+                )
+        return buffer.getvalue()
+
+
+class ResourceBundleCache:
+    # Tar bundles of the skills, commands and agents a sandbox needs, laid out
+    # relative to the home directory. Bundles are stored on disk under a hash
+    # of the resource set (including each source file's size and mtime), so
+    # initializing sandboxes for the same user reuses the file already built.
+    def __init__(self, cache_path: Path | None = None) -> None:
+        self.cache_path = cache_path or Path(settings.STORAGE_PATH) / "resource_bundles"
+
+    def get(
+        self,
+        skills: list[EnabledResourceInfo],
+        commands: list[EnabledResourceInfo],
+        agents: list[EnabledResourceInfo],
+        owner: tuple[int, int],
+    ) -> ResourceBundle | None:
+        # Blocking; returns None when none of the resources exist on disk
+        sources = self._collect_sources(skills, commands, agents)
+        if not sources:
+            return None
+
+        key = self._cache_key(sources, owner)
+        bundle_path = self.cache_path / f"{key}.tar"
+        try:
+            data = bundle_path.read_bytes()
+            # Recently used bundles survive pruning
+            os.utime(bundle_path)
+            return ResourceBundle(data)
+        except FileNotFoundError:
+            pass
+
+        data = self._build(sources, owner)
+        try:
+            self._store(bundle_path, data)
+        except OSError as e:
+            logger.warning("Failed to cache resource bundle %s: %s", key, e)
+        return ResourceBundle(data)
+
+    @staticmethod
+    def _collect_sources(
+        skills: list[EnabledResourceInfo],
+        commands: list[EnabledResourceInfo],
+        agents: list[EnabledResourceInfo],
+    ) -> list[tuple[str, str, Path, os.stat_result]]:
+        sources = []
+        for kind, resources in (
+            ("skill", skills),
+            ("command", commands),
+            ("agent", agents),
+        ):
+            for resource in resources:
+                path = Path(resource["path"])
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    logger.warning(
+                        "%s not found: %s at %s",
+                        kind.capitalize(),
+                        resource["name"],
+                        path,
+                    )
+                    continue
+                sources.append((kind, resource["name"], path, stat))
+        return sources
+
+    @staticmethod
+    def _cache_key(
+        sources: list[tuple[str, str, Path, os.stat_result]], owner: tuple[int, int]
+    ) -> str:
+        manifest = json.dumps(
+            [
+                BUNDLE_FORMAT_VERSION,
+                list(owner),
+                sorted(
+                    [kind, name, str(path), stat.st_size, stat.st_mtime_ns]
+                    for kind, name, path, stat in sources
+                ),
+            ]
+        )
+        return hashlib.sha256(manifest.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _build(
+        sources: list[tuple[str, str, Path, os.stat_result]], owner: tuple[int, int]
+    ) -> bytes:
+        now = int(time.time())
+        directories: set[str] = set()
+        buffer = io.BytesIO()
+
+        def add(name: str, data: bytes | None, mode: int = 0o644) -> None:
+            # Parent directories get entries of their own so they are owned by
+            # the sandbox user rather than created as root by the daemon
+            parent = posixpath.dirname(name)
+            if parent and parent not in directories:
+                add(parent, None)
+            if data is None and name in directories:
+                return
+
+            info = tarfile.TarInfo(name)
+            info.uid, info.gid = owner
+            info.mtime = now
+            if data is None:
+                directories.add(name)
+                info.type = tarfile.DIRTYPE
+                info.mode = 0o755
+                tar.addfile(info)
+            else:
+                info.mode = mode
+                info.size = len(data)
+                tar.addfile(info, io.BytesIO(data))
+
+        with tarfile.open(fileobj=buffer, mode="w") as tar:
+            for kind, name, path, _ in sources:
+                if kind == "skill":
+                    with zipfile.ZipFile(path, "r") as skill_zip:
+                        for item in skill_zip.infolist():
+                            item_name = posixpath.normpath(item.filename)
+                            if item_name.startswith(("/", "..")) or item_name == ".":
+                                continue
+                            target = f".claude/skills/{name}/{item_name}"
+                            if item.is_dir():
+                                add(target, None)
+                                continue
+                            # Keep executable bits the way unzip did
+                            mode = (item.external_attr >> 16) & 0o777 or 0o644
+                            add(target, skill_zip.read(item), mode)
+                else:
+                    add(f".claude/{kind}s/{name}.md", path.read_bytes())
+        return buffer.getvalue()
+
+    def _store(self, bundle_path: Path, data: bytes) -> None:
+        self.cache_path.mkdir(parents=True, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=self.cache_path, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, bundle_path)
+        except BaseException:
+            Path(temp_path).unlink(missing_ok=True)
+            raise
+        self._prune()
+
+    def _prune(self) -> None:
+        bundles = []
+        for path in self.cache_path.glob("*.tar"):
+            try:
+                bundles.append((path.stat().st_mtime, path))
+            except FileNotFoundError:
+                continue
+        bundles.sort(reverse=True)
+        for _, path in bundles[RESOURCE_BUNDLE_CACHE_MAX_ENTRIES:]:
+            path.unlink(missing_ok=True)
+
+
+resource_bundle_cache = ResourceBundleCache()
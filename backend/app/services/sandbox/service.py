@@ -1,17 +1,20 @@
 import asyncio
-import base64
-import io
 import json
 import logging
 import shlex
 import uuid
-import zipfile
-from pathlib import Path
+from collections.abc import AsyncIterator
+from pathlib import PurePosixPath
 from typing import Any, Callable, Coroutine
 
 from fastapi import WebSocket
 
-from app.constants import PTY_OUTPUT_QUEUE_SIZE
+from app.constants import (
+    PTY_OUTPUT_QUEUE_SIZE,
+    SANDBOX_EXCLUDED_PATHS,
+    SANDBOX_FILE_CHANGES_MAX_WAIT_SECONDS,
+    SANDBOX_FILE_TREE_PAGE_SIZE,
+)
 from app.models.types import (
     CustomAgentDict,
     CustomEnvVarDict,
@@ -21,14 +24,25 @@ from app.models.types import (
 from app.services.agent import AgentService
 from app.services.command import CommandService
 from app.services.exceptions import SandboxException
+from app.services.sandbox.archive import iterate_in_thread, tar_to_zip
 from app.services.sandbox.provider import SandboxProvider
-from app.services.sandbox.types import CommandResult, PtySize
+from app.services.sandbox.resource_bundle import resource_bundle_cache
+from app.services.sandbox.types import (
+    CommandResult,
+    FileChangeSet,
+    FileMetadata,
+    FileTreePage,
+    PtySize,
+)
+from app.services.sandbox.warm_pool import warm_sandbox_pool
 from app.services.skill import SkillService
 from app.utils.queue import drain_queue, put_with_overflow
 
 logger = logging.getLogger(__name__)
 
 OPENVSCODE_PORT = 8765
+CLAUDE_CONFIG_PATH = "/home/user/.claude.json"
+CODEX_AUTH_PATH = "/home/user/.codex/auth.json"
 OPENVSCODE_SETTINGS_DIR = "/home/user/.openvscode-server/data/Machine"
 OPENVSCODE_SETTINGS_PATH = f"{OPENVSCODE_SETTINGS_DIR}/settings.json"
 OPENVSCODE_DEFAULT_SETTINGS: dict[str, object] = {
@@ -72,11 +86,28 @@ class SandboxService:
                         sandbox_id,
                         e,
                     )
-        await self.provider.cleanup()
+        if not self.provider.shared:
+            await self.provider.cleanup()
 
     async def create_sandbox(self) -> str:
         return await self.provider.create_sandbox()
 
+    async def create_warm_sandbox(self) -> str:
+        # Everything initialize_sandbox does that is not specific to a user
+        sandbox_id = await self.provider.create_sandbox()
+        try:
+            await self._start_openvscode_server(sandbox_id)
+        except Exception:
+            await self.provider.delete_sandbox(sandbox_id)
+            raise
+        return sandbox_id
+
+    async def claim_sandbox(self) -> tuple[str, bool]:
+        sandbox_id = await warm_sandbox_pool.claim(self.provider)
+        if sandbox_id:
+            return sandbox_id, True
+        return await self.create_sandbox(), False
+
     async def delete_sandbox(self, sandbox_id: str) -> None:
         if not sandbox_id:
             return
@@ -113,6 +144,9 @@ class SandboxService:
     async def write_file(self, sandbox_id: str, file_path: str, content: str) -> None:
         await self.provider.write_file(sandbox_id, file_path, content)
 
+    async def write_files(self, sandbox_id: str, files: dict[str, str | bytes]) -> None:
+        await self.provider.write_files(sandbox_id, files)
+
     async def get_preview_links(self, sandbox_id: str) -> list[dict[str, str | int]]:
         links = await self.provider.get_preview_links(sandbox_id)
         return [{"preview_url": link.preview_url, "port": link.port} for link in links]
@@ -280,6 +314,54 @@ class SandboxService:
             for m in metadata
         ]
 
+    async def get_file_tree(
+        self,
+        sandbox_id: str,
+        path: str = "",
+        cursor: str | None = None,
+        limit: int = SANDBOX_FILE_TREE_PAGE_SIZE,
+        depth: int | None = None,
+        if_none_match: tuple[str, int] | None = None,
+    ) -> FileTreePage:
+        return await self.provider.get_file_tree(
+            sandbox_id, path, cursor, limit, depth, if_none_match
+        )
+
+    async def get_file_changes(
+        self,
+        sandbox_id: str,
+        index: str | None,
+        since: int,
+        wait: float = 0,
+    ) -> FileChangeSet:
+        return await self.provider.get_file_changes(
+            sandbox_id, index, since, min(wait, SANDBOX_FILE_CHANGES_MAX_WAIT_SECONDS)
+        )
+
+    async def stream_file_changes(
+        self, sandbox_id: str, index: str | None, since: int
+    ) -> AsyncIterator[FileChangeSet]:
+        # Chains long polls; after a reset it follows the new index from its
+        # current version, the client refetches the tree in the meantime
+        while True:
+            change_set = await self.get_file_changes(
+                sandbox_id, index, since, wait=SANDBOX_FILE_CHANGES_MAX_WAIT_SECONDS
+            )
+            if change_set.reset or change_set.changes:
+                yield change_set
+            index, since = change_set.index, change_set.version
+
+    async def stat_file(self, sandbox_id: str, file_path: str) -> FileMetadata | None:
+        return await self.provider.stat_file(sandbox_id, file_path)
+
+    async def stream_file(
+        self, sandbox_id: str, file_path: str, offset: int, length: int
+    ) -> AsyncIterator[bytes]:
+        # Raw bytes of one window of the file, read in the sandbox and never
+        # held in memory as a whole
+        chunks = await self.provider.open_file(sandbox_id, file_path, offset, length)
+        return iterate_in_thread(chunks)
+
     async def get_file_content(self, sandbox_id: str, file_path: str) -> dict[str, Any]:
         try:
             content = await self.provider.read_file(sandbox_id, file_path)
@@ -323,35 +405,14 @@ class SandboxService:
         secrets = await self.provider.get_secrets(sandbox_id)
         return [{"key": s.key, "value": s.value} for s in secrets]
 
-    async def generate_zip_download(self, sandbox_id: str) -> bytes:
-        metadata_items = await self.provider.list_files(sandbox_id)
-
-        zip_buffer = io.BytesIO()
-
-        with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zip_file:
-            for item in metadata_items:
-                if item.type == "file":
-                    file_path = item.path
-
-                    try:
-                        content = await self.provider.read_file(sandbox_id, file_path)
-
-                        if content.is_binary:
-                            zip_file.writestr(
-                                file_path, base64.b64decode(content.content)
-                            )
-                        else:
-                            zip_file.writestr(
-                                file_path, content.content.encode("utf-8")
-                            )
-                    except Exception as e:
-                        logger.warning(
-                            "Failed to write file %s to zip: %s", file_path, e
-                        )
-                        continue
-
-        zip_buffer.seek(0)
-        return zip_buffer.read()
+    async def stream_zip_download(self, sandbox_id: str) -> AsyncIterator[bytes]:
+        # One tar stream of the home directory transcoded to ZIP on the fly;
+        # the archive is opened here so a missing sandbox fails before any
+        # response is sent
+        tar_stream = await self.provider.open_archive(
+            sandbox_id, "/home/user", SANDBOX_EXCLUDED_PATHS
+        )
+        return iterate_in_thread(tar_to_zip(tar_stream))
 
     async def _copy_all_resources_to_sandbox(
         self,
@@ -374,90 +435,39 @@ class SandboxService:
         if not enabled_skills and not enabled_commands and not enabled_agents:
             return
 
-        zip_buffer = io.BytesIO()
-        has_content = False
-
-        with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zf:
-            for skill in enabled_skills:
-                skill_name = skill["name"]
-                local_zip_path = Path(skill["path"])
-
-                if not local_zip_path.exists():
-                    logger.warning(
-                        "Skill ZIP not found: %s at %s", skill_name, local_zip_path
-                    )
-                    continue
-
-                with zipfile.ZipFile(local_zip_path, "r") as skill_zip:
-                    for item in skill_zip.namelist():
-                        content = skill_zip.read(item)
-                        zf.writestr(f".claude/skills/{skill_name}/{item}", content)
-                        has_content = True
-
-            for command in enabled_commands:
-                command_name = command["name"]
-                local_path = Path(command["path"])
-
-                if not local_path.exists():
-                    logger.warning(
-                        "Command not found: %s at %s", command_name, local_path
-                    )
-                    continue
-
-                command_content = local_path.read_text(encoding="utf-8")
-                zf.writestr(f".claude/commands/{command_name}.md", command_content)
-                has_content = True
-
-            for agent in enabled_agents:
-                agent_name = agent["name"]
-                local_path = Path(agent["path"])
-
-                if not local_path.exists():
-                    logger.warning("Agent not found: %s at %s", agent_name, local_path)
-                    continue
-
-                agent_content = local_path.read_text(encoding="utf-8")
-                zf.writestr(f".claude/agents/{agent_name}.md", agent_content)
-                has_content = True
-
-        if not has_content:
+        bundle = await asyncio.to_thread(
+            resource_bundle_cache.get,
+            enabled_skills,
+            enabled_commands,
+            enabled_agents,
+            self.provider.file_owner,
+        )
+        if bundle is None:
             return
 
-        zip_buffer.seek(0)
-        zip_content = zip_buffer.getvalue()
-        encoded_content = base64.b64encode(zip_content).decode("utf-8")
-
-        remote_zip_path = f"/home/user/_resources_{uuid.uuid4().hex[:8]}.zip"
-        temp_b64_path = f"{remote_zip_path}.b64tmp"
-
         try:
-            await self.write_file(sandbox_id, temp_b64_path, encoded_content)
-            decode_and_extract_cmd = (
-                f"base64 -d {shlex.quote(temp_b64_path)} > {shlex.quote(remote_zip_path)} && "
-                f"unzip -q -o {shlex.quote(remote_zip_path)} -d /home/user && "
-                f"rm -f {shlex.quote(remote_zip_path)} {shlex.quote(temp_b64_path)}"
-            )
-            await self.execute_command(sandbox_id, decode_and_extract_cmd)
-
-            resource_count = (
-                len(enabled_skills) + len(enabled_commands) + len(enabled_agents)
-            )
-            logger.info(
-                "Copied %d resources to sandbox %s in single upload",
-                resource_count,
-                sandbox_id,
+            home = PurePosixPath("/home/user")
+            missing = await self.provider.missing_directories(
+                sandbox_id, [home / directory for directory in bundle.directories]
             )
+            existing = set(bundle.directories) - {
+                str(directory.relative_to(home)) for directory in missing
+            }
+            data = await asyncio.to_thread(bundle.without_directories, existing)
+            await self.provider.upload_archive(sandbox_id, str(home), data)
         except Exception as e:
             logger.error("Failed to copy resources to sandbox %s: %s", sandbox_id, e)
-            cleanup_cmd = (
-                f"rm -f {shlex.quote(remote_zip_path)} {shlex.quote(temp_b64_path)}"
-            )
-            try:
-                await self.execute_command(sandbox_id, cleanup_cmd)
-            except Exception:
-                pass
             raise SandboxException(f"Failed to copy resources to sandbox: {e}") from e
 
+        resource_count = (
+            len(enabled_skills) + len(enabled_commands) + len(enabled_agents)
+        )
+        logger.info(
+            "Copied %d resources to sandbox %s in single upload",
+            resource_count,
+            sandbox_id,
+        )
+
     async def _add_env_vars_parallel(
         self, sandbox_id: str, custom_env_vars: list[CustomEnvVarDict]
     ) -> None:
@@ -525,34 +535,37 @@ class SandboxService:
             "window.autoDetectColorScheme": False,
         }
         settings_content = json.dumps(settings, indent=2)
-        await self.write_file(sandbox_id, OPENVSCODE_SETTINGS_PATH, settings_content)
+        # The archive creates the settings directory if it is missing
+        await self.write_files(sandbox_id, {OPENVSCODE_SETTINGS_PATH: settings_content})
         logger.info("IDE theme updated to: %s", vscode_theme)
 
-    async def _setup_claude_config(
-        self, sandbox_id: str, auto_compact_disabled: bool
-    ) -> None:
-        if not auto_compact_disabled:
-            return
-
-        claude_config_path = "/home/user/.claude.json"
+    async def _claude_config_content(self, sandbox_id: str) -> str:
         config: dict[str, Any] = {}
 
         try:
-            existing = await self.provider.read_file(sandbox_id, claude_config_path)
+            existing = await self.provider.read_file(sandbox_id, CLAUDE_CONFIG_PATH)
             if not existing.is_binary and existing.content:
                 config = json.loads(existing.content)
         except Exception:
             pass
 
         config["autoCompactEnabled"] = False
-        await self.write_file(
-            sandbox_id, claude_config_path, json.dumps(config, indent=2)
-        )
+        return json.dumps(config, indent=2)
 
-    async def _setup_codex_auth(self, sandbox_id: str, codex_auth_json: str) -> None:
-        codex_dir = "/home/user/.codex"
-        await self.execute_command(sandbox_id, f"mkdir -p {codex_dir}")
-        await self.write_file(sandbox_id, f"{codex_dir}/auth.json", codex_auth_json)
+    async def _setup_config_files(
+        self,
+        sandbox_id: str,
+        auto_compact_disabled: bool,
+        codex_auth_json: str | None,
+    ) -> None:
+        # Config files written at startup go up together in one archive
+        files: dict[str, str | bytes] = {}
+        if auto_compact_disabled:
+            files[CLAUDE_CONFIG_PATH] = await self._claude_config_content(sandbox_id)
+        if codex_auth_json:
+            files[CODEX_AUTH_PATH] = codex_auth_json
+        if files:
+            await self.write_files(sandbox_id, files)
 
     async def initialize_sandbox(
         self,
@@ -567,13 +580,18 @@ class SandboxService:
         auto_compact_disabled: bool = False,
         codex_auth_json: str | None = None,
         is_fork: bool = False,
+        prewarmed: bool = False,
     ) -> None:
-        tasks: list[Coroutine[None, None, None]] = [
-            self._start_openvscode_server(sandbox_id),
-        ]
+        tasks: list[Coroutine[None, None, None]] = []
+        if not prewarmed:
+            tasks.append(self._start_openvscode_server(sandbox_id))
 
         if not is_fork:
-            tasks.append(self._setup_claude_config(sandbox_id, auto_compact_disabled))
+            tasks.append(
+                self._setup_config_files(
+                    sandbox_id, auto_compact_disabled, codex_auth_json
+                )
+            )
 
             if custom_env_vars:
                 tasks.append(self._add_env_vars_parallel(sandbox_id, custom_env_vars))
@@ -595,9 +613,6 @@ class SandboxService:
             if github_token:
                 tasks.append(self._setup_github_token(sandbox_id, github_token))
 
-            if codex_auth_json:
-                tasks.append(self._setup_codex_auth(sandbox_id, codex_auth_json))
-
         if openrouter_api_key:
             tasks.append(
                 self._setup_anthropic_bridge(
@@ -1,13 +1,11 @@
 import asyncio
 import json
 import logging
-import re
 import select
 import shlex
 import socket
 from abc import ABC, abstractmethod
 from collections.abc import AsyncIterable, AsyncIterator
-from concurrent.futures import ThreadPoolExecutor
 from contextlib import suppress
 from dataclasses import asdict
 from types import TracebackType
@@ -22,13 +20,26 @@ from claude_agent_sdk._internal.transport import Transport
 from claude_agent_sdk._version import __version__ as sdk_version
 from claude_agent_sdk.types import ClaudeAgentOptions
 
+from app.services.sandbox.docker_pool import docker_manager
+from app.services.sandbox.exec_events import exec_exit_watcher
+from app.services.sandbox.exec_socket import AsyncExecSocket
+from app.services.sandbox.framing import (
+    STREAM_STDERR,
+    STREAM_STDOUT,
+    AdaptiveReadSize,
+    DockerFrameDemuxer,
+)
+from app.services.sandbox.ndjson import NdjsonDecoder
 from app.services.sandbox.types import DockerConfig
 
 logger = logging.getLogger(__name__)
 
 DEFAULT_MAX_BUFFER_SIZE = 1024 * 1024 * 10  # 10MB
 STDOUT_QUEUE_MAXSIZE = 32
-ANSI_ESCAPE_RE = re.compile(r"\x1B\[[0-?]*[ -/]*[@-~]")
+# exec_inspect is only a fallback for a missed exec_die event or socket EOF
+EXEC_INSPECT_FALLBACK_SECONDS = 30.0
+EXEC_INSPECT_UNSUBSCRIBED_SECONDS = 5.0
+EXEC_EXIT_GRACE_SECONDS = 2.0
 
 
 class BaseSandboxTransport(Transport, ABC):
@@ -40,16 +51,18 @@ class BaseSandboxTransport(Transport, ABC):
         sandbox_id: str,
         prompt: str | AsyncIterable[dict[str, Any]],
         options: ClaudeAgentOptions,
+        multi_turn: bool = False,
     ) -> None:
         self._sandbox_id = sandbox_id
         self._prompt = prompt
         self._options = options
+        # A multi-turn CLI keeps running after each result message
+        self._multi_turn = multi_turn
         self._max_buffer_size = (
             options.max_buffer_size
             if options.max_buffer_size is not None
             else DEFAULT_MAX_BUFFER_SIZE
         )
-        self._json_decoder = json.JSONDecoder()
         self._monitor_task: asyncio.Task[None] | None = None
         self._stdout_queue: asyncio.Queue[str | object] = asyncio.Queue(
             maxsize=STDOUT_QUEUE_MAXSIZE
@@ -273,33 +286,14 @@ class BaseSandboxTransport(Transport, ABC):
         cmd.extend(["--input-format", "stream-json"])
         return shlex.join(cmd)
 
-    def _parse_json_buffer(self, buffer: str) -> tuple[str, list[Any]]:
-        messages: list[Any] = []
-        working = buffer
-
-        while working:
-            stripped = working.lstrip()
-            leading = len(working) - len(stripped)
-            if leading:
-                working = stripped
-            try:
-                data, offset = self._json_decoder.raw_decode(working)
-            except json.JSONDecodeError:
-                break
-            messages.append(data)
-            working = working[offset:]
-
-        return working, messages
-
     async def _parse_cli_output(self) -> AsyncIterator[dict[str, Any]]:
         if not self._ready and not self._monitor_task:
             raise CLIConnectionError("Transport is not connected")
 
-        json_buffer = ""
-        json_started = False
+        decoder = NdjsonDecoder(self._max_buffer_size)
         should_stop = False
 
-        while True:
+        while not should_stop:
             chunk = await self._stdout_queue.get()
 
             if chunk is self._SENTINEL:
@@ -307,53 +301,23 @@ class BaseSandboxTransport(Transport, ABC):
             if not isinstance(chunk, str):
                 continue
 
-            clean_chunk = ANSI_ESCAPE_RE.sub("", chunk)
-            clean_chunk = clean_chunk.replace("\r", "")
-
-            json_lines = clean_chunk.split("\n")
-            for json_line in json_lines:
-                json_line = json_line.strip()
-                if not json_line:
-                    continue
-
-                if not json_started:
-                    first_brace_positions = [
-                        pos
-                        for pos in (json_line.find("{"), json_line.find("["))
-                        if pos != -1
-                    ]
-                    if not first_brace_positions:
-                        continue
-                    json_line = json_line[min(first_brace_positions) :]
-                    json_started = True
-
-                json_buffer += json_line
-                if len(json_buffer) > self._max_buffer_size:
-                    json_buffer = ""
-                    raise CLIJSONDecodeError(
-                        json_line,
-                        ValueError(
-                            f"CLI output exceeded max buffer size of {self._max_buffer_size}"
-                        ),
-                    )
+            try:
+                parsed_messages = decoder.feed(chunk)
+            except ValueError as exc:
+                raise CLIJSONDecodeError(chunk, exc) from exc
 
-                json_buffer, parsed_messages = self._parse_json_buffer(json_buffer)
-                if parsed_messages:
-                    for data in parsed_messages:
-                        yield data
-                        if isinstance(data, dict) and data.get("type") == "result":
-                            json_buffer = ""
-                            should_stop = True
-                            break
-                    if not json_buffer:
-                        json_started = False
-                if should_stop:
+            for data in parsed_messages:
+                yield data
+                if (
+                    not self._multi_turn
+                    and isinstance(data, dict)
+                    and data.get("type") == "result"
+                ):
+                    should_stop = True
                     break
-            if should_stop:
-                break
 
-        if json_buffer:
-            leftover, parsed_messages = self._parse_json_buffer(json_buffer)
+        if not should_stop:
+            parsed_messages, leftover = decoder.finish()
             for data in parsed_messages:
                 yield data
             if leftover.strip():
@@ -374,14 +338,22 @@ class DockerSandboxTransport(BaseSandboxTransport):
         docker_config: DockerConfig,
         prompt: str | AsyncIterable[dict[str, Any]],
         options: ClaudeAgentOptions,
+        multi_turn: bool = False,
     ) -> None:
-        super().__init__(sandbox_id=sandbox_id, prompt=prompt, options=options)
+        super().__init__(
+            sandbox_id=sandbox_id,
+            prompt=prompt,
+            options=options,
+            multi_turn=multi_turn,
+        )
         self._docker_config = docker_config
-        self._executor = ThreadPoolExecutor(max_workers=4)
+        self._executor = docker_manager.executor
         self._docker_client: Any = None
         self._container: Any = None
         self._exec_id: str | None = None
         self._socket: Any = None
+        self._exec_socket: AsyncExecSocket | None = None
+        self._exit_future: asyncio.Future[int] | None = None
         self._reader_task: asyncio.Task[None] | None = None
 
     def _get_logger(self) -> Any:
@@ -390,14 +362,9 @@ class DockerSandboxTransport(BaseSandboxTransport):
     def _get_docker_client(self) -> Any:
         if self._docker_client is None:
             try:
-                import docker
-
-                if self._docker_config.host:
-                    self._docker_client = docker.DockerClient(
-                        base_url=self._docker_config.host
-                    )
-                else:
-                    self._docker_client = docker.from_env()
+                self._docker_client = docker_manager.get_client(
+                    self._docker_config.host
+                )
             except ImportError:
                 raise CLIConnectionError(
                     "Docker SDK not installed. Run: pip install docker"
@@ -409,8 +376,8 @@ class DockerSandboxTransport(BaseSandboxTransport):
     def _get_container(self) -> Any:
         client = self._get_docker_client()
         try:
+            # get() returns current state, so no reload is needed
             container = client.containers.get(f"claudex-sandbox-{self._sandbox_id}")
-            container.reload()
             if container.status != "running":
                 container.start()
             return container
@@ -435,7 +402,9 @@ class DockerSandboxTransport(BaseSandboxTransport):
             workdir=cwd,
             user=user,
         )
-        exec_id = exec_result["Id"]
+        exec_id = exec_result.get("Id") if exec_result else None
+        if not exec_id:
+            raise RuntimeError("Docker did not return an exec id")
         socket = self._container.client.api.exec_start(
             exec_id,
             socket=True,
@@ -464,13 +433,17 @@ class DockerSandboxTransport(BaseSandboxTransport):
         envs["TERM"] = "xterm-256color"
 
         try:
-            self._exec_id, self._socket = await loop.run_in_executor(
+            exec_id, self._socket = await loop.run_in_executor(
                 self._executor,
                 lambda: self._create_exec(command_line, envs, cwd, user),
             )
         except Exception as exc:
             raise CLIConnectionError(f"Failed to start Claude CLI: {exc}") from exc
 
+        self._exec_id = exec_id
+        self._exec_socket = AsyncExecSocket.wrap(self._socket)
+        self._exit_future = exec_exit_watcher.watch(exec_id, self._docker_config.host)
+
         self._reader_task = loop.create_task(self._read_socket_data())
         self._monitor_task = loop.create_task(self._monitor_process())
         self._ready = True
@@ -487,11 +460,21 @@ class DockerSandboxTransport(BaseSandboxTransport):
         except Exception:
             pass
 
+    async def _wait_for_exit_event(self, timeout: float) -> bool:
+        if not self._exit_future:
+            return False
+        if not self._exit_future.done():
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(asyncio.shield(self._exit_future), timeout)
+        return self._exit_future.done()
+
     async def _kill_exec_process(self) -> None:
         exec_id = self._exec_id
         container = self._container
         if not exec_id or not container:
             return
+        if self._exit_future and self._exit_future.done():
+            return
         loop = asyncio.get_running_loop()
         try:
             info = await loop.run_in_executor(self._executor, self._get_exec_info)
@@ -503,12 +486,15 @@ class DockerSandboxTransport(BaseSandboxTransport):
             await loop.run_in_executor(
                 self._executor, self._send_signal_to_pid, pid, "TERM"
             )
-            await asyncio.sleep(0.5)
-            info = await loop.run_in_executor(self._executor, self._get_exec_info)
-            if info and info.get("Running", False):
-                await loop.run_in_executor(
-                    self._executor, self._send_signal_to_pid, pid, "KILL"
-                )
+            if await self._wait_for_exit_event(0.5):
+                return
+            if not exec_exit_watcher.connected:
+                info = await loop.run_in_executor(self._executor, self._get_exec_info)
+                if not info or not info.get("Running", False):
+                    return
+            await loop.run_in_executor(
+                self._executor, self._send_signal_to_pid, pid, "KILL"
+            )
         except Exception as e:
             logger.debug("Failed to kill exec process: %s", e)
 
@@ -518,27 +504,35 @@ class DockerSandboxTransport(BaseSandboxTransport):
 
         await self._kill_exec_process()
 
+        self._exec_socket = None
         if self._socket:
             with suppress(Exception):
                 self._socket.close()
             self._socket = None
 
+        if self._exec_id and self._exit_future:
+            exec_exit_watcher.unwatch(self._exec_id, self._exit_future)
+        self._exit_future = None
         self._exec_id = None
-
-        if self._docker_client:
-            with suppress(Exception):
-                self._docker_client.close()
-            self._docker_client = None
-
-        await asyncio.to_thread(self._executor.shutdown, wait=True)
+        # The client and executor are shared by the process and stay open
+        self._docker_client = None
 
     async def _send_data(self, data: str) -> None:
+        if self._exec_socket:
+            await self._exec_socket.sendall(data.encode("utf-8"))
+            return
         loop = asyncio.get_running_loop()
         await loop.run_in_executor(
             self._executor, lambda: self._socket_send(data.encode("utf-8"))
         )
 
     async def _send_eof(self) -> None:
+        if self._exec_socket:
+            try:
+                self._exec_socket.shutdown_write()
+                return
+            except OSError:
+                pass
         loop = asyncio.get_running_loop()
         await loop.run_in_executor(self._executor, self._shutdown_socket_write)
 
@@ -574,7 +568,7 @@ class DockerSandboxTransport(BaseSandboxTransport):
                 pass
         return None
 
-    def _recv_with_select(self, timeout: float) -> bytes | None:
+    def _recv_with_select(self, timeout: float, size: int) -> bytes | None:
         fd = self._get_socket_fd()
         if fd is None:
             return None
@@ -582,20 +576,40 @@ class DockerSandboxTransport(BaseSandboxTransport):
             readable, _, _ = select.select([fd], [], [], timeout)
             if not readable:
                 return b""
-            return self._socket_recv(4096)
+            return self._socket_recv(size)
         except Exception:
             return None
 
+    async def _dispatch_output(self, chunks: list[tuple[int, str]]) -> None:
+        for stream_type, text in chunks:
+            if stream_type == STREAM_STDOUT:
+                await self._stdout_queue.put(text)
+            elif stream_type == STREAM_STDERR and self._options.stderr:
+                try:
+                    self._options.stderr(text)
+                except Exception:
+                    pass
+
     async def _read_socket_data(self) -> None:
         loop = asyncio.get_running_loop()
-        buffer = b""
+        demuxer = DockerFrameDemuxer(self._max_buffer_size)
+        read_size = AdaptiveReadSize()
         drain_empty_count = 0
+        data: bytes | None
 
         try:
             while True:
+                if self._exec_socket:
+                    data = await self._exec_socket.recv(read_size.size)
+                    if not data:
+                        break
+                    read_size.update(len(data))
+                    await self._dispatch_output(demuxer.feed(data))
+                    continue
+
                 timeout = 5.0 if self._ready else 0.2
                 data = await loop.run_in_executor(
-                    self._executor, self._recv_with_select, timeout
+                    self._executor, self._recv_with_select, timeout, read_size.size
                 )
                 if data is None:
                     break
@@ -607,32 +621,10 @@ class DockerSandboxTransport(BaseSandboxTransport):
                     continue
                 drain_empty_count = 0
 
-                buffer += data
-
-                while len(buffer) >= 8:
-                    stream_type = buffer[0]
-                    frame_size = int.from_bytes(buffer[4:8], byteorder="big")
-
-                    if frame_size > self._max_buffer_size:
-                        buffer = b""
-                        break
+                read_size.update(len(data))
+                await self._dispatch_output(demuxer.feed(data))
 
-                    if len(buffer) < 8 + frame_size:
-                        break
-
-                    payload = buffer[8 : 8 + frame_size]
-                    buffer = buffer[8 + frame_size :]
-
-                    if stream_type == 1:
-                        decoded = payload.decode("utf-8", errors="replace")
-                        await self._stdout_queue.put(decoded)
-                    elif stream_type == 2 and self._options.stderr:
-                        try:
-                            self._options.stderr(
-                                payload.decode("utf-8", errors="replace")
-                            )
-                        except Exception:
-                            pass
+            await self._dispatch_output(demuxer.flush())
         except asyncio.CancelledError:
             pass
         except Exception as e:
@@ -675,32 +667,60 @@ class DockerSandboxTransport(BaseSandboxTransport):
             logger.warning("exec_inspect failed for exec_id %s: %s", self._exec_id, e)
             return None
 
-    async def _monitor_process(self) -> None:
-        if not self._exec_id or not self._container:
-            return
+    async def _wait_for_exit_code(self) -> int | None:
+        # Socket EOF or the shared exec_die subscription ends the wait;
+        # exec_inspect only runs when neither has settled it
+        exit_future = self._exit_future
+        if exit_future is None:
+            return None
 
         loop = asyncio.get_running_loop()
+        reader_done = False
 
-        try:
-            while self._ready:
-                await asyncio.sleep(0.5)
+        while True:
+            waits: set[asyncio.Future[Any]] = {exit_future}
+            if self._reader_task and not reader_done:
+                waits.add(self._reader_task)
+                timeout = (
+                    EXEC_INSPECT_FALLBACK_SECONDS
+                    if exec_exit_watcher.connected
+                    else EXEC_INSPECT_UNSUBSCRIBED_SECONDS
+                )
+            else:
+                timeout = EXEC_EXIT_GRACE_SECONDS
 
-                info = await loop.run_in_executor(self._executor, self._get_exec_info)
-                if info is None:
-                    self._exit_error = CLIConnectionError(
-                        "Claude CLI process disappeared"
-                    )
-                    break
+            await asyncio.wait(
+                waits, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+            )
+            if exit_future.done():
+                return exit_future.result()
 
-                if not info.get("Running", True):
-                    exit_code = info.get("ExitCode", -1)
-                    if exit_code != 0:
-                        self._exit_error = ProcessError(
-                            "Claude CLI exited with an error",
-                            exit_code=exit_code,
-                            stderr="",
-                        )
-                    break
+            if self._reader_task and self._reader_task.done() and not reader_done:
+                # Output ended; give the exit event a moment before inspecting
+                reader_done = True
+                continue
+
+            info = await loop.run_in_executor(self._executor, self._get_exec_info)
+            if info is None:
+                return None
+            if not info.get("Running", True):
+                exit_code: int = info.get("ExitCode", -1)
+                return exit_code
+
+    async def _monitor_process(self) -> None:
+        if not self._exec_id or not self._container:
+            return
+
+        try:
+            exit_code = await self._wait_for_exit_code()
+            if exit_code is None:
+                self._exit_error = CLIConnectionError("Claude CLI process disappeared")
+            elif exit_code != 0:
+                self._exit_error = ProcessError(
+                    "Claude CLI exited with an error",
+                    exit_code=exit_code,
+                    stderr="",
+                )
         except asyncio.CancelledError:
             pass
         except Exception as exc:
@@ -1,4 +1,4 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Any, Callable, Coroutine
 
 
@@ -18,6 +18,39 @@ class FileMetadata:
     is_binary: bool = False
 
 
+@dataclass
+class FileTreePage:
+    # index identifies the snapshot the version counts changes in; a new
+    # index (e.g. after the agent restarts) invalidates cached versions
+    index: str
+    version: int
+    entries: list[FileMetadata] = field(default_factory=list)
+    next_cursor: str | None = None
+    not_modified: bool = False
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.index}.{self.version}"'
+
+
+@dataclass
+class FileChange:
+    version: int
+    path: str
+    # None when the path was removed
+    metadata: FileMetadata | None
+
+
+@dataclass
+class FileChangeSet:
+    index: str
+    version: int
+    # The changes since the requested version are not available; the client
+    # has to fetch the tree again
+    reset: bool
+    changes: list[FileChange] = field(default_factory=list)
+
+
 @dataclass
 class FileContent:
     path: str
@@ -65,6 +98,9 @@ class DockerConfig:
     host: str | None = None
     preview_base_url: str = "http://localhost"
     user_home: str = "/home/user"
+    # Owner of files and directories uploaded with put_archive
+    user_uid: int = 1000
+    user_gid: int = 1000
     openvscode_port: int = 8765
     sandbox_domain: str = ""
     traefik_network: str = ""
@@ -0,0 +1,258 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+import uuid
+from collections.abc import Iterator
+from contextlib import suppress
+from typing import TYPE_CHECKING, Any
+
+from prometheus_client.core import (
+    CounterMetricFamily,
+    GaugeMetricFamily,
+    SummaryMetricFamily,
+)
+from prometheus_client.registry import REGISTRY, Collector
+
+from app.constants import (
+    REDIS_KEY_SANDBOX_WARM_POOL,
+    REDIS_KEY_SANDBOX_WARM_POOL_REFILL_LOCK,
+)
+from app.core.config import get_settings
+from app.services.sandbox.provider import SandboxProvider
+from app.utils.redis import redis_connection
+
+if TYPE_CHECKING:
+    from app.services.sandbox.service import SandboxService
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Longer than a refill batch takes, so two API workers never top up at once
+REFILL_LOCK_TTL_SECONDS = 300
+
+
+class WarmSandboxPool:
+    # Started, generic sandboxes waiting in a Redis list so the API and the
+    # Celery workers draw from the same pool. Only the API process refills
+    # it; any process can claim. Claim counters are per process.
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._refill_task: asyncio.Task[None] | None = None
+        self._wake: asyncio.Event | None = None
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.hit_seconds = 0.0
+        self.miss_seconds = 0.0
+        os.register_at_fork(after_in_child=self._reset_after_fork)
+
+    def _reset_after_fork(self) -> None:
+        self._lock = threading.Lock()
+        self._refill_task = None
+        self._wake = None
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.hit_seconds = 0.0
+        self.miss_seconds = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return settings.SANDBOX_WARM_POOL_MAX_SIZE > 0
+
+    @property
+    def min_size(self) -> int:
+        return min(settings.SANDBOX_WARM_POOL_MIN_SIZE, self.max_size)
+
+    @property
+    def max_size(self) -> int:
+        return max(settings.SANDBOX_WARM_POOL_MAX_SIZE, 0)
+
+    async def claim(self, provider: SandboxProvider) -> str | None:
+        if not self.enabled:
+            return None
+
+        started = time.monotonic()
+        sandbox_id = None
+        try:
+            while sandbox_id is None:
+                async with redis_connection() as redis:
+                    candidate = await redis.lpop(REDIS_KEY_SANDBOX_WARM_POOL)
+                if candidate is None:
+                    break
+                # The container may have been removed since it was pooled
+                if await self._is_usable(provider, candidate):
+                    sandbox_id = candidate
+                else:
+                    logger.info("Dropping stale warm sandbox %s", candidate)
+        except Exception as e:
+            logger.warning("Failed to claim warm sandbox: %s", e)
+
+        self._record_claim(sandbox_id is not None, time.monotonic() - started)
+        if self._wake is not None:
+            self._wake.set()
+        return sandbox_id
+
+    @staticmethod
+    async def _is_usable(provider: SandboxProvider, sandbox_id: str) -> bool:
+        # openvscode was started when the sandbox was pooled, and checking for
+        # it here races the start and can launch a second server
+        try:
+            return await provider.connect_sandbox(sandbox_id, start_ide=False)
+        except Exception:
+            return False
+
+    def _record_claim(self, hit: bool, seconds: float) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+                self.hit_seconds += seconds
+                self.size = max(self.size - 1, 0)
+            else:
+                self.misses += 1
+                self.miss_seconds += seconds
+
+    def start(self, sandbox_service: "SandboxService") -> None:
+        if not self.enabled or self._refill_task is not None:
+            return
+        self._wake = asyncio.Event()
+        self._refill_task = asyncio.create_task(self._refill_loop(sandbox_service))
+
+    async def stop(self) -> None:
+        # Pooled containers are left running for the next process to claim
+        task = self._refill_task
+        self._refill_task = None
+        self._wake = None
+        if task is None:
+            return
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+
+    async def _refill_loop(self, sandbox_service: "SandboxService") -> None:
+        while True:
+            try:
+                await self._refill(sandbox_service)
+            except Exception as e:
+                logger.warning("Warm sandbox pool refill failed: %s", e)
+            if self._wake is None:
+                return
+            self._wake.clear()
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(
+                    self._wake.wait(),
+                    timeout=settings.SANDBOX_WARM_POOL_REFILL_INTERVAL_SECONDS,
+                )
+
+    async def _refill(self, sandbox_service: "SandboxService") -> None:
+        token = uuid.uuid4().hex
+        async with redis_connection() as redis:
+            acquired = await redis.set(
+                REDIS_KEY_SANDBOX_WARM_POOL_REFILL_LOCK,
+                token,
+                nx=True,
+                ex=REFILL_LOCK_TTL_SECONDS,
+            )
+        if not acquired:
+            return
+
+        try:
+            async with redis_connection() as redis:
+                self.size = await redis.llen(REDIS_KEY_SANDBOX_WARM_POOL)
+
+            if self.size > self.max_size:
+                await self._trim(sandbox_service, self.size - self.max_size)
+            elif self.size <= self.min_size and self.size < self.max_size:
+                # Min is the low watermark, inclusive so an unset min still
+                # fills the pool. Top up to max in one batch so a burst of
+                # claims does not trigger a refill per chat
+                await self._fill(sandbox_service, self.max_size - self.size)
+        finally:
+            async with redis_connection() as redis:
+                if await redis.get(REDIS_KEY_SANDBOX_WARM_POOL_REFILL_LOCK) == token:
+                    await redis.delete(REDIS_KEY_SANDBOX_WARM_POOL_REFILL_LOCK)
+
+    async def _fill(self, sandbox_service: "SandboxService", count: int) -> None:
+        results = await asyncio.gather(
+            *(sandbox_service.create_warm_sandbox() for _ in range(count)),
+            return_exceptions=True,
+        )
+        sandbox_ids = [result for result in results if isinstance(result, str)]
+        for result in results:
+            if isinstance(result, BaseException):
+                logger.warning("Failed to create warm sandbox: %s", result)
+        if not sandbox_ids:
+            return
+
+        try:
+            async with redis_connection() as redis:
+                self.size = await redis.rpush(REDIS_KEY_SANDBOX_WARM_POOL, *sandbox_ids)
+        except Exception:
+            for sandbox_id in sandbox_ids:
+                await sandbox_service.provider.delete_sandbox(sandbox_id)
+            raise
+        logger.info("Added %d sandboxes to the warm pool", len(sandbox_ids))
+
+    async def _trim(self, sandbox_service: "SandboxService", count: int) -> None:
+        for _ in range(count):
+            async with redis_connection() as redis:
+                sandbox_id = await redis.rpop(REDIS_KEY_SANDBOX_WARM_POOL)
+            if sandbox_id is None:
+                break
+            self.size = max(self.size - 1, 0)
+            try:
+                await sandbox_service.provider.delete_sandbox(sandbox_id)
+            except Exception as e:
+                logger.warning("Failed to delete warm sandbox %s: %s", sandbox_id, e)
+
+
+class WarmPoolCollector(Collector):
+    def __init__(self, pool: WarmSandboxPool) -> None:
+        self._pool = pool
+
+    def collect(self) -> Iterator[Any]:
+        pool = self._pool
+        claims = pool.hits + pool.misses
+
+        yield GaugeMetricFamily(
+            "sandbox_warm_pool_size",
+            "Warm sandboxes in the pool as last seen by this process",
+            value=pool.size,
+        )
+        bounds = GaugeMetricFamily(
+            "sandbox_warm_pool_bound_size",
+            "Configured warm pool size bounds",
+            labels=["bound"],
+        )
+        bounds.add_metric(["min"], pool.min_size)
+        bounds.add_metric(["max"], pool.max_size)
+        yield bounds
+        yield CounterMetricFamily(
+            "sandbox_warm_pool_hits",
+            "Sandbox claims served from the warm pool",
+            value=pool.hits,
+        )
+        yield CounterMetricFamily(
+            "sandbox_warm_pool_misses",
+            "Sandbox claims that fell back to creating a container",
+            value=pool.misses,
+        )
+        yield GaugeMetricFamily(
+            "sandbox_warm_pool_hit_ratio",
+            "Share of sandbox claims served from the warm pool",
+            value=pool.hits / claims if claims else 0.0,
+        )
+        claim_seconds = SummaryMetricFamily(
+            "sandbox_warm_pool_claim_seconds",
+            "Time spent claiming a sandbox from the warm pool",
+            labels=["result"],
+        )
+        claim_seconds.add_metric(["hit"], pool.hits, pool.hit_seconds)
+        claim_seconds.add_metric(["miss"], pool.misses, pool.miss_seconds)
+        yield claim_seconds
+
+
+warm_sandbox_pool = WarmSandboxPool()
+REGISTRY.register(WarmPoolCollector(warm_sandbox_pool))
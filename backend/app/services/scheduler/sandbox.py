@@ -106,7 +106,7 @@ async def create_and_initialize_sandbox(
     user: User,
     session_factory: Any,
 ) -> tuple[SandboxService, str]:
-    from app.services.sandbox import DockerConfig, LocalDockerProvider, SandboxService
+    from app.services.sandbox import DockerConfig, SandboxService, get_shared_provider
 
     docker_config = DockerConfig(
         image=settings.DOCKER_IMAGE,
@@ -117,9 +117,9 @@ async def create_and_initialize_sandbox(
         traefik_network=settings.DOCKER_TRAEFIK_NETWORK,
     )
 
-    provider = LocalDockerProvider(config=docker_config)
+    provider = get_shared_provider(docker_config)
     sandbox_service = SandboxService(provider, session_factory=session_factory)
-    sandbox_id = await sandbox_service.create_sandbox()
+    sandbox_id, prewarmed = await sandbox_service.claim_sandbox()
 
     await sandbox_service.initialize_sandbox(
         sandbox_id=sandbox_id,
@@ -131,6 +131,7 @@ async def create_and_initialize_sandbox(
         custom_agents=user_settings.custom_agents,
         user_id=str(user.id),
         auto_compact_disabled=user_settings.auto_compact_disabled,
+        prewarmed=prewarmed,
     )
 
     return sandbox_service, sandbox_id
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import os
 from pathlib import Path
@@ -31,6 +32,46 @@ class StorageService:
         attachment_id: str | None = None,
         user_id: str | None = None,
     ) -> MessageAttachmentDict:
+        attachment, sandbox_file_path, contents = await self._store_file(
+            file, attachment_id, user_id
+        )
+        if sandbox_id:
+            await self._upload_to_sandbox(sandbox_id, {sandbox_file_path: contents})
+        return attachment
+
+    async def save_files(
+        self,
+        files: list[UploadFile],
+        sandbox_id: str | None = None,
+        user_id: str | None = None,
+    ) -> list[MessageAttachmentDict]:
+        # Stores each file locally, then uploads them all to the sandbox in
+        # a single archive
+        stored = await asyncio.gather(
+            *(self._store_file(file, None, user_id) for file in files)
+        )
+        if sandbox_id:
+            await self._upload_to_sandbox(
+                sandbox_id, {path: contents for _, path, contents in stored}
+            )
+        return [attachment for attachment, _, _ in stored]
+
+    async def _upload_to_sandbox(
+        self, sandbox_id: str, files: dict[str, str | bytes]
+    ) -> None:
+        # Dual-write: file stored locally (for preview API) AND uploaded to sandbox (for AI access).
+        # Sandbox upload failure is logged but not raised - local copy ensures preview still works.
+        try:
+            await self.sandbox_service.write_files(sandbox_id, files)
+        except Exception as e:
+            logger.warning("Failed to upload file to sandbox %s: %s", sandbox_id, e)
+
+    async def _store_file(
+        self,
+        file: UploadFile,
+        attachment_id: str | None,
+        user_id: str | None,
+    ) -> tuple[MessageAttachmentDict, str, bytes]:
         if file.content_type not in settings.ALLOWED_FILE_TYPES:
             raise StorageException(f"Invalid file type: {file.content_type}")
 
@@ -86,21 +127,10 @@ class StorageService:
         else:
             file_url = f"{settings.BASE_URL}/api/v1/attachments/temp/preview?path={relative_file_path}"
 
-        # Dual-write: file stored locally (for preview API) AND uploaded to sandbox (for AI access).
-        # Sandbox upload failure is logged but not raised - local copy ensures preview still works.
-        if sandbox_id:
-            try:
-                sandbox_file_path = f"/home/user/{unique_filename}"
-                await self.sandbox_service.write_file(
-                    sandbox_id=sandbox_id, file_path=sandbox_file_path, content=contents
-                )
-
-            except Exception as e:
-                logger.warning("Failed to upload file to sandbox %s: %s", sandbox_id, e)
-
-        return {
+        attachment: MessageAttachmentDict = {
             "file_url": file_url,
             "file_path": relative_file_path,
             "file_type": file_type,
             "filename": file.filename,
         }
+        return attachment, f"/home/user/{unique_filename}", contents
@@ -1,6 +1,13 @@
 from app.services.streaming.cancellation import CancellationHandler, StreamCancelled
+from app.services.streaming.coalescer import TextEventCoalescer
 from app.services.streaming.context_usage import ContextUsageTracker
-from app.services.streaming.events import ActiveToolState, StreamEvent, ToolPayload
+from app.services.streaming.events import (
+    ActiveToolState,
+    StreamEvent,
+    ToolPayload,
+    ToolResultRef,
+)
+from app.services.streaming.hub import StreamHub, stream_hub
 from app.services.streaming.orchestrator import (
     StreamContext,
     StreamOrchestrator,
@@ -8,24 +15,32 @@ from app.services.streaming.orchestrator import (
     initialize_and_run_chat,
 )
 from app.services.streaming.processor import StreamProcessor
+from app.services.streaming.progress import ProgressReporter
 from app.services.streaming.publisher import StreamPublisher
 from app.services.streaming.queue_injector import QueueInjector
 from app.services.streaming.session import SessionUpdateCallback, hydrate_chat
+from app.services.streaming.tool_results import ToolResultStore
 
 __all__ = [
     "ActiveToolState",
     "CancellationHandler",
     "ContextUsageTracker",
+    "ProgressReporter",
     "QueueInjector",
     "SessionUpdateCallback",
     "StreamCancelled",
     "StreamContext",
     "StreamEvent",
+    "StreamHub",
     "StreamOrchestrator",
     "StreamOutcome",
     "StreamProcessor",
     "StreamPublisher",
+    "TextEventCoalescer",
     "ToolPayload",
+    "ToolResultRef",
+    "ToolResultStore",
     "hydrate_chat",
     "initialize_and_run_chat",
+    "stream_hub",
 ]
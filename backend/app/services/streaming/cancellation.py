@@ -6,8 +6,9 @@ from typing import TYPE_CHECKING
 
 from redis.asyncio import Redis
 
-from app.constants import REDIS_KEY_CHAT_REVOKED
+from app.constants import REDIS_KEY_CHAT_CANCEL, REDIS_KEY_CHAT_REVOKED
 from app.core.config import get_settings
+from app.utils.redis import redis_pubsub
 
 if TYPE_CHECKING:
     from app.services.claude_agent import ClaudeAgentService
@@ -43,10 +44,40 @@ class CancellationHandler:
             return False
 
     async def wait_for_revocation(self) -> None:
-        while True:
+        if not self._redis:
+            return
+
+        try:
+            await self._wait_for_cancel_message(self._redis)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            logger.warning(
+                "Cancel subscription failed for chat %s, polling instead: %s",
+                self.chat_id,
+                exc,
+            )
+            while not await self.check_revoked():
+                await asyncio.sleep(settings.REVOCATION_POLL_INTERVAL_SECONDS)
+
+    async def _wait_for_cancel_message(self, redis: Redis[str]) -> None:
+        channel = REDIS_KEY_CHAT_CANCEL.format(chat_id=self.chat_id)
+        async with redis_pubsub(redis, channel) as pubsub:
+            # The revoked key is only consulted once subscribed (for cancels issued
+            # before the stream started) and on a slow interval for messages lost
+            # while the subscription was reconnecting
             if await self.check_revoked():
                 return
-            await asyncio.sleep(settings.REVOCATION_POLL_INTERVAL_SECONDS)
+
+            while True:
+                message = await pubsub.get_message(
+                    ignore_subscribe_messages=True,
+                    timeout=settings.REVOCATION_FALLBACK_CHECK_INTERVAL_SECONDS,
+                )
+                if message and message.get("type") == "message":
+                    return
+                if not message and await self.check_revoked():
+                    return
 
     async def cancel_stream(self, ai_service: ClaudeAgentService) -> None:
         if self.cancel_requested:
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+
+from app.services.streaming.events import StreamEvent
+
+COALESCED_FIELDS = {"assistant_text": "text", "assistant_thinking": "thinking"}
+
+
+class TextEventCoalescer:
+    # Merges adjacent assistant_text/assistant_thinking events before they are
+    # emitted. The buffer is flushed when the window since its first chunk
+    # elapses, when the size budget is hit, or ahead of any other event.
+    # The source stream is never awaited from here: the SDK client holds
+    # cancel scopes that must stay in the task that iterates it.
+    def __init__(
+        self,
+        emit: Callable[[StreamEvent], Awaitable[None]],
+        *,
+        window_seconds: float,
+        max_chars: int,
+    ) -> None:
+        self._emit = emit
+        self._window_seconds = window_seconds
+        self._max_chars = max_chars
+        self._lock = asyncio.Lock()
+        self._pending_type: str | None = None
+        self._pending_parts: list[str] = []
+        self._pending_chars = 0
+        self._timer: asyncio.Task[None] | None = None
+
+    async def push(self, event: StreamEvent) -> None:
+        event_type = event.get("type") or ""
+        field = COALESCED_FIELDS.get(event_type)
+        chunk = event.get(field) if field else None
+
+        async with self._lock:
+            if not field or not isinstance(chunk, str):
+                await self._flush_pending()
+                await self._emit(event)
+                return
+
+            if self._pending_type not in (None, event_type):
+                await self._flush_pending()
+
+            if self._pending_type is None:
+                self._pending_type = event_type
+                self._timer = asyncio.create_task(self._flush_after_window())
+
+            self._pending_parts.append(chunk)
+            self._pending_chars += len(chunk)
+            if self._pending_chars >= self._max_chars:
+                await self._flush_pending()
+
+    async def flush(self) -> None:
+        async with self._lock:
+            await self._flush_pending()
+
+    async def close(self) -> None:
+        await self.flush()
+        self._cancel_timer()
+
+    async def _flush_after_window(self) -> None:
+        await asyncio.sleep(self._window_seconds)
+        self._timer = None
+        await self.flush()
+
+    def _cancel_timer(self) -> None:
+        timer, self._timer = self._timer, None
+        if timer and timer is not asyncio.current_task() and not timer.done():
+            timer.cancel()
+
+    async def _flush_pending(self) -> None:
+        if self._pending_type is None:
+            return
+
+        merged_text = "".join(self._pending_parts)
+        merged: StreamEvent = (
+            {"type": "assistant_text", "text": merged_text}
+            if self._pending_type == "assistant_text"
+            else {"type": "assistant_thinking", "thinking": merged_text}
+        )
+        self._pending_type = None
+        self._pending_parts = []
+        self._pending_chars = 0
+        self._cancel_timer()
+
+        await self._emit(merged)
@@ -1,8 +1,8 @@
 from __future__ import annotations
 
-import asyncio
 import json
 import logging
+from collections.abc import Mapping
 from typing import TYPE_CHECKING, Any
 from uuid import UUID
 
@@ -10,9 +10,8 @@ from redis.asyncio import Redis
 from sqlalchemy import select
 
 from app.constants import (
+    REDIS_KEY_CHAT_CONTEXT_CALIBRATED,
     REDIS_KEY_CHAT_CONTEXT_USAGE,
-    REDIS_KEY_CHAT_REVOKED,
-    REDIS_KEY_CHAT_TASK,
 )
 from app.core.config import get_settings
 from app.db.session import get_celery_session
@@ -20,6 +19,7 @@ from app.models.db_models import Chat
 from app.services.streaming.events import StreamEvent
 from app.services.streaming.publisher import StreamPublisher
 from app.services.user import UserService
+from app.utils.redis import redis_manager
 
 if TYPE_CHECKING:
     from app.models.types import JSONDict
@@ -28,8 +28,81 @@ if TYPE_CHECKING:
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+# Every input token of a request is part of the context, whether it was
+# cached or not, and the reply stays in it for the next turn
+_CONTEXT_USAGE_FIELDS = (
+    "input_tokens",
+    "cache_creation_input_tokens",
+    "cache_read_input_tokens",
+    "output_tokens",
+)
+
+
+def context_tokens_from_usage(usage: Mapping[str, Any] | None) -> int | None:
+    if not usage:
+        return None
+    tokens = sum(
+        value
+        for key in _CONTEXT_USAGE_FIELDS
+        if isinstance(value := usage.get(key), int)
+    )
+    return tokens or None
+
+
+def context_tokens_from_event(event: StreamEvent) -> int | None:
+    if event.get("type") != "system":
+        return None
+    context_usage = event.get("data", {}).get("context_usage")
+    if not isinstance(context_usage, dict):
+        return None
+    tokens = context_usage.get("tokens_used")
+    return tokens if isinstance(tokens, int) else None
+
+
+def build_context_usage(tokens_used: int) -> JSONDict:
+    context_window = settings.CONTEXT_WINDOW_TOKENS
+    percentage = (
+        min((tokens_used / context_window) * 100, 100.0) if context_window > 0 else 0.0
+    )
+    return {
+        "tokens_used": tokens_used,
+        "context_window": context_window,
+        "percentage": percentage,
+    }
+
+
+def context_usage_event(chat_id: str, context_data: JSONDict) -> StreamEvent:
+    return {
+        "type": "system",
+        "data": {"context_usage": context_data, "chat_id": chat_id},
+    }
+
+
+async def cache_context_usage(
+    redis_client: Redis[str], chat_id: str, context_data: JSONDict
+) -> None:
+    await redis_client.setex(
+        REDIS_KEY_CHAT_CONTEXT_USAGE.format(chat_id=chat_id),
+        settings.CONTEXT_USAGE_CACHE_TTL_SECONDS,
+        json.dumps(context_data),
+    )
+
+
+async def save_context_usage(
+    session_factory: Any, chat_id: str, tokens_used: int
+) -> None:
+    async with session_factory() as db:
+        result = await db.execute(select(Chat).filter(Chat.id == UUID(chat_id)))
+        chat = result.scalar_one_or_none()
+        if chat:
+            chat.context_token_usage = tokens_used
+            db.add(chat)
+            await db.commit()
+
 
 class ContextUsageTracker:
+    # Streams derive context usage from the usage reported on each assistant
+    # turn; this runs /context in the sandbox as an occasional calibration
     def __init__(
         self,
         chat_id: str,
@@ -64,44 +137,15 @@ class ContextUsageTracker:
             if token_usage is None:
                 return None
 
-            context_window = settings.CONTEXT_WINDOW_TOKENS
-            percentage = (
-                min((token_usage / context_window) * 100, 100.0)
-                if context_window > 0
-                else 0.0
-            )
-
-            context_data: JSONDict = {
-                "tokens_used": token_usage,
-                "context_window": context_window,
-                "percentage": percentage,
-            }
-
-            async with session_factory() as db:
-                result = await db.execute(
-                    select(Chat).filter(Chat.id == UUID(self.chat_id))
-                )
-                chat_to_update = result.scalar_one_or_none()
-                if chat_to_update:
-                    chat_to_update.context_token_usage = token_usage
-                    db.add(chat_to_update)
-                    await db.commit()
-
-            cache_key = REDIS_KEY_CHAT_CONTEXT_USAGE.format(chat_id=self.chat_id)
-            await redis_client.setex(
-                cache_key,
-                settings.CONTEXT_USAGE_CACHE_TTL_SECONDS,
-                json.dumps(context_data),
-            )
-
-            system_event: StreamEvent = {
-                "type": "system",
-                "data": {"context_usage": context_data, "chat_id": self.chat_id},
-            }
+            context_data = build_context_usage(token_usage)
+            await save_context_usage(session_factory, self.chat_id, token_usage)
+            await cache_context_usage(redis_client, self.chat_id, context_data)
 
             publisher = StreamPublisher(self.chat_id)
             publisher._redis = redis_client
-            await publisher.publish_event(system_event)
+            await publisher.publish_event(
+                context_usage_event(self.chat_id, context_data)
+            )
 
             return context_data
 
@@ -112,23 +156,24 @@ class ContextUsageTracker:
 
         return None
 
-    async def _is_stream_active(self, redis_client: Redis[str]) -> bool:
+    async def _claim_calibration(self, redis_client: Redis[str]) -> bool:
         try:
-            task_key = REDIS_KEY_CHAT_TASK.format(chat_id=self.chat_id)
-            revoked_key = REDIS_KEY_CHAT_REVOKED.format(chat_id=self.chat_id)
-
-            task_exists = (await redis_client.get(task_key)) is not None
-            is_revoked = (await redis_client.get(revoked_key)) in ("1", b"1")
-
-            return task_exists and not is_revoked
+            claimed = await redis_client.set(
+                REDIS_KEY_CHAT_CONTEXT_CALIBRATED.format(chat_id=self.chat_id),
+                "1",
+                ex=settings.CONTEXT_USAGE_CALIBRATION_INTERVAL_SECONDS,
+                nx=True,
+            )
+            return bool(claimed)
         except Exception:
-            return False
+            return True
 
-    async def poll_while_streaming(self) -> None:
-        redis_client: Redis[str] | None = None
+    async def calibrate(self) -> None:
+        redis_client = redis_manager.get_client()
 
         try:
-            redis_client = Redis.from_url(settings.REDIS_URL, decode_responses=True)
+            if not await self._claim_calibration(redis_client):
+                return
 
             async with get_celery_session() as (session_factory, _):
                 async with session_factory() as db:
@@ -152,22 +197,11 @@ class ContextUsageTracker:
                 async with ClaudeAgentService(
                     session_factory=session_factory
                 ) as ai_service:
-                    while True:
-                        await self.fetch_and_broadcast(
-                            ai_service, redis_client, session_factory
-                        )
-
-                        if not await self._is_stream_active(redis_client):
-                            break
-
-                        await asyncio.sleep(
-                            settings.CONTEXT_USAGE_POLL_INTERVAL_SECONDS
-                        )
+                    await self.fetch_and_broadcast(
+                        ai_service, redis_client, session_factory
+                    )
 
         except Exception as e:
             logger.error(
-                "Context usage polling failed for chat %s: %s", self.chat_id, e
+                "Context usage calibration failed for chat %s: %s", self.chat_id, e
             )
-        finally:
-            if redis_client:
-                await redis_client.close()
@@ -18,6 +18,12 @@ StreamEventType = Literal[
 ]
 
 
+class ToolResultRef(TypedDict):
+    url: str
+    size: int
+    is_json: bool
+
+
 class ToolPayload(TypedDict, total=False):
     id: str
     name: str
@@ -26,6 +32,7 @@ class ToolPayload(TypedDict, total=False):
     parent_id: str | None
     input: JSONDict | None
     result: JSONValue
+    result_ref: ToolResultRef
     error: str
 
 
@@ -0,0 +1,250 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Any
+
+from app.constants import REDIS_KEY_CHAT_CANCEL, REDIS_KEY_CHAT_STREAM
+from app.core.config import get_settings
+from app.utils.redis import redis_manager, redis_pubsub
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+TERMINAL_EVENTS = frozenset({"complete", "error"})
+CANCELLED_EVENT: dict[str, Any] = {
+    "event": "complete",
+    "data": json.dumps({"status": "cancelled"}),
+}
+
+# Put on a subscriber queue after it overflowed; the subscriber re-reads the
+# gap from the stream instead of the reader blocking on one slow client
+_RESYNC: dict[str, Any] = {"event": "__resync__"}
+
+
+def _stream_id_key(entry_id: str) -> tuple[int, int]:
+    ms, _, seq = entry_id.partition("-")
+    return int(ms), int(seq or 0)
+
+
+def format_stream_entry(entry_id: str, fields: dict[str, str]) -> dict[str, Any]:
+    return {
+        "id": entry_id,
+        "event": fields.get("kind", "content"),
+        "data": fields.get("payload", "") or "",
+    }
+
+
+class StreamSubscription:
+    def __init__(self, reader: ChatStreamReader) -> None:
+        self._reader = reader
+        self.queue: asyncio.Queue[dict[str, Any]] = asyncio.Queue(
+            maxsize=settings.SSE_SUBSCRIBER_QUEUE_SIZE
+        )
+
+    def offer(self, item: dict[str, Any]) -> None:
+        try:
+            self.queue.put_nowait(item)
+        except asyncio.QueueFull:
+            # Dropped stream entries are re-read on resync, but a cancellation
+            # never reaches the stream, so the first terminal event is kept
+            terminal = item if item.get("event") in TERMINAL_EVENTS else None
+            while not self.queue.empty():
+                queued = self.queue.get_nowait()
+                if queued.get("event") in TERMINAL_EVENTS:
+                    terminal = queued
+                    break
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(_RESYNC)
+            if terminal is not None:
+                self.queue.put_nowait(terminal)
+
+    async def events(self, last_id: str | None) -> AsyncIterator[dict[str, Any]]:
+        # Entries at or before last_id were already delivered by the backlog
+        # replay, which can overlap with what the shared reader broadcasts
+        last_key = _stream_id_key(last_id) if last_id else (0, 0)
+
+        while True:
+            item = await self.queue.get()
+
+            if item is _RESYNC:
+                logger.info(
+                    "SSE subscriber for chat %s fell behind, resyncing",
+                    self._reader.chat_id,
+                )
+                min_id = f"({last_id}" if last_id else "-"
+                for entry in await self._reader.read_range(min_id):
+                    last_id = entry["id"]
+                    last_key = _stream_id_key(last_id)
+                    yield entry
+                    if entry["event"] in TERMINAL_EVENTS:
+                        return
+                continue
+
+            entry_id = item.get("id")
+            if entry_id:
+                entry_key = _stream_id_key(entry_id)
+                if entry_key <= last_key:
+                    continue
+                last_id = entry_id
+                last_key = entry_key
+
+            yield item
+            if item["event"] in TERMINAL_EVENTS:
+                return
+
+
+class ChatStreamReader:
+    # Per-chat position and subscribers; the hub does the actual reading
+    def __init__(self, chat_id: str, last_id: str) -> None:
+        self.chat_id = chat_id
+        self.stream_name = REDIS_KEY_CHAT_STREAM.format(chat_id=chat_id)
+        self.last_id = last_id
+        self.subscribers: set[StreamSubscription] = set()
+
+    async def read_range(self, min_id: str) -> list[dict[str, Any]]:
+        redis = redis_manager.get_client()
+        try:
+            entries = await redis.xrange(self.stream_name, min=min_id, max="+")
+        except Exception as e:
+            logger.warning("Failed to read stream %s: %s", self.stream_name, e)
+            return []
+        return [format_stream_entry(entry_id, fields) for entry_id, fields in entries]
+
+    def broadcast(self, item: dict[str, Any]) -> None:
+        for subscription in list(self.subscribers):
+            subscription.offer(item)
+
+
+class StreamHub:
+    # Every chat with SSE clients in this process shares one XREAD over all of
+    # their streams and one pattern subscription for cancellations, so the
+    # hub holds two pooled connections however many chats are open
+    def __init__(self) -> None:
+        self._readers: dict[str, ChatStreamReader] = {}
+        self._lock = asyncio.Lock()
+        self._tasks: list[asyncio.Task[None]] = []
+        self._readers_changed = asyncio.Event()
+
+    @property
+    def reader_count(self) -> int:
+        return len(self._readers)
+
+    @asynccontextmanager
+    async def subscribe(self, chat_id: str) -> AsyncIterator[StreamSubscription]:
+        async with self._lock:
+            reader = self._readers.get(chat_id)
+            if reader is None:
+                reader = ChatStreamReader(chat_id, await self._latest_id(chat_id))
+                self._readers[chat_id] = reader
+                self._readers_changed.set()
+                if not self._tasks:
+                    self._readers_changed = asyncio.Event()
+                    self._tasks = [
+                        asyncio.create_task(self._tail_streams()),
+                        asyncio.create_task(self._watch_cancel()),
+                    ]
+            subscription = StreamSubscription(reader)
+            reader.subscribers.add(subscription)
+
+        try:
+            yield subscription
+        finally:
+            tasks: list[asyncio.Task[None]] = []
+            async with self._lock:
+                reader.subscribers.discard(subscription)
+                if not reader.subscribers and self._readers.get(chat_id) is reader:
+                    del self._readers[chat_id]
+                    self._readers_changed.set()
+                if not self._readers:
+                    tasks, self._tasks = self._tasks, []
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _latest_id(self, chat_id: str) -> str:
+        # Start from the newest entry so anything appended after a subscriber
+        # registers is broadcast; older entries come from its backlog replay
+        stream_name = REDIS_KEY_CHAT_STREAM.format(chat_id=chat_id)
+        try:
+            latest = await redis_manager.get_client().xrevrange(stream_name, count=1)
+        except Exception as e:
+            logger.warning("Failed to read stream tail for %s: %s", stream_name, e)
+            return "0-0"
+        return latest[0][0] if latest else "0-0"
+
+    async def _tail_streams(self) -> None:
+        redis = redis_manager.get_client()
+        while True:
+            readers = {reader.stream_name: reader for reader in self._readers.values()}
+            self._readers_changed.clear()
+            if not readers:
+                await self._readers_changed.wait()
+                continue
+
+            # A chat that registers mid-read wakes the loop so its stream is
+            # added now rather than after the current block times out
+            read = asyncio.ensure_future(
+                redis.xread(
+                    {name: reader.last_id for name, reader in readers.items()},
+                    block=settings.SSE_READER_BLOCK_MS,
+                    count=100,
+                )
+            )
+            changed = asyncio.ensure_future(self._readers_changed.wait())
+            try:
+                await asyncio.wait({read, changed}, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                changed.cancel()
+                if not read.done():
+                    read.cancel()
+                    await asyncio.gather(read, return_exceptions=True)
+
+            if read.cancelled():
+                continue
+            try:
+                response = read.result()
+            except Exception as e:
+                logger.debug("Redis xread error, retrying: %s", e)
+                await asyncio.sleep(0.5)
+                continue
+
+            for stream_name, messages in response or []:
+                reader = readers[stream_name]
+                for entry_id, fields in messages:
+                    reader.last_id = entry_id
+                    reader.broadcast(format_stream_entry(entry_id, fields))
+
+    async def _watch_cancel(self) -> None:
+        prefix, _, suffix = REDIS_KEY_CHAT_CANCEL.partition("{chat_id}")
+        redis = redis_manager.get_client()
+        while True:
+            try:
+                async with redis_pubsub(
+                    redis, REDIS_KEY_CHAT_CANCEL.format(chat_id="*"), pattern=True
+                ) as pubsub:
+                    while True:
+                        message = await pubsub.get_message(
+                            ignore_subscribe_messages=True, timeout=1.0
+                        )
+                        if not message or message.get("type") != "pmessage":
+                            continue
+                        chat_id = message["channel"][len(prefix) : -len(suffix)]
+                        reader = self._readers.get(chat_id)
+                        if reader:
+                            logger.info(
+                                "Stream cancellation received for chat %s", chat_id
+                            )
+                            reader.broadcast(CANCELLED_EVENT)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Error monitoring stream cancellations, retrying: %s", e)
+                await asyncio.sleep(1.0)
+
+
+stream_hub = StreamHub()
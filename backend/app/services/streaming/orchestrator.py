@@ -4,7 +4,6 @@ import asyncio
 import json
 import logging
 from contextlib import asynccontextmanager, suppress
-from copy import deepcopy
 from dataclasses import dataclass, field
 from typing import TYPE_CHECKING, Any, AsyncIterator, Callable
 from uuid import UUID
@@ -19,12 +18,22 @@ from app.prompts.system_prompt import build_system_prompt_for_chat
 from app.services.exceptions import ClaudeAgentException
 from app.services.message import MessageService
 from app.services.queue import QueueService, serialize_message_attachments
-from app.services.sandbox import DockerConfig, LocalDockerProvider, SandboxService
+from app.services.sandbox import DockerConfig, SandboxService, get_shared_provider
 from app.services.streaming.cancellation import CancellationHandler, StreamCancelled
+from app.services.streaming.coalescer import TextEventCoalescer
+from app.services.streaming.context_usage import (
+    build_context_usage,
+    cache_context_usage,
+    context_tokens_from_event,
+    context_usage_event,
+    save_context_usage,
+)
 from app.services.streaming.events import StreamEvent
+from app.services.streaming.progress import ProgressReporter
 from app.services.streaming.publisher import StreamPublisher
 from app.services.streaming.queue_injector import QueueInjector
 from app.services.streaming.session import SessionUpdateCallback, hydrate_chat
+from app.services.streaming.tool_results import ToolResultStore
 from app.services.user import UserService
 from app.utils.redis import redis_connection
 
@@ -36,6 +45,7 @@ if TYPE_CHECKING:
 SessionFactoryType = Callable[[], Any]
 
 logger = logging.getLogger(__name__)
+settings = get_settings()
 
 
 @dataclass
@@ -49,6 +59,8 @@ class StreamContext:
     chat: Chat
     session_factory: Any
     events: list[StreamEvent] = field(default_factory=list)
+    persisted_event_count: int = 0
+    context_tokens: int | None = None
 
 
 @dataclass
@@ -66,6 +78,7 @@ class StreamOrchestrator:
     ) -> None:
         self.publisher = publisher
         self.cancellation = cancellation
+        self.tool_results = ToolResultStore()
 
     async def process_stream(self, ctx: StreamContext) -> StreamOutcome:
         try:
@@ -103,11 +116,9 @@ class StreamOrchestrator:
 
             if ctx.assistant_message_id and ctx.events:
                 await self._save_message_content(
-                    ctx.assistant_message_id,
-                    ctx.events,
+                    ctx,
                     ctx.ai_service.get_total_cost_usd(),
                     MessageStreamStatus.FAILED,
-                    ctx.session_factory,
                 )
 
             raise
@@ -120,6 +131,18 @@ class StreamOrchestrator:
         )
 
         queue_injector: QueueInjector | None = None
+        progress = ProgressReporter(
+            ctx.task,
+            min_interval_seconds=settings.STREAM_PROGRESS_MIN_INTERVAL_SECONDS,
+            min_events=settings.STREAM_PROGRESS_MIN_EVENTS,
+        )
+        coalescer: TextEventCoalescer | None = None
+        if settings.STREAM_TEXT_COALESCE_WINDOW_SECONDS > 0:
+            coalescer = TextEventCoalescer(
+                lambda event: self._emit_event(ctx, event),
+                window_seconds=settings.STREAM_TEXT_COALESCE_WINDOW_SECONDS,
+                max_chars=settings.STREAM_TEXT_COALESCE_MAX_CHARS,
+            )
 
         try:
             while True:
@@ -133,8 +156,15 @@ class StreamOrchestrator:
                         break
                     raise
 
-                ctx.events.append(deepcopy(event))
-                await self.publisher.publish_event(event)
+                context_tokens = context_tokens_from_event(event)
+                if context_tokens is not None:
+                    await self._publish_context_usage(ctx, context_tokens)
+                    continue
+
+                if coalescer:
+                    await coalescer.push(event)
+                else:
+                    await self._emit_event(ctx, event)
 
                 if QueueInjector.should_try_injection(event):
                     if queue_injector is None:
@@ -146,28 +176,61 @@ class StreamOrchestrator:
                             if new_assistant_id:
                                 if ctx.assistant_message_id and ctx.events:
                                     await self._save_message_content(
-                                        ctx.assistant_message_id,
-                                        ctx.events,
+                                        ctx,
                                         ctx.ai_service.get_total_cost_usd(),
                                         MessageStreamStatus.COMPLETED,
-                                        ctx.session_factory,
                                     )
                                 await self.publisher.clear_stream()
                                 ctx.assistant_message_id = new_assistant_id
                                 ctx.events.clear()
+                                ctx.persisted_event_count = 0
                         except Exception as e:
                             logger.warning("Queue injection failed: %s", e)
 
-                ctx.task.update_state(
-                    state="PROGRESS",
-                    meta={"status": "Processing", "events_emitted": len(ctx.events)},
-                )
+                progress.record(len(ctx.events))
+
+            if coalescer:
+                await coalescer.flush()
+            progress.flush()
         finally:
+            if coalescer:
+                with suppress(Exception):
+                    await coalescer.close()
             if revocation_task:
                 revocation_task.cancel()
                 with suppress(asyncio.CancelledError):
                     await revocation_task
 
+    async def _emit_event(self, ctx: StreamContext, event: StreamEvent) -> None:
+        # StreamProcessor never mutates an event after yielding it, so the
+        # same object is safe to keep, persist and publish. offload() returns
+        # a rewritten copy rather than changing the yielded event
+        event = await self.tool_results.offload(ctx.chat_id, event)
+        ctx.events.append(event)
+        await self.publisher.publish_event(event)
+
+        if (
+            len(ctx.events) - ctx.persisted_event_count
+            >= settings.MESSAGE_EVENTS_FLUSH_BATCH_SIZE
+        ):
+            await self._save_message_content(ctx)
+
+    async def _publish_context_usage(self, ctx: StreamContext, tokens: int) -> None:
+        # Published inline but never persisted with the message; the chat row
+        # is updated once when the stream is finalized
+        ctx.context_tokens = tokens
+        context_data = build_context_usage(tokens)
+        if self.publisher.redis:
+            try:
+                await cache_context_usage(
+                    self.publisher.redis, ctx.chat_id, context_data
+                )
+            except Exception as exc:
+                logger.warning("Failed to cache context usage: %s", exc)
+        await self.publisher.publish_event(
+            context_usage_event(ctx.chat_id, context_data)
+        )
+
     def _create_queue_injector(self, ctx: StreamContext) -> QueueInjector | None:
         transport = ctx.ai_service.get_active_transport()
         if not transport:
@@ -188,13 +251,15 @@ class StreamOrchestrator:
         final_content = json.dumps(ctx.events, ensure_ascii=False)
 
         if ctx.assistant_message_id and ctx.events:
-            await self._save_message_content(
-                ctx.assistant_message_id,
-                ctx.events,
-                total_cost,
-                status,
-                ctx.session_factory,
-            )
+            await self._save_message_content(ctx, total_cost, status)
+
+        if ctx.context_tokens is not None:
+            try:
+                await save_context_usage(
+                    ctx.session_factory, ctx.chat_id, ctx.context_tokens
+                )
+            except Exception as exc:
+                logger.error("Failed to save context usage: %s", exc)
 
         if status == MessageStreamStatus.COMPLETED:
             await self._create_checkpoint_if_needed(
@@ -240,28 +305,26 @@ class StreamOrchestrator:
 
     async def _save_message_content(
         self,
-        assistant_message_id: str,
-        events: list[StreamEvent],
-        total_cost_usd: float,
-        stream_status: MessageStreamStatus,
-        session_factory: Any,
+        ctx: StreamContext,
+        total_cost_usd: float | None = None,
+        stream_status: MessageStreamStatus | None = None,
     ) -> None:
-        if not assistant_message_id or not events:
+        if not ctx.assistant_message_id or not ctx.events:
             return
 
+        # Only events emitted since the last save are written, so each flush
+        # costs O(new events) instead of re-serializing the whole message
+        pending = ctx.events[ctx.persisted_event_count :]
         try:
-            async with session_factory() as db:
-                message_uuid = UUID(assistant_message_id)
-                query = select(Message).filter(Message.id == message_uuid)
-                result = await db.execute(query)
-                message = result.scalar_one_or_none()
-
-                if message:
-                    message.content = json.dumps(events, ensure_ascii=False)
-                    message.total_cost_usd = total_cost_usd
-                    message.stream_status = stream_status
-                    db.add(message)
-                    await db.commit()
+            message_service = MessageService(session_factory=ctx.session_factory)
+            await message_service.append_message_events(
+                UUID(ctx.assistant_message_id),
+                pending,
+                start_seq=ctx.persisted_event_count,
+                total_cost_usd=total_cost_usd,
+                stream_status=stream_status,
+            )
+            ctx.persisted_event_count += len(pending)
         except Exception as exc:
             logger.error("Failed to save message content: %s", exc)
 
@@ -446,7 +509,11 @@ async def run_chat_stream(
     session_container: dict[str, Any] = {"session_id": session_id}
     events: list[StreamEvent] = []
 
-    publisher = StreamPublisher(chat_id)
+    publisher = StreamPublisher(
+        chat_id,
+        batch_size=settings.STREAM_PUBLISH_BATCH_SIZE,
+        batch_delay_seconds=settings.STREAM_PUBLISH_BATCH_DELAY_SECONDS,
+    )
     result: str = ""
 
     try:
@@ -469,7 +536,6 @@ async def run_chat_stream(
                     sandbox_id=str(chat.sandbox_id) if chat.sandbox_id else "",
                     user_id=str(chat.user_id),
                     model_id=model_id,
-                    context_usage_trigger=context_usage_trigger,
                 )
 
                 user = User(id=chat.user_id)
@@ -489,16 +555,6 @@ async def run_chat_stream(
                     is_custom_prompt=is_custom_prompt,
                 )
 
-                sandbox_id_str = str(chat.sandbox_id) if chat.sandbox_id else ""
-                if session_id and sandbox_id_str and context_usage_trigger:
-                    context_usage_trigger(
-                        chat_id=chat_id,
-                        session_id=session_id,
-                        sandbox_id=sandbox_id_str,
-                        user_id=str(chat.user_id),
-                        model_id=model_id,
-                    )
-
                 ctx = StreamContext(
                     chat_id=chat_id,
                     stream=stream,
@@ -526,6 +582,16 @@ async def run_chat_stream(
                 )
 
                 result = outcome.final_content
+
+                final_session_id = session_container["session_id"]
+                if final_session_id and chat.sandbox_id and context_usage_trigger:
+                    context_usage_trigger(
+                        chat_id=chat_id,
+                        session_id=final_session_id,
+                        sandbox_id=str(chat.sandbox_id),
+                        user_id=str(chat.user_id),
+                        model_id=model_id,
+                    )
     finally:
         await publisher.cleanup()
 
@@ -549,7 +615,6 @@ async def initialize_and_run_chat(
     is_queue_continuation: bool = False,
 ) -> str:
     async with get_celery_session() as (SessionFactory, _):
-        settings = get_settings()
         docker_config = DockerConfig(
             image=settings.DOCKER_IMAGE,
             network=settings.DOCKER_NETWORK,
@@ -558,7 +623,7 @@ async def initialize_and_run_chat(
             sandbox_domain=settings.DOCKER_SANDBOX_DOMAIN,
             traefik_network=settings.DOCKER_TRAEFIK_NETWORK,
         )
-        provider = LocalDockerProvider(config=docker_config)
+        provider = get_shared_provider(docker_config)
         sandbox_service = SandboxService(
             provider=provider, session_factory=SessionFactory
         )
@@ -13,6 +13,7 @@ from claude_agent_sdk import (
     SystemMessage,
 )
 from app.services.tool_handler import ToolHandlerRegistry
+from app.services.streaming.context_usage import context_tokens_from_usage
 from app.services.streaming.events import StreamEvent, StreamEventType
 
 
@@ -30,6 +31,7 @@ class StreamProcessor:
         self._tool_registry = tool_registry
         self._session_handler = session_handler
         self.total_cost_usd = 0.0
+        self.context_tokens: int | None = None
 
     def _process_session_init(self, message: SystemMessage) -> None:
         if message.subtype != "init" or not self._session_handler:
@@ -39,6 +41,8 @@ class StreamProcessor:
         if session_id:
             self._session_handler(session_id)
 
+    # Every yielded event is a fresh object that the processor never touches
+    # again, so consumers can keep references without copying
     def emit_events_for_message(self, message: MessageType) -> Iterable[StreamEvent]:
         if isinstance(message, SystemMessage):
             self._process_session_init(message)
@@ -46,6 +50,7 @@ class StreamProcessor:
 
         if isinstance(message, AssistantMessage):
             yield from self._emit_assistant_events(message)
+            yield from self._emit_context_usage(message)
             return
 
         if isinstance(message, UserMessage):
@@ -63,6 +68,24 @@ class StreamProcessor:
         for block in message.content:
             yield from self._emit_block_events(block, parent_tool_use_id)
 
+    def _emit_context_usage(self, message: AssistantMessage) -> Iterable[StreamEvent]:
+        # Each main-thread turn reports the tokens it sent and produced, which
+        # is the current context size. ResultMessage usage is summed over all
+        # turns, and subagent turns run in their own context window.
+        if getattr(message, "parent_tool_use_id", None):
+            return
+
+        tokens = context_tokens_from_usage(getattr(message, "usage", None))
+        if tokens is None or tokens == self.context_tokens:
+            return
+
+        self.context_tokens = tokens
+        event: StreamEvent = {
+            "type": "system",
+            "data": {"context_usage": {"tokens_used": tokens}},
+        }
+        yield event
+
     def _emit_block_events(
         self, block: Any, parent_tool_use_id: str | None = None
     ) -> Iterable[StreamEvent]:
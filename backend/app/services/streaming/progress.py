@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import time
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from celery import Task
+
+
+class ProgressReporter:
+    def __init__(
+        self,
+        task: Task[Any, Any],
+        *,
+        min_interval_seconds: float,
+        min_events: int,
+    ) -> None:
+        self._task = task
+        self._min_interval_seconds = min_interval_seconds
+        self._min_events = max(1, min_events)
+        self._last_reported_at: float | None = None
+        self._unreported = 0
+        self._events_emitted = 0
+        self.updates_sent = 0
+
+    def record(self, events_emitted: int) -> None:
+        self._events_emitted = events_emitted
+        self._unreported += 1
+
+        now = time.monotonic()
+        # Each update_state is a synchronous round-trip to the result backend,
+        # so writes are coalesced by event count and elapsed time
+        if (
+            self._last_reported_at is None
+            or self._unreported >= self._min_events
+            or now - self._last_reported_at >= self._min_interval_seconds
+        ):
+            self._report(now)
+
+    def flush(self) -> None:
+        if self._unreported:
+            self._report(time.monotonic())
+
+    def _report(self, now: float) -> None:
+        self._task.update_state(
+            state="PROGRESS",
+            meta={"status": "Processing", "events_emitted": self._events_emitted},
+        )
+        self._last_reported_at = now
+        self._unreported = 0
+        self.updates_sent += 1
@@ -1,7 +1,9 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
+from contextlib import suppress
 from typing import TYPE_CHECKING, Any
 
 from redis.asyncio import Redis
@@ -13,6 +15,7 @@ from app.constants import (
 )
 from app.core.config import get_settings
 from app.services.streaming.events import StreamEvent
+from app.utils.redis import redis_manager
 
 if TYPE_CHECKING:
     from celery import Task
@@ -23,20 +26,37 @@ settings = get_settings()
 STREAM_MAX_LEN = 10_000
 
 
+StreamFields = dict[str, str | int | float]
+
+
 class StreamPublisher:
-    def __init__(self, chat_id: str) -> None:
+    def __init__(
+        self,
+        chat_id: str,
+        batch_size: int = 1,
+        batch_delay_seconds: float = 0.0,
+    ) -> None:
         self.chat_id = chat_id
         self._redis: Redis[str] | None = None
+        # batch_size > 1 buffers content events and writes them with one
+        # pipelined round trip; every other kind flushes the buffer first
+        self._batch_size = batch_size
+        self._batch_delay_seconds = batch_delay_seconds
+        self._pending: list[StreamFields] = []
+        self._flush_lock = asyncio.Lock()
+        self._flush_timer: asyncio.Task[None] | None = None
+
+    @property
+    def _stream_key(self) -> str:
+        return REDIS_KEY_CHAT_STREAM.format(chat_id=self.chat_id)
 
     async def connect(
         self, task: Task[Any, Any], skip_stream_delete: bool = False
     ) -> None:
         try:
-            self._redis = Redis.from_url(settings.REDIS_URL, decode_responses=True)
+            self._redis = redis_manager.get_client()
             if not skip_stream_delete:
-                await self._redis.delete(
-                    REDIS_KEY_CHAT_STREAM.format(chat_id=self.chat_id)
-                )
+                await self._redis.delete(self._stream_key)
             await self._redis.setex(
                 REDIS_KEY_CHAT_TASK.format(chat_id=self.chat_id),
                 settings.TASK_TTL_SECONDS,
@@ -50,34 +70,85 @@ class StreamPublisher:
     def redis(self) -> Redis[str] | None:
         return self._redis
 
+    @staticmethod
+    def _build_fields(
+        kind: str, payload: dict[str, Any] | str | None = None
+    ) -> StreamFields:
+        fields: StreamFields = {"kind": kind}
+        if payload is not None:
+            if isinstance(payload, str):
+                fields["payload"] = payload
+            else:
+                fields["payload"] = json.dumps(payload, ensure_ascii=False)
+        return fields
+
     async def publish(
         self, kind: str, payload: dict[str, Any] | str | None = None
     ) -> None:
         if not self._redis:
             return
 
-        fields: dict[str, str | int | float] = {"kind": kind}
-        if payload is not None:
-            if isinstance(payload, str):
-                fields["payload"] = payload
-            else:
-                fields["payload"] = json.dumps(payload, ensure_ascii=False)
+        fields = self._build_fields(kind, payload)
+
+        async with self._flush_lock:
+            await self._write_pending()
+            try:
+                await self._redis.xadd(
+                    self._stream_key,
+                    fields,
+                    maxlen=STREAM_MAX_LEN,
+                    approximate=True,
+                )
+            except Exception as exc:
+                logger.warning(
+                    "Failed to append stream entry for chat %s: %s", self.chat_id, exc
+                )
+
+    async def publish_event(self, event: StreamEvent) -> None:
+        if self._batch_size <= 1:
+            await self.publish("content", {"event": event})
+            return
+
+        if not self._redis:
+            return
+
+        self._pending.append(self._build_fields("content", {"event": event}))
+        if len(self._pending) >= self._batch_size:
+            await self.flush()
+        elif self._flush_timer is None or self._flush_timer.done():
+            self._flush_timer = asyncio.create_task(self._flush_after_delay())
+
+    async def flush(self) -> None:
+        async with self._flush_lock:
+            await self._write_pending()
+
+    async def _flush_after_delay(self) -> None:
+        await asyncio.sleep(self._batch_delay_seconds)
+        await self.flush()
 
+    async def _write_pending(self) -> None:
+        if not self._pending or not self._redis:
+            return
+
+        entries, self._pending = self._pending, []
         try:
-            await self._redis.xadd(
-                REDIS_KEY_CHAT_STREAM.format(chat_id=self.chat_id),
-                fields,
-                maxlen=STREAM_MAX_LEN,
-                approximate=True,
-            )
+            pipe = self._redis.pipeline(transaction=False)
+            for fields in entries:
+                pipe.xadd(
+                    self._stream_key,
+                    fields,
+                    maxlen=STREAM_MAX_LEN,
+                    approximate=True,
+                )
+            await pipe.execute()
         except Exception as exc:
             logger.warning(
-                "Failed to append stream entry for chat %s: %s", self.chat_id, exc
+                "Failed to append %d stream entries for chat %s: %s",
+                len(entries),
+                self.chat_id,
+                exc,
             )
 
-    async def publish_event(self, event: StreamEvent) -> None:
-        await self.publish("content", {"event": event})
-
     async def publish_complete(self) -> None:
         await self.publish("complete")
 
@@ -111,7 +182,9 @@ class StreamPublisher:
         if not self._redis:
             return
         try:
-            await self._redis.delete(REDIS_KEY_CHAT_STREAM.format(chat_id=self.chat_id))
+            async with self._flush_lock:
+                await self._write_pending()
+                await self._redis.delete(self._stream_key)
         except Exception as exc:
             logger.warning("Failed to clear stream for chat %s: %s", self.chat_id, exc)
 
@@ -119,6 +192,12 @@ class StreamPublisher:
         if not self._redis:
             return
 
+        await self.flush()
+        if self._flush_timer and not self._flush_timer.done():
+            self._flush_timer.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._flush_timer
+
         try:
             await self._redis.delete(REDIS_KEY_CHAT_TASK.format(chat_id=self.chat_id))
             await self._redis.delete(
@@ -127,9 +206,4 @@ class StreamPublisher:
         except Exception as exc:
             logger.error("Failed to cleanup Redis keys: %s", exc)
 
-        try:
-            await self._redis.close()
-        except Exception as exc:
-            logger.debug("Error closing Redis client: %s", exc)
-
         self._redis = None
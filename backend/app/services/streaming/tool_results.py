@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import re
+import shutil
+from collections.abc import Iterable
+from pathlib import Path
+
+from app.core.config import get_settings
+from app.services.exceptions import ErrorCode, StorageException
+from app.services.streaming.events import StreamEvent, ToolPayload
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+_TOOL_USE_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,128}$")
+
+
+class ToolResultStore:
+    # Full tool results above TOOL_RESULT_OFFLOAD_THRESHOLD_BYTES are written
+    # once to local disk; stream events and Message.content keep a preview
+    def __init__(self, base_path: Path | None = None) -> None:
+        self.base_path = base_path or Path(settings.STORAGE_PATH) / "tool_results"
+
+    def get_path(self, chat_id: str, tool_use_id: str) -> Path:
+        if not _TOOL_USE_ID_PATTERN.match(tool_use_id):
+            raise StorageException(
+                "Invalid tool result id",
+                error_code=ErrorCode.VALIDATION_ERROR,
+                details={"tool_use_id": tool_use_id},
+                status_code=400,
+            )
+        return self.base_path / str(chat_id) / f"{tool_use_id}.json"
+
+    async def offload(self, chat_id: str, event: StreamEvent) -> StreamEvent:
+        threshold = settings.TOOL_RESULT_OFFLOAD_THRESHOLD_BYTES
+        tool = event.get("tool")
+        if threshold <= 0 or event.get("type") != "tool_completed" or not tool:
+            return event
+        if "result" not in tool or not tool.get("id"):
+            return event
+
+        result = tool["result"]
+        text = result if isinstance(result, str) else None
+        if text is None:
+            try:
+                text = json.dumps(result, ensure_ascii=False)
+            except (TypeError, ValueError):
+                return event
+
+        data = text.encode("utf-8")
+        if len(data) <= threshold:
+            return event
+
+        try:
+            path = self.get_path(chat_id, tool["id"])
+            await asyncio.to_thread(self._write, path, data)
+        except Exception as e:
+            logger.warning(
+                "Failed to offload tool result %s for chat %s: %s",
+                tool["id"],
+                chat_id,
+                e,
+            )
+            return event
+
+        url = f"{settings.BASE_URL}{settings.API_V1_STR}/chat/chats/{chat_id}/tool-results/{tool['id']}"
+        payload: ToolPayload = {**tool}
+        payload["result"] = text[: settings.TOOL_RESULT_PREVIEW_CHARS]
+        payload["result_ref"] = {
+            "url": url,
+            "size": len(data),
+            "is_json": not isinstance(result, str),
+        }
+        return {**event, "tool": payload}
+
+    def copy_chat_results(
+        self, source_chat_id: str, target_chat_id: str, contents: Iterable[str]
+    ) -> None:
+        # A fork gets its own links to the results its copied messages point
+        # at, so they resolve under the fork and survive deleting the source.
+        # Result files are never modified in place, so sharing them is safe.
+        for tool_use_id in sorted(self._referenced_results(contents)):
+            try:
+                source = self.get_path(source_chat_id, tool_use_id)
+                target = self.get_path(target_chat_id, tool_use_id)
+                target.parent.mkdir(parents=True, exist_ok=True)
+                try:
+                    os.link(source, target)
+                except FileNotFoundError:
+                    continue
+                except OSError:
+                    shutil.copyfile(source, target)
+            except Exception as e:
+                logger.warning(
+                    "Failed to copy tool result %s from chat %s to chat %s: %s",
+                    tool_use_id,
+                    source_chat_id,
+                    target_chat_id,
+                    e,
+                )
+
+    @staticmethod
+    def _referenced_results(contents: Iterable[str]) -> set[str]:
+        tool_use_ids: set[str] = set()
+        for content in contents:
+            try:
+                events = json.loads(content) if content else []
+            except json.JSONDecodeError:
+                continue
+            if not isinstance(events, list):
+                continue
+            for event in events:
+                tool = event.get("tool") if isinstance(event, dict) else None
+                if isinstance(tool, dict) and tool.get("result_ref"):
+                    tool_use_id = tool.get("id")
+                    if isinstance(tool_use_id, str):
+                        tool_use_ids.add(tool_use_id)
+        return tool_use_ids
+
+    def delete_chat_results(self, chat_id: str) -> None:
+        shutil.rmtree(self.base_path / str(chat_id), ignore_errors=True)
+
+    @staticmethod
+    def _write(path: Path, data: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
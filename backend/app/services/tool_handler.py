@@ -10,6 +10,14 @@ from app.services.streaming.events import ActiveToolState, StreamEvent
 
 logger = logging.getLogger(__name__)
 
+NORMALIZE_MAX_DEPTH = 32
+NORMALIZE_MAX_NODES = 20_000
+NORMALIZE_MAX_PARSE_CHARS = 1_000_000
+
+_JSON_CLOSERS = {"{": "}", "[": "]", '"': '"'}
+_JSON_LITERALS = frozenset({"true", "false", "null", "NaN", "Infinity", "-Infinity"})
+_JSON_NUMBER_START = frozenset("-0123456789")
+
 
 def _default_tool_title(tool_name: str) -> str:
     if tool_name.startswith("mcp__"):
@@ -19,9 +27,81 @@ def _default_tool_title(tool_name: str) -> str:
     return tool_name
 
 
+def _may_be_json(text: str) -> bool:
+    # Rejects most plain-text output without running the parser; text is
+    # already stripped and non-empty
+    closer = _JSON_CLOSERS.get(text[0])
+    if closer:
+        return text[-1] == closer
+    if len(text) <= 9 and text in _JSON_LITERALS:
+        return True
+    return text[0] in _JSON_NUMBER_START and text[-1].isdigit()
+
+
+class ToolResultNormalizer:
+    # Parses JSON-encoded strings inside tool results so they display as
+    # objects. Depth, node and parse-size budgets bound the work per result;
+    # anything beyond a budget is returned as-is.
+    def __init__(
+        self,
+        *,
+        max_depth: int = NORMALIZE_MAX_DEPTH,
+        max_nodes: int = NORMALIZE_MAX_NODES,
+        max_parse_chars: int = NORMALIZE_MAX_PARSE_CHARS,
+    ) -> None:
+        self.max_depth = max_depth
+        self.max_nodes = max_nodes
+        self.max_parse_chars = max_parse_chars
+        self._nodes_left = 0
+        self._parse_chars_left = 0
+
+    def normalize(self, result: JSONValue) -> JSONValue:
+        self._nodes_left = self.max_nodes
+        self._parse_chars_left = self.max_parse_chars
+        return self._normalize(result, 0)
+
+    def _normalize(self, value: JSONValue, depth: int) -> JSONValue:
+        if value is None or depth > self.max_depth or self._nodes_left <= 0:
+            return value
+        self._nodes_left -= 1
+
+        if isinstance(value, str):
+            return self._normalize_text(value)
+
+        if isinstance(value, list):
+            items: list[JSONValue] = []
+            for index, item in enumerate(value):
+                if self._nodes_left <= 0:
+                    items.extend(value[index:])
+                    break
+                items.append(self._normalize(item, depth + 1))
+            return items
+
+        if isinstance(value, dict):
+            return {
+                key: self._normalize(item, depth + 1) for key, item in value.items()
+            }
+
+        return value
+
+    def _normalize_text(self, value: str) -> JSONValue:
+        text = value.strip()
+        if not text:
+            return ""
+        if len(text) > self._parse_chars_left or not _may_be_json(text):
+            return text
+
+        self._parse_chars_left -= len(text)
+        try:
+            return cast(JSONValue, json.loads(text))
+        except (json.JSONDecodeError, RecursionError):
+            return text
+
+
 class ToolHandlerRegistry:
     def __init__(self) -> None:
         self._active: dict[str, ActiveToolState] = {}
+        self._normalizer = ToolResultNormalizer()
 
     def start_tool(
         self,
@@ -83,8 +163,7 @@ class ToolHandlerRegistry:
         if is_error:
             payload["error"] = self._stringify_result(raw_result)
         else:
-            normalized = self._normalize_result(raw_result)
-            payload["result"] = normalized
+            payload["result"] = self._normalizer.normalize(raw_result)
 
         event_type: Literal["tool_failed", "tool_completed"] = (
             "tool_failed" if is_error else "tool_completed"
@@ -92,30 +171,6 @@ class ToolHandlerRegistry:
         event: StreamEvent = {"type": event_type, "tool": payload}
         return event
 
-    def _normalize_result(self, result: JSONValue) -> JSONValue:
-        # Recursively normalizes tool results, attempting to parse JSON-encoded strings.
-        # Tool outputs often contain stringified JSON that needs to be converted to objects
-        # for proper display. Silently falls back to raw string if parsing fails.
-        if result is None:
-            return None
-
-        if isinstance(result, list):
-            return [self._normalize_result(item) for item in result]
-
-        if isinstance(result, dict):
-            return {key: self._normalize_result(value) for key, value in result.items()}
-
-        if isinstance(result, str):
-            text = result.strip()
-            if not text:
-                return ""
-            try:
-                return cast(JSONValue, json.loads(text))
-            except json.JSONDecodeError:
-                return text
-
-        return result
-
     def _stringify_result(self, result: JSONValue) -> str:
         if isinstance(result, str):
             return result
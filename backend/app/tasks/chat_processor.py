@@ -3,6 +3,7 @@ from typing import Any
 
 from app.core.celery import celery_app
 from app.services.streaming import ContextUsageTracker, initialize_and_run_chat
+from app.utils.redis import redis_manager
 
 
 @celery_app.task(bind=True)
@@ -44,6 +45,7 @@ def process_chat(
             )
         )
     finally:
+        loop.run_until_complete(redis_manager.close())
         loop.close()
 
 
@@ -68,6 +70,7 @@ def fetch_context_token_usage(
     asyncio.set_event_loop(loop)
 
     try:
-        loop.run_until_complete(tracker.poll_while_streaming())
+        loop.run_until_complete(tracker.calibrate())
     finally:
+        loop.run_until_complete(redis_manager.close())
         loop.close()
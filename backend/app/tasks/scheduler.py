@@ -8,6 +8,7 @@ from app.services.scheduler import (
     cleanup_expired_tokens_async,
     execute_scheduled_task_async,
 )
+from app.utils.redis import redis_manager
 
 
 @celery_app.task(name="check_scheduled_tasks")
@@ -18,6 +19,7 @@ def check_scheduled_tasks() -> dict[str, Any]:
     try:
         return loop.run_until_complete(_check_scheduled_tasks_wrapper())
     finally:
+        loop.run_until_complete(redis_manager.close())
         loop.close()
 
 
@@ -37,6 +39,7 @@ def execute_scheduled_task(self: Any, task_id: str) -> dict[str, Any]:
     try:
         return loop.run_until_complete(_execute_scheduled_task_wrapper(self, task_id))
     finally:
+        loop.run_until_complete(redis_manager.close())
         loop.close()
 
 
@@ -57,6 +60,7 @@ def cleanup_expired_refresh_tokens() -> dict[str, Any]:
     try:
         return loop.run_until_complete(_cleanup_tokens_wrapper())
     finally:
+        loop.run_until_complete(redis_manager.close())
         loop.close()
 
 
@@ -1,8 +1,15 @@
+import asyncio
 import logging
-from collections.abc import AsyncIterator
+import os
+import weakref
+from collections.abc import AsyncIterator, Collection, Iterator
 from contextlib import asynccontextmanager
-from redis.asyncio import Redis
+
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.registry import REGISTRY, Collector
+from redis.asyncio import BlockingConnectionPool, Redis
 from redis.asyncio.client import PubSub
+from redis.asyncio.connection import Connection
 
 from app.core.config import get_settings
 
@@ -10,27 +17,134 @@ settings = get_settings()
 logger = logging.getLogger(__name__)
 
 
-@asynccontextmanager
-async def redis_connection() -> "AsyncIterator[Redis[str]]":
-    redis: "Redis[str]" = Redis.from_url(settings.REDIS_URL, decode_responses=True)
-    try:
-        yield redis
-    finally:
+class RedisPoolManager:
+    # redis.asyncio connections are bound to the event loop that opened them,
+    # so one pool is kept per loop. The API process runs a single loop; Celery
+    # tasks run one loop per task and release their pool when it finishes.
+    def __init__(self, url: str) -> None:
+        self._url = url
+        self._pools: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, BlockingConnectionPool[Connection]
+        ] = weakref.WeakKeyDictionary()
+        self._pid = os.getpid()
+        os.register_at_fork(after_in_child=self._reset_after_fork)
+
+    def _reset_after_fork(self) -> None:
+        # Sockets inherited from the parent must never be reused by the child
+        self._pools = weakref.WeakKeyDictionary()
+        self._pid = os.getpid()
+
+    def _get_pool(self) -> "BlockingConnectionPool[Connection]":
+        if self._pid != os.getpid():
+            self._reset_after_fork()
+
+        loop = asyncio.get_running_loop()
+        pool = self._pools.get(loop)
+        if pool is None:
+            pool = BlockingConnectionPool.from_url(
+                self._url,
+                decode_responses=True,
+                max_connections=settings.REDIS_MAX_CONNECTIONS,
+                timeout=settings.REDIS_POOL_TIMEOUT_SECONDS,
+                health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL_SECONDS,
+            )
+            self._pools[loop] = pool
+        return pool
+
+    def get_client(self) -> "Redis[str]":
+        # The pool decodes responses; the flag here only selects Redis[str]
+        return Redis(connection_pool=self._get_pool(), decode_responses=True)
+
+    async def close(self) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+
+        pool = self._pools.pop(loop, None)
+        if pool is None:
+            return
+
         try:
-            await redis.close()
+            await pool.disconnect()
         except Exception as e:
-            logger.warning("Error closing Redis connection: %s", e)
+            logger.warning("Error closing Redis connection pool: %s", e)
+
+    def iter_pools(self) -> "Iterator[BlockingConnectionPool[Connection]]":
+        if self._pid != os.getpid():
+            return iter(())
+        return iter(list(self._pools.values()))
+
+
+def _pool_connection_counts(
+    pool: "BlockingConnectionPool[Connection]",
+) -> tuple[int, int]:
+    # redis-py keeps no public counters; every ConnectionPool tracks its
+    # checked-out and idle connections in these two collections
+    in_use: Collection[Connection] = getattr(pool, "_in_use_connections", ())
+    idle: Collection[Connection] = getattr(pool, "_available_connections", ())
+    return len(in_use), len(idle)
+
+
+class RedisPoolCollector(Collector):
+    def __init__(self, manager: RedisPoolManager) -> None:
+        self._manager = manager
+
+    def collect(self) -> Iterator[GaugeMetricFamily]:
+        pools = list(self._manager.iter_pools())
+        counts = [_pool_connection_counts(pool) for pool in pools]
+        in_use = sum(count[0] for count in counts)
+        idle = sum(count[1] for count in counts)
+
+        yield GaugeMetricFamily(
+            "redis_pool_count",
+            "Redis connection pools in this process",
+            value=len(pools),
+        )
+        yield GaugeMetricFamily(
+            "redis_pool_connections_in_use",
+            "Redis connections currently checked out",
+            value=in_use,
+        )
+        yield GaugeMetricFamily(
+            "redis_pool_connections_idle",
+            "Open Redis connections waiting in the pool",
+            value=idle,
+        )
+        yield GaugeMetricFamily(
+            "redis_pool_max_connections",
+            "Configured Redis connection limit per pool",
+            value=settings.REDIS_MAX_CONNECTIONS,
+        )
+
+
+redis_manager = RedisPoolManager(settings.REDIS_URL)
+REGISTRY.register(RedisPoolCollector(redis_manager))
+
+
+@asynccontextmanager
+async def redis_connection() -> "AsyncIterator[Redis[str]]":
+    # Clients share the process pool, so there is nothing to tear down here
+    yield redis_manager.get_client()
 
 
 @asynccontextmanager
-async def redis_pubsub(redis: "Redis[str]", channel: str) -> AsyncIterator[PubSub]:
+async def redis_pubsub(
+    redis: "Redis[str]", channel: str, pattern: bool = False
+) -> AsyncIterator[PubSub]:
     pubsub = redis.pubsub()
-    await pubsub.subscribe(channel)
+    if pattern:
+        await pubsub.psubscribe(channel)
+    else:
+        await pubsub.subscribe(channel)
     try:
         yield pubsub
     finally:
         try:
-            await pubsub.unsubscribe(channel)
+            if pattern:
+                await pubsub.punsubscribe(channel)
+            else:
+                await pubsub.unsubscribe(channel)
         except Exception as e:
             logger.warning("Error unsubscribing from channel %s: %s", channel, e)
         try:
@@ -0,0 +1,175 @@
+"""Decode stream-json CLI output with the legacy buffer parser and NdjsonDecoder.
+
+The legacy parser appended every line to a buffer and retried raw_decode
+from its start, so a message arriving in many chunks was re-parsed once per
+chunk. NdjsonDecoder parses each line once, skips the ANSI pass when no
+escape byte is present and uses orjson when it is installed.
+
+    python -m benchmarks.cli_output_parse
+    python -m benchmarks.cli_output_parse --capture session.jsonl --chunk-size 65536
+
+A capture is the raw stdout of `claude --output-format stream-json`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import re
+import time
+from collections.abc import Callable, Iterator
+from typing import Any
+
+from app.services.sandbox.ndjson import NdjsonDecoder, orjson
+
+ANSI_ESCAPE_RE = re.compile(r"\x1B\[[0-?]*[ -/]*[@-~]")
+MAX_BUFFER_SIZE = 64 * 1024 * 1024
+
+
+def synthesize_session(messages: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    lines = [json.dumps({"type": "system", "subtype": "init", "session_id": "bench"})]
+    for i in range(messages):
+        if rng.random() < 0.1:
+            content = "\n".join(
+                f"{n:>6}\tline {n} of a large file read"
+                for n in range(rng.randint(5_000, 60_000))
+            )
+            message = {
+                "type": "user",
+                "message": {
+                    "content": [
+                        {
+                            "type": "tool_result",
+                            "tool_use_id": f"toolu_{i}",
+                            "content": content,
+                        }
+                    ]
+                },
+            }
+        else:
+            message = {
+                "type": "assistant",
+                "message": {
+                    "content": [
+                        {"type": "text", "text": "token " * rng.randint(1, 200)}
+                    ]
+                },
+            }
+        lines.append(json.dumps(message))
+    lines.append(
+        json.dumps({"type": "result", "subtype": "success", "total_cost_usd": 0.1})
+    )
+    return "\n".join(lines) + "\n"
+
+
+def _chunks(text: str, size: int) -> Iterator[str]:
+    for start in range(0, len(text), size):
+        yield text[start : start + size]
+
+
+def legacy_parse(chunks: Iterator[str]) -> list[Any]:
+    decoder = json.JSONDecoder()
+    out: list[Any] = []
+    json_buffer = ""
+    json_started = False
+
+    def parse_buffer(buffer: str) -> str:
+        working = buffer
+        while working:
+            working = working.lstrip()
+            try:
+                data, offset = decoder.raw_decode(working)
+            except json.JSONDecodeError:
+                break
+            out.append(data)
+            working = working[offset:]
+        return working
+
+    for chunk in chunks:
+        clean_chunk = ANSI_ESCAPE_RE.sub("", chunk).replace("\r", "")
+        for json_line in clean_chunk.split("\n"):
+            json_line = json_line.strip()
+            if not json_line:
+                continue
+            if not json_started:
+                starts = [
+                    p for p in (json_line.find("{"), json_line.find("[")) if p != -1
+                ]
+                if not starts:
+                    continue
+                json_line = json_line[min(starts) :]
+                json_started = True
+            json_buffer = parse_buffer(json_buffer + json_line)
+            if not json_buffer:
+                json_started = False
+    return out
+
+
+def decoder_parse(chunks: Iterator[str], loads: Callable[[str], Any]) -> list[Any]:
+    decoder = NdjsonDecoder(MAX_BUFFER_SIZE, loads=loads)
+    out: list[Any] = []
+    for chunk in chunks:
+        out.extend(decoder.feed(chunk))
+    messages, _ = decoder.finish()
+    out.extend(messages)
+    return out
+
+
+def _measure(
+    name: str, run: Callable[[], list[Any]], expected: int, size: int
+) -> float:
+    started = time.perf_counter()
+    messages = run()
+    elapsed = time.perf_counter() - started
+    status = "ok" if len(messages) == expected else f"{len(messages)} messages"
+    print(
+        f"  {name:<16} {elapsed * 1000:>10.1f} ms  {size / elapsed / 1e6:>8.1f} MB/s  {status}"
+    )
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--capture", help="Recorded CLI stdout to replay")
+    parser.add_argument("--messages", type=int, default=300)
+    parser.add_argument("--chunk-size", type=int, default=4096)
+    args = parser.parse_args()
+
+    if args.capture:
+        with open(args.capture, encoding="utf-8") as f:
+            text = f.read()
+    else:
+        text = synthesize_session(args.messages)
+
+    expected = sum(
+        1 for line in text.splitlines() if line.strip().startswith(("{", "["))
+    )
+    print(f"{len(text):,} chars, {expected} messages, {args.chunk_size}-char chunks")
+
+    legacy = _measure(
+        "legacy",
+        lambda: legacy_parse(_chunks(text, args.chunk_size)),
+        expected,
+        len(text),
+    )
+    stdlib = _measure(
+        "ndjson json",
+        lambda: decoder_parse(_chunks(text, args.chunk_size), json.loads),
+        expected,
+        len(text),
+    )
+    print(f"  speedup          {legacy / stdlib:>10.1f}x")
+    if orjson is not None:
+        fast = _measure(
+            "ndjson orjson",
+            lambda: decoder_parse(_chunks(text, args.chunk_size), orjson.loads),
+            expected,
+            len(text),
+        )
+        print(f"  speedup          {legacy / fast:>10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
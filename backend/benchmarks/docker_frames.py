@@ -0,0 +1,159 @@
+"""Replay a multiplexed Docker exec stream through the transport's frame parser.
+
+Builds a synthetic stream-json CLI output, wraps it in Docker stdout/stderr
+frames of varying size (splitting multibyte characters across frames) and
+feeds it in recv-sized chunks to the legacy bytes parser and to
+DockerFrameDemuxer with adaptive read sizes.
+
+    python -m benchmarks.docker_frames --megabytes 10 50 100
+    python -m benchmarks.docker_frames --capture cli-stdout.jsonl
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import time
+from collections.abc import Callable, Iterator
+
+from app.services.sandbox.framing import (
+    STREAM_STDOUT,
+    AdaptiveReadSize,
+    DockerFrameDemuxer,
+)
+
+MAX_FRAME_SIZE = 10 * 1024 * 1024
+
+
+def synthesize_output(megabytes: int, seed: int = 0) -> bytes:
+    rng = random.Random(seed)
+    target = megabytes * 1024 * 1024
+    lines: list[bytes] = []
+    size = 0
+    while size < target:
+        if rng.random() < 0.05:
+            content = "résultat → ✓ " * rng.randint(5_000, 40_000)
+        else:
+            content = "token " * rng.randint(1, 50)
+        line = (
+            json.dumps(
+                {
+                    "type": "assistant",
+                    "message": {"content": [{"type": "text", "text": content}]},
+                },
+                ensure_ascii=False,
+            ).encode("utf-8")
+            + b"\n"
+        )
+        lines.append(line)
+        size += len(line)
+    return b"".join(lines)
+
+
+def frame(payload: bytes, seed: int = 0) -> bytes:
+    rng = random.Random(seed)
+    frames: list[bytes] = []
+    offset = 0
+    while offset < len(payload):
+        size = rng.choice((1, 7, 512, 4096, 65_536, 1024 * 1024, 4 * 1024 * 1024))
+        chunk = payload[offset : offset + size]
+        frames.append(
+            bytes([STREAM_STDOUT, 0, 0, 0]) + len(chunk).to_bytes(4, "big") + chunk
+        )
+        offset += size
+    return b"".join(frames)
+
+
+def _reads(stream: bytes, next_size: Callable[[int], int]) -> Iterator[bytes]:
+    offset = 0
+    received = 0
+    while offset < len(stream):
+        size = next_size(received)
+        data = stream[offset : offset + size]
+        offset += len(data)
+        received = len(data)
+        yield data
+
+
+def legacy_parse(stream: bytes) -> str:
+    out: list[str] = []
+    buffer = b""
+    for data in _reads(stream, lambda _: 4096):
+        buffer += data
+        while len(buffer) >= 8:
+            stream_type = buffer[0]
+            frame_size = int.from_bytes(buffer[4:8], byteorder="big")
+            if len(buffer) < 8 + frame_size:
+                break
+            payload = buffer[8 : 8 + frame_size]
+            buffer = buffer[8 + frame_size :]
+            if stream_type == 1:
+                out.append(payload.decode("utf-8", errors="replace"))
+    return "".join(out)
+
+
+def demuxer_parse(stream: bytes) -> str:
+    out: list[str] = []
+    demuxer = DockerFrameDemuxer(MAX_FRAME_SIZE)
+    read_size = AdaptiveReadSize()
+
+    def next_size(received: int) -> int:
+        if received:
+            read_size.update(received)
+        return read_size.size
+
+    for data in _reads(stream, next_size):
+        out.extend(
+            text
+            for stream_type, text in demuxer.feed(data)
+            if stream_type == STREAM_STDOUT
+        )
+    out.extend(
+        text for stream_type, text in demuxer.flush() if stream_type == STREAM_STDOUT
+    )
+    return "".join(out)
+
+
+def _measure(
+    name: str, run: Callable[[bytes], str], stream: bytes, expected: str
+) -> float:
+    started = time.perf_counter()
+    text = run(stream)
+    elapsed = time.perf_counter() - started
+    status = (
+        "ok" if text == expected else f"{sum(c == '�' for c in text)} replacement chars"
+    )
+    print(
+        f"  {name:<8} {elapsed * 1000:>10.1f} ms  {len(stream) / elapsed / 1e6:>8.1f} MB/s  {status}"
+    )
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--megabytes", type=int, nargs="+", default=[10, 50, 100])
+    parser.add_argument(
+        "--capture", help="Raw CLI stdout to frame instead of synthetic output"
+    )
+    parser.add_argument("--skip-legacy-above", type=int, default=100)
+    args = parser.parse_args()
+
+    if args.capture:
+        with open(args.capture, "rb") as f:
+            payloads = [(args.capture, f.read())]
+    else:
+        payloads = [(f"{mb} MB", synthesize_output(mb)) for mb in args.megabytes]
+
+    for label, payload in payloads:
+        stream = frame(payload)
+        expected = payload.decode("utf-8")
+        print(f"{label}: {len(stream):,} framed bytes")
+        new = _measure("demuxer", demuxer_parse, stream, expected)
+        if len(payload) <= args.skip_legacy_above * 1024 * 1024:
+            old = _measure("legacy", legacy_parse, stream, expected)
+            print(f"  speedup  {old / new:>10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
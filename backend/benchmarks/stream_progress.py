@@ -0,0 +1,177 @@
+"""Replay a stream transcript through the orchestrator's per-event bookkeeping.
+
+Compares the legacy path (deepcopy + Celery update_state for every event)
+with ProgressReporter, which keeps emitted events as-is and coalesces
+backend writes.
+
+    python -m benchmarks.stream_progress --events 5000
+    python -m benchmarks.stream_progress --transcript message.json --redis-url redis://localhost:6379/0
+
+A transcript is a JSON array of stream events, e.g. a Message.content dump.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import time
+from collections.abc import Callable
+from copy import deepcopy
+from typing import Any
+
+from redis import Redis
+
+from app.services.streaming.progress import ProgressReporter
+
+
+class _BackendTask:
+    # Mirrors what a Redis result backend does per update_state: encode the
+    # task meta and SET it under the task key
+    def __init__(self, redis_client: Redis | None) -> None:
+        self._redis = redis_client
+        self.writes = 0
+
+    def update_state(self, state: str, meta: dict[str, Any]) -> None:
+        payload = json.dumps({"status": state, "result": meta, "task_id": "bench"})
+        if self._redis is not None:
+            self._redis.set("celery-task-meta-bench", payload)
+        self.writes += 1
+
+
+def synthesize_transcript(count: int, seed: int = 0) -> list[dict[str, Any]]:
+    rng = random.Random(seed)
+    events: list[dict[str, Any]] = []
+    open_tools: list[dict[str, Any]] = []
+
+    while len(events) < count:
+        roll = rng.random()
+        if roll < 0.55:
+            events.append(
+                {"type": "assistant_text", "text": "token " * rng.randint(1, 8)}
+            )
+        elif roll < 0.65:
+            events.append(
+                {"type": "assistant_thinking", "thinking": "step " * rng.randint(5, 40)}
+            )
+        elif roll < 0.8 or not open_tools:
+            tool = {
+                "id": f"toolu_{len(events)}",
+                "name": "Bash",
+                "title": "Bash",
+                "parent_id": None,
+                "input": {"command": "ls -la /home/user", "description": "List files"},
+            }
+            open_tools.append(tool)
+            events.append(
+                {"type": "tool_started", "tool": {**tool, "status": "started"}}
+            )
+        else:
+            tool = open_tools.pop()
+            rows = [
+                {
+                    "path": f"/home/user/file_{i}.py",
+                    "size": i * 128,
+                    "lines": ["x" * 80] * 4,
+                }
+                for i in range(rng.randint(10, 60))
+            ]
+            events.append(
+                {
+                    "type": "tool_completed",
+                    "tool": {**tool, "status": "completed", "result": rows},
+                }
+            )
+
+    return events[:count]
+
+
+def _legacy(events: list[dict[str, Any]], task: _BackendTask) -> None:
+    log: list[dict[str, Any]] = []
+    for event in events:
+        log.append(deepcopy(event))
+        task.update_state(
+            state="PROGRESS",
+            meta={"status": "Processing", "events_emitted": len(log)},
+        )
+
+
+def _coalesced(
+    events: list[dict[str, Any]],
+    task: _BackendTask,
+    interval: float,
+    min_events: int,
+) -> None:
+    log: list[dict[str, Any]] = []
+    reporter = ProgressReporter(
+        task,  # type: ignore[arg-type]
+        min_interval_seconds=interval,
+        min_events=min_events,
+    )
+    for event in events:
+        log.append(event)
+        reporter.record(len(log))
+    reporter.flush()
+
+
+def _measure(
+    name: str,
+    run: Callable[[_BackendTask], None],
+    redis_client: Redis | None,
+    events: int,
+    repeat: int,
+) -> float:
+    best = float("inf")
+    writes = 0
+    for _ in range(repeat):
+        task = _BackendTask(redis_client)
+        started = time.perf_counter()
+        run(task)
+        best = min(best, time.perf_counter() - started)
+        writes = task.writes
+
+    rate = events / best
+    print(
+        f"{name:<12} {rate:>14,.0f} events/s  {best * 1000:>9.1f} ms  {writes:>6} backend writes"
+    )
+    return rate
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--transcript", help="JSON array of stream events to replay")
+    parser.add_argument("--events", type=int, default=5000)
+    parser.add_argument("--redis-url", help="Write task state to a real Redis server")
+    parser.add_argument("--interval", type=float, default=1.0)
+    parser.add_argument("--min-events", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.transcript:
+        with open(args.transcript, encoding="utf-8") as f:
+            events = json.load(f)
+    else:
+        events = synthesize_transcript(args.events)
+
+    redis_client = Redis.from_url(args.redis_url) if args.redis_url else None
+
+    print(f"Replaying {len(events)} events ({args.repeat} runs, best shown)")
+    before = _measure(
+        "legacy",
+        lambda task: _legacy(events, task),
+        redis_client,
+        len(events),
+        args.repeat,
+    )
+    after = _measure(
+        "coalesced",
+        lambda task: _coalesced(events, task, args.interval, args.min_events),
+        redis_client,
+        len(events),
+        args.repeat,
+    )
+    print(f"speedup      {after / before:>14.1f}x")
+
+
+if __name__ == "__main__":
+    main()
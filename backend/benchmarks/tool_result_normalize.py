@@ -0,0 +1,116 @@
+"""Normalize realistic tool outputs with the legacy walker and the budgeted one.
+
+The legacy path recursed through every result and ran json.loads on every
+string leaf. ToolResultNormalizer rejects strings that cannot be JSON before
+parsing and stops at depth, node and parse-size budgets.
+
+    python -m benchmarks.tool_result_normalize
+    python -m benchmarks.tool_result_normalize --scale 4 --repeat 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+import tracemalloc
+from collections.abc import Callable
+from typing import Any
+
+from app.services.tool_handler import ToolResultNormalizer
+
+
+def _legacy_normalize(result: Any) -> Any:
+    if result is None:
+        return None
+    if isinstance(result, list):
+        return [_legacy_normalize(item) for item in result]
+    if isinstance(result, dict):
+        return {key: _legacy_normalize(value) for key, value in result.items()}
+    if isinstance(result, str):
+        text = result.strip()
+        if not text:
+            return ""
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError:
+            return text
+    return result
+
+
+def build_samples(scale: int) -> dict[str, Any]:
+    package_json = {
+        "dependencies": {f"package-{i}": f"^{i % 9}.{i % 13}.0" for i in range(400)},
+        "scripts": {
+            f"task:{i}": f"node scripts/task_{i}.js --flag" for i in range(100)
+        },
+    }
+    return {
+        "bash_output": "\n".join(
+            f"drwxr-xr-x  2 user user 4096 Jan  1 12:00 dir_{i}"
+            for i in range(5_000 * scale)
+        ),
+        "read_lines": [
+            f"{i:>6}\tconst value_{i} = compute({i}, options);"
+            for i in range(5_000 * scale)
+        ],
+        "glob_paths": [
+            f"/home/user/src/module_{i}/index.ts" for i in range(10_000 * scale)
+        ],
+        "cat_json_file": json.dumps(
+            [
+                {"id": i, "name": f"row {i}", "tags": ["a", "b"]}
+                for i in range(20_000 * scale)
+            ]
+        ),
+        "mcp_text_blocks": [
+            {"type": "text", "text": json.dumps(package_json)} for _ in range(5 * scale)
+        ],
+        "grep_matches": [
+            {
+                "file": f"/home/user/src/file_{i}.py",
+                "line": i,
+                "text": f"def handler_{i}():",
+            }
+            for i in range(5_000 * scale)
+        ],
+    }
+
+
+def _measure(run: Callable[[Any], Any], sample: Any, repeat: int) -> tuple[float, int]:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run(sample)
+        best = min(best, time.perf_counter() - started)
+
+    tracemalloc.start()
+    run(sample)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    normalizer = ToolResultNormalizer()
+    samples = build_samples(args.scale)
+
+    print(
+        f"{'sample':<16} {'legacy ms':>10} {'budgeted ms':>12} {'speedup':>8} {'legacy peak':>12} {'budgeted peak':>14}"
+    )
+    for name, sample in samples.items():
+        legacy_time, legacy_peak = _measure(_legacy_normalize, sample, args.repeat)
+        new_time, new_peak = _measure(normalizer.normalize, sample, args.repeat)
+        print(
+            f"{name:<16} {legacy_time * 1000:>10.2f} {new_time * 1000:>12.2f} "
+            f"{legacy_time / new_time:>7.1f}x {legacy_peak / 1024:>10.0f}KB {new_peak / 1024:>12.0f}KB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""add message_events table
+
+Revision ID: g7h8i9j0k1l2
+Revises: f6g7h8i9j0k1
+Create Date: 2026-01-14 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.db.types import GUID
+
+
+revision: str = 'g7h8i9j0k1l2'
+down_revision: Union[str, None] = 'f6g7h8i9j0k1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'message_events',
+        sa.Column('id', GUID(), nullable=False),
+        sa.Column('message_id', GUID(), nullable=False),
+        sa.Column('seq', sa.Integer(), nullable=False),
+        sa.Column('payload', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['message_id'], ['messages.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'idx_message_events_message_id_seq',
+        'message_events',
+        ['message_id', 'seq'],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('idx_message_events_message_id_seq', table_name='message_events')
+    op.drop_table('message_events')
@@ -1,24 +1,30 @@
 from __future__ import annotations
 
+import copy
 import io
 import json
 import uuid
 import zipfile
+from pathlib import Path
 
 import pytest
 from httpx import AsyncClient
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import get_settings
 from app.core.security import get_password_hash
-from app.models.db_models import Chat, Message, MessageAttachment, User
+from app.models.db_models import Chat, Message, MessageAttachment, MessageEvent, User
 from app.models.db_models.enums import AttachmentType, MessageRole, MessageStreamStatus
 from app.services.sandbox import SandboxService
+from app.services.streaming.tool_results import ToolResultStore
 from tests.conftest import (
     STREAMING_TEST_TIMEOUT,
     read_sandbox_file,
     sandbox_file_exists,
 )
 
+settings = get_settings()
+
 
 class TestCreateChat:
     async def test_create_chat(
@@ -346,6 +352,108 @@ class TestGetMessages:
         assert isinstance(data["items"], list)
 
 
+class TestGetMessageEvents:
+    async def test_get_message_events_paginated(
+        self,
+        async_client: AsyncClient,
+        integration_chat_fixture: tuple[User, Chat, SandboxService],
+        auth_headers: dict[str, str],
+        db_session: AsyncSession,
+    ) -> None:
+        _, chat, _ = integration_chat_fixture
+
+        message = Message(
+            id=uuid.uuid4(),
+            chat_id=chat.id,
+            content="",
+            role=MessageRole.ASSISTANT,
+            stream_status=MessageStreamStatus.COMPLETED,
+        )
+        db_session.add(message)
+        await db_session.flush()
+
+        events = [{"type": "assistant_text", "text": f"chunk {i}"} for i in range(5)]
+        for seq, event in enumerate(events):
+            db_session.add(
+                MessageEvent(message_id=message.id, seq=seq, payload=json.dumps(event))
+            )
+        await db_session.flush()
+
+        response = await async_client.get(
+            f"/api/v1/chat/chats/{chat.id}/messages/{message.id}/events",
+            params={"limit": 3},
+            headers=auth_headers,
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["items"] == events[:3]
+        assert data["has_more"] is True
+
+        response = await async_client.get(
+            f"/api/v1/chat/chats/{chat.id}/messages/{message.id}/events",
+            params={"limit": 3, "cursor": data["next_cursor"]},
+            headers=auth_headers,
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["items"] == events[3:]
+        assert data["has_more"] is False
+
+        messages_response = await async_client.get(
+            f"/api/v1/chat/chats/{chat.id}/messages",
+            headers=auth_headers,
+        )
+        assistant_msg = next(
+            m for m in messages_response.json()["items"] if m["id"] == str(message.id)
+        )
+        assert json.loads(assistant_msg["content"]) == events
+
+    async def test_get_message_events_legacy_content(
+        self,
+        async_client: AsyncClient,
+        integration_chat_fixture: tuple[User, Chat, SandboxService],
+        auth_headers: dict[str, str],
+        db_session: AsyncSession,
+    ) -> None:
+        _, chat, _ = integration_chat_fixture
+
+        events = [{"type": "assistant_text", "text": "legacy"}]
+        message = Message(
+            id=uuid.uuid4(),
+            chat_id=chat.id,
+            content=json.dumps(events),
+            role=MessageRole.ASSISTANT,
+            stream_status=MessageStreamStatus.COMPLETED,
+        )
+        db_session.add(message)
+        await db_session.flush()
+
+        response = await async_client.get(
+            f"/api/v1/chat/chats/{chat.id}/messages/{message.id}/events",
+            headers=auth_headers,
+        )
+
+        assert response.status_code == 200
+        assert response.json()["items"] == events
+
+    async def test_get_message_events_not_found(
+        self,
+        async_client: AsyncClient,
+        integration_chat_fixture: tuple[User, Chat, SandboxService],
+        auth_headers: dict[str, str],
+    ) -> None:
+        _, chat, _ = integration_chat_fixture
+
+        response = await async_client.get(
+            f"/api/v1/chat/chats/{chat.id}/messages/{uuid.uuid4()}/events",
+            headers=auth_headers,
+        )
+
+        assert response.status_code == 404
+
+
 class TestContextUsage:
     async def test_get_context_usage(
         self,
@@ -1131,3 +1239,125 @@ Execute the chat test command."""
         content = await read_sandbox_file(sandbox_service, sandbox_id, command_path)
         assert content is not None
         assert "chat-test-command" in content
+
+
+class TestGetToolResult:
+    async def test_get_offloaded_tool_result(
+        self,
+        async_client: AsyncClient,
+        integration_chat_fixture: tuple[User, Chat, SandboxService],
+        auth_headers: dict[str, str],
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        _, chat, _ = integration_chat_fixture
+        monkeypatch.setattr(settings, "TOOL_RESULT_OFFLOAD_THRESHOLD_BYTES", 100)
+        monkeypatch.setattr(settings, "TOOL_RESULT_PREVIEW_CHARS", 10)
+
+        output = "x" * 500
+        event = await ToolResultStore().offload(
+            str(chat.id),
+            {
+                "type": "tool_completed",
+                "tool": {"id": "toolu_offload", "name": "Bash", "result": output},
+            },
+        )
+
+        tool = event["tool"]
+        assert tool["result"] == output[:10]
+        assert tool["result_ref"]["size"] == len(output)
+        assert tool["result_ref"]["url"].endswith(
+            f"/chats/{chat.id}/tool-results/toolu_offload"
+        )
+
+        response = await async_client.get(
+            f"/api/v1/chat/chats/{chat.id}/tool-results/toolu_offload",
+            headers=auth_headers,
+        )
+        assert response.status_code == 200
+        assert response.text == output
+
+        response = await async_client.get(
+            f"/api/v1/chat/chats/{chat.id}/tool-results/toolu_offload",
+            headers={**auth_headers, "Range": "bytes=0-99"},
+        )
+        assert response.status_code == 206
+        assert response.text == output[:100]
+
+    async def test_get_missing_tool_result(
+        self,
+        async_client: AsyncClient,
+        integration_chat_fixture: tuple[User, Chat, SandboxService],
+        auth_headers: dict[str, str],
+    ) -> None:
+        _, chat, _ = integration_chat_fixture
+
+        response = await async_client.get(
+            f"/api/v1/chat/chats/{chat.id}/tool-results/toolu_missing",
+            headers=auth_headers,
+        )
+        assert response.status_code == 404
+
+
+class TestToolResultOffload:
+    async def test_offload_leaves_yielded_event_unchanged(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        monkeypatch.setattr(settings, "TOOL_RESULT_OFFLOAD_THRESHOLD_BYTES", 100)
+        monkeypatch.setattr(settings, "TOOL_RESULT_PREVIEW_CHARS", 10)
+
+        result = {"files": [f"file_{i}.py" for i in range(50)]}
+        event = {
+            "type": "tool_completed",
+            "tool": {"id": "toolu_copy", "name": "Glob", "result": result},
+        }
+        snapshot = copy.deepcopy(event)
+
+        offloaded = await ToolResultStore(tmp_path).offload("chat", event)
+
+        assert offloaded is not event
+        assert offloaded["tool"] is not event["tool"]
+        assert "result_ref" in offloaded["tool"]
+        assert event == snapshot
+        assert event["tool"]["result"] is result
+
+    async def test_offload_below_threshold_returns_same_event(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        monkeypatch.setattr(settings, "TOOL_RESULT_OFFLOAD_THRESHOLD_BYTES", 100)
+
+        event = {
+            "type": "tool_completed",
+            "tool": {"id": "toolu_small", "name": "Bash", "result": "ok"},
+        }
+
+        assert await ToolResultStore(tmp_path).offload("chat", event) is event
+        assert not (tmp_path / "chat").exists()
+
+    async def test_fork_copy_outlives_source_chat(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        monkeypatch.setattr(settings, "TOOL_RESULT_OFFLOAD_THRESHOLD_BYTES", 100)
+        store = ToolResultStore(tmp_path)
+        events = [
+            await store.offload(
+                "source",
+                {
+                    "type": "tool_completed",
+                    "tool": {"id": tool_use_id, "name": "Bash", "result": "x" * 500},
+                },
+            )
+            for tool_use_id in ("toolu_kept", "toolu_after_fork")
+        ]
+        missing = {
+            "type": "tool_completed",
+            "tool": {"id": "toolu_gone", "name": "Bash", "result_ref": {}},
+        }
+
+        store.copy_chat_results(
+            "source", "fork", ["user prompt", json.dumps([events[0], missing])]
+        )
+        store.delete_chat_results("source")
+
+        assert store.get_path("fork", "toolu_kept").read_text() == "x" * 500
+        assert not store.get_path("fork", "toolu_after_fork").exists()
+        assert not store.get_path("fork", "toolu_gone").exists()
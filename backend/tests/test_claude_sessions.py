@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+from collections.abc import AsyncIterator, Iterator
+from typing import Any
+
+import pytest
+from claude_agent_sdk import ClaudeAgentOptions, ResultMessage
+from redis.asyncio import Redis
+
+from app.constants import REDIS_KEY_CHAT_CLI_OWNER
+from app.services import claude_sessions
+from app.services.claude_sessions import ClaudeSessionPool, options_fingerprint
+
+
+class _FakeTransport:
+    def __init__(self) -> None:
+        self.ready = False
+        self.closed = False
+        self.total_cost_usd = 0.0
+
+    async def __aenter__(self) -> _FakeTransport:
+        self.ready = True
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        self.ready = False
+        self.closed = True
+
+    def is_ready(self) -> bool:
+        return self.ready
+
+
+class _FakeClient:
+    # Answers every query with a result carrying the process's running cost
+    def __init__(self, options: ClaudeAgentOptions, transport: _FakeTransport) -> None:
+        self._transport = transport
+
+    async def __aenter__(self) -> _FakeClient:
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        return None
+
+    async def query(self, prompt: AsyncIterator[dict[str, Any]]) -> None:
+        async for _ in prompt:
+            pass
+
+    async def receive_response(self) -> AsyncIterator[ResultMessage]:
+        self._transport.total_cost_usd += 0.25
+        yield ResultMessage(
+            subtype="success",
+            duration_ms=1,
+            duration_api_ms=1,
+            is_error=False,
+            num_turns=1,
+            session_id="session-1",
+            total_cost_usd=self._transport.total_cost_usd,
+        )
+
+
+@pytest.fixture
+def session_pool(monkeypatch: pytest.MonkeyPatch) -> Iterator[ClaudeSessionPool]:
+    monkeypatch.setattr(claude_sessions, "ClaudeSDKClient", _FakeClient)
+    pool = ClaudeSessionPool()
+    try:
+        yield pool
+    finally:
+        pool.shutdown()
+
+
+async def _run_turn(
+    pool: ClaudeSessionPool,
+    transports: list[_FakeTransport],
+    options: ClaudeAgentOptions,
+    session_id: str | None = None,
+) -> list[Any]:
+    def transport_factory() -> Any:
+        transport = _FakeTransport()
+        transports.append(transport)
+        return transport
+
+    message = {
+        "type": "user",
+        "message": {"role": "user", "content": "hi"},
+        "parent_tool_use_id": None,
+        "session_id": session_id,
+    }
+    return [
+        item
+        async for item in pool.stream_turn(
+            chat_id="chat-1",
+            options=options,
+            message=message,
+            transport_factory=transport_factory,
+        )
+    ]
+
+
+class TestOptionsFingerprint:
+    def test_ignores_rotating_chat_token(self) -> None:
+        def options(token: str) -> ClaudeAgentOptions:
+            return ClaudeAgentOptions(
+                model="claude-sonnet-4-5",
+                mcp_servers={
+                    "permission": {
+                        "command": "server",
+                        "env": {"CHAT_TOKEN": token, "CHAT_ID": "chat-1"},
+                    }
+                },
+            )
+
+        assert options_fingerprint(options("a")) == options_fingerprint(options("b"))
+
+    def test_changes_with_model(self) -> None:
+        assert options_fingerprint(
+            ClaudeAgentOptions(model="claude-sonnet-4-5")
+        ) != options_fingerprint(ClaudeAgentOptions(model="claude-opus-4-1"))
+
+
+class TestClaudeSessionPool:
+    async def test_reuses_process_for_next_turn(
+        self, session_pool: ClaudeSessionPool, redis_client: Redis[str]
+    ) -> None:
+        transports: list[_FakeTransport] = []
+        options = ClaudeAgentOptions(model="claude-sonnet-4-5")
+
+        first = await _run_turn(session_pool, transports, options)
+        second = await _run_turn(session_pool, transports, options, "session-1")
+
+        assert len(transports) == 1
+        assert transports[0].ready
+        assert [message.total_cost_usd for message in first + second] == [0.25, 0.25]
+
+    async def test_fingerprint_change_starts_new_process(
+        self, session_pool: ClaudeSessionPool, redis_client: Redis[str]
+    ) -> None:
+        transports: list[_FakeTransport] = []
+
+        await _run_turn(
+            session_pool, transports, ClaudeAgentOptions(model="claude-sonnet-4-5")
+        )
+        await _run_turn(
+            session_pool,
+            transports,
+            ClaudeAgentOptions(model="claude-opus-4-1"),
+            "session-1",
+        )
+
+        assert len(transports) == 2
+        assert transports[0].closed
+        assert transports[1].ready
+
+    async def test_session_change_starts_new_process(
+        self, session_pool: ClaudeSessionPool, redis_client: Redis[str]
+    ) -> None:
+        transports: list[_FakeTransport] = []
+        options = ClaudeAgentOptions(model="claude-sonnet-4-5")
+
+        await _run_turn(session_pool, transports, options)
+        await _run_turn(session_pool, transports, options, "other-session")
+
+        assert len(transports) == 2
+        assert transports[0].closed
+
+    async def test_shutdown_closes_sessions_and_releases_owner(
+        self, session_pool: ClaudeSessionPool, redis_client: Redis[str]
+    ) -> None:
+        transports: list[_FakeTransport] = []
+        owner_key = REDIS_KEY_CHAT_CLI_OWNER.format(chat_id="chat-1")
+
+        await _run_turn(
+            session_pool, transports, ClaudeAgentOptions(model="claude-sonnet-4-5")
+        )
+        assert await redis_client.get(owner_key)
+
+        session_pool.shutdown()
+
+        assert transports[0].closed
+        assert await redis_client.get(owner_key) is None
@@ -1,9 +1,12 @@
 from __future__ import annotations
 
+import asyncio
 import uuid
 
 import pytest
+from httpx import Response
 
+from app.api.endpoints.sandbox import _file_media_type
 from tests.conftest import SandboxTestContext
 
 
@@ -107,6 +110,254 @@ class TestSandboxFiles:
 
         assert response.status_code == 404
 
+    async def test_write_files_keeps_existing_directory_modes(
+        self,
+        sandbox_test_context: SandboxTestContext,
+    ) -> None:
+        ctx = sandbox_test_context
+        sandbox_id = ctx.chat.sandbox_id
+        await ctx.service.execute_command(sandbox_id, "mkdir -m 700 ~/private")
+
+        await ctx.service.write_files(
+            sandbox_id, {"/home/user/private/new/file.txt": "content"}
+        )
+
+        result = await ctx.service.execute_command(
+            sandbox_id, "stat -c '%a %u' ~/private ~/private/new"
+        )
+        assert result.stdout.split("\n")[:2] == ["700 1000", "755 1000"]
+
+
+class TestSandboxFileIndex:
+    async def _write(self, ctx: SandboxTestContext, filename: str) -> None:
+        response = await ctx.client.put(
+            f"/api/v1/sandbox/{ctx.chat.sandbox_id}/files",
+            json={"file_path": f"/home/user/{filename}", "content": filename},
+            headers=ctx.auth_headers,
+        )
+        assert response.status_code == 200
+
+    async def test_get_file_tree(
+        self,
+        sandbox_test_context: SandboxTestContext,
+    ) -> None:
+        ctx = sandbox_test_context
+        test_filename = f"tree_test_{ctx.provider}.txt"
+        await self._write(ctx, test_filename)
+
+        response = await ctx.client.get(
+            f"/api/v1/sandbox/{ctx.chat.sandbox_id}/files/tree",
+            headers=ctx.auth_headers,
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert test_filename in [f["path"] for f in data["files"]]
+        assert response.headers["etag"] == f'"{data["index"]}.{data["version"]}"'
+
+        not_modified = await ctx.client.get(
+            f"/api/v1/sandbox/{ctx.chat.sandbox_id}/files/tree",
+            headers={**ctx.auth_headers, "If-None-Match": response.headers["etag"]},
+        )
+
+        assert not_modified.status_code == 304
+
+    async def test_get_file_tree_pages(
+        self,
+        sandbox_test_context: SandboxTestContext,
+    ) -> None:
+        ctx = sandbox_test_context
+        for name in ("a", "b"):
+            await self._write(ctx, f"page_{name}_{ctx.provider}.txt")
+        endpoint = f"/api/v1/sandbox/{ctx.chat.sandbox_id}/files/tree"
+
+        first = await ctx.client.get(
+            endpoint, params={"limit": 1}, headers=ctx.auth_headers
+        )
+        first_data = first.json()
+        assert len(first_data["files"]) == 1
+        assert first_data["next_cursor"] == first_data["files"][0]["path"]
+
+        second = await ctx.client.get(
+            endpoint,
+            params={"limit": 1, "cursor": first_data["next_cursor"]},
+            headers=ctx.auth_headers,
+        )
+        second_data = second.json()
+        assert len(second_data["files"]) == 1
+        assert second_data["files"][0]["path"] > first_data["files"][0]["path"]
+
+    async def test_get_file_changes(
+        self,
+        sandbox_test_context: SandboxTestContext,
+    ) -> None:
+        ctx = sandbox_test_context
+        tree = (
+            await ctx.client.get(
+                f"/api/v1/sandbox/{ctx.chat.sandbox_id}/files/tree",
+                headers=ctx.auth_headers,
+            )
+        ).json()
+        test_filename = f"changes_test_{ctx.provider}.txt"
+        await self._write(ctx, test_filename)
+
+        response = await ctx.client.get(
+            f"/api/v1/sandbox/{ctx.chat.sandbox_id}/files/changes",
+            params={"index": tree["index"], "since": tree["version"], "wait": 5},
+            headers=ctx.auth_headers,
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        # Images without the sandbox agent have no deltas and send a reset
+        assert data["reset"] or test_filename in [c["path"] for c in data["changes"]]
+
+    async def test_get_file_changes_for_unknown_index(
+        self,
+        sandbox_test_context: SandboxTestContext,
+    ) -> None:
+        ctx = sandbox_test_context
+        response = await ctx.client.get(
+            f"/api/v1/sandbox/{ctx.chat.sandbox_id}/files/changes",
+            params={"index": "unknown", "since": 1},
+            headers=ctx.auth_headers,
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["reset"] is True
+        assert data["index"] != "unknown"
+
+    async def test_stream_file_changes(
+        self,
+        sandbox_test_context: SandboxTestContext,
+    ) -> None:
+        # The SSE endpoint wraps this generator; the test client would wait
+        # for the never-ending response, so the stream is read at the source
+        ctx = sandbox_test_context
+        tree = await ctx.service.get_file_tree(ctx.chat.sandbox_id)
+        test_filename = f"stream_test_{ctx.provider}.txt"
+        stream = ctx.service.stream_file_changes(
+            ctx.chat.sandbox_id, tree.index, tree.version
+        )
+        await self._write(ctx, test_filename)
+
+        change_set = await asyncio.wait_for(anext(stream), timeout=70)
+
+        assert change_set.reset or test_filename in [
+            change.path for change in change_set.changes
+        ]
+
+
+class TestSandboxRawFile:
+    async def _raw(
+        self,
+        ctx: SandboxTestContext,
+        headers: dict[str, str] | None = None,
+        **params: int,
+    ) -> Response:
+        filename = f"raw_test_{ctx.provider}.txt"
+        await ctx.client.put(
+            f"/api/v1/sandbox/{ctx.chat.sandbox_id}/files",
+            json={"file_path": f"/home/user/{filename}", "content": "0123456789"},
+            headers=ctx.auth_headers,
+        )
+        return await ctx.client.get(
+            f"/api/v1/sandbox/{ctx.chat.sandbox_id}/files/raw/{filename}",
+            params=params,
+            headers={**ctx.auth_headers, **(headers or {})},
+        )
+
+    async def test_whole_file(
+        self,
+        sandbox_test_context: SandboxTestContext,
+    ) -> None:
+        response = await self._raw(sandbox_test_context)
+
+        assert response.status_code == 200
+        assert response.content == b"0123456789"
+        assert response.headers["x-file-size"] == "10"
+        assert response.headers["content-security-policy"] == "sandbox"
+        assert response.headers["content-disposition"].startswith("inline;")
+
+    @pytest.mark.parametrize(
+        "range_header,body,content_range",
+        [
+            ("bytes=2-4", b"234", "bytes 2-4/10"),
+            ("bytes=7-", b"789", "bytes 7-9/10"),
+            ("bytes=-2", b"89", "bytes 8-9/10"),
+        ],
+    )
+    async def test_range(
+        self,
+        sandbox_test_context: SandboxTestContext,
+        range_header: str,
+        body: bytes,
+        content_range: str,
+    ) -> None:
+        response = await self._raw(sandbox_test_context, {"Range": range_header})
+
+        assert response.status_code == 206
+        assert response.content == body
+        assert response.headers["content-range"] == content_range
+
+    async def test_unsatisfiable_range(
+        self,
+        sandbox_test_context: SandboxTestContext,
+    ) -> None:
+        response = await self._raw(sandbox_test_context, {"Range": "bytes=20-"})
+
+        assert response.status_code == 416
+        assert response.headers["content-range"] == "bytes */10"
+
+    @pytest.mark.parametrize(
+        "params,body",
+        [
+            ({"head": 3}, b"012"),
+            ({"tail": 3}, b"789"),
+            ({"head": 5, "max_bytes": 2}, b"01"),
+            ({"tail": 5, "max_bytes": 2}, b"89"),
+            ({"max_bytes": 4}, b"0123"),
+        ],
+    )
+    async def test_windows(
+        self,
+        sandbox_test_context: SandboxTestContext,
+        params: dict[str, int],
+        body: bytes,
+    ) -> None:
+        response = await self._raw(sandbox_test_context, **params)
+
+        assert response.status_code == 200
+        assert response.content == body
+
+    async def test_head_and_tail_together(
+        self,
+        sandbox_test_context: SandboxTestContext,
+    ) -> None:
+        response = await self._raw(sandbox_test_context, head=1, tail=1)
+
+        assert response.status_code == 400
+
+
+class TestFileMediaType:
+    @pytest.mark.parametrize(
+        "file_path,media_type,inline",
+        [
+            ("notes.txt", "text/plain", True),
+            ("data.json", "application/json", True),
+            ("photo.png", "image/png", True),
+            ("page.html", "text/plain", True),
+            ("script.py", "text/plain", True),
+            ("icon.svg", "application/octet-stream", False),
+            ("report.pdf", "application/octet-stream", False),
+        ],
+    )
+    def test_only_safe_types_are_served_as_is(
+        self, file_path: str, media_type: str, inline: bool
+    ) -> None:
+        assert _file_media_type(file_path) == (media_type, inline)
+
 
 class TestSandboxSecrets:
     async def test_get_secrets(
@@ -259,6 +510,10 @@ class TestSandboxUnauthorized:
             ("GET", "/files/metadata", None),
             ("PUT", "/files", {"file_path": "/test.txt", "content": "test"}),
             ("GET", "/files/content/test.txt", None),
+            ("GET", "/files/tree", None),
+            ("GET", "/files/changes", None),
+            ("GET", "/files/changes/stream", None),
+            ("GET", "/files/raw/test.txt", None),
             ("GET", "/secrets", None),
             ("POST", "/secrets", {"key": "TEST", "value": "test"}),
             ("PUT", "/secrets/TEST", {"value": "updated"}),
@@ -300,6 +555,10 @@ class TestSandboxNotFound:
             ("GET", "/files/metadata", None),
             ("PUT", "/files", {"file_path": "/test.txt", "content": "test"}),
             ("GET", "/files/content/test.txt", None),
+            ("GET", "/files/tree", None),
+            ("GET", "/files/changes", None),
+            ("GET", "/files/changes/stream", None),
+            ("GET", "/files/raw/test.txt", None),
             ("GET", "/secrets", None),
             ("POST", "/secrets", {"key": "TEST", "value": "test"}),
             ("PUT", "/secrets/TEST", {"value": "updated"}),
@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import socket
+from collections.abc import AsyncIterator
+from typing import Any
+
+import pytest
+import pytest_asyncio
+
+from app.services.sandbox import DockerConfig, LocalDockerProvider
+from app.services.sandbox.agent import (
+    AGENT_READ_CHUNK_SIZE,
+    SandboxAgentClient,
+    SandboxAgentError,
+    SandboxAgentRequestError,
+    agent_loop,
+    encode_content,
+)
+from app.services.sandbox.types import FileMetadata
+from app.services.sandbox.exec_socket import AsyncExecSocket
+from app.services.sandbox.framing import STREAM_STDOUT
+
+
+def _frame(stream_type: int, payload: bytes) -> bytes:
+    return bytes([stream_type, 0, 0, 0]) + len(payload).to_bytes(4, "big") + payload
+
+
+class _AgentPeer:
+    # The sandbox side of the exec stream
+    def __init__(self, sock: socket.socket) -> None:
+        self._sock = sock
+        self._sock.setblocking(False)
+        self._buffer = b""
+
+    async def request(self) -> dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        while b"\n" not in self._buffer:
+            data = await loop.sock_recv(self._sock, 65536)
+            if not data:
+                raise ConnectionError("Client closed the stream")
+            self._buffer += data
+        line, self._buffer = self._buffer.split(b"\n", 1)
+        return dict(json.loads(line))
+
+    async def reply(self, request_id: int, **response: Any) -> None:
+        payload = json.dumps({"id": request_id, **response}).encode() + b"\n"
+        loop = asyncio.get_running_loop()
+        await loop.sock_sendall(self._sock, _frame(STREAM_STDOUT, payload))
+
+    def close(self) -> None:
+        self._sock.close()
+
+
+async def _attach(sock: socket.socket) -> SandboxAgentClient:
+    async def create() -> SandboxAgentClient:
+        return SandboxAgentClient("exec-1", sock, AsyncExecSocket(sock))
+
+    return await agent_loop.run(create())
+
+
+@pytest_asyncio.fixture
+async def agent_pair() -> AsyncIterator[tuple[SandboxAgentClient, _AgentPeer]]:
+    client_sock, peer_sock = socket.socketpair()
+    client = await _attach(client_sock)
+    peer = _AgentPeer(peer_sock)
+    try:
+        yield client, peer
+    finally:
+        client.discard()
+        peer.close()
+
+
+class TestSandboxAgentClient:
+    async def test_replies_are_matched_out_of_order(
+        self, agent_pair: tuple[SandboxAgentClient, _AgentPeer]
+    ) -> None:
+        client, peer = agent_pair
+
+        first = asyncio.ensure_future(client.call("stat", {"path": "a"}))
+        second = asyncio.ensure_future(client.call("stat", {"path": "b"}))
+        requests = [await peer.request(), await peer.request()]
+        for request in reversed(requests):
+            await peer.reply(
+                request["id"], ok=True, result={"path": request["params"]["path"]}
+            )
+
+        assert await first == {"path": "a"}
+        assert await second == {"path": "b"}
+
+    async def test_error_reply_raises_with_code(
+        self, agent_pair: tuple[SandboxAgentClient, _AgentPeer]
+    ) -> None:
+        client, peer = agent_pair
+
+        call = asyncio.ensure_future(client.call("read", {"path": "missing"}))
+        request = await peer.request()
+        await peer.reply(request["id"], ok=False, error="No such file", code="ENOENT")
+
+        with pytest.raises(SandboxAgentRequestError) as exc_info:
+            await call
+        assert exc_info.value.code == "ENOENT"
+        assert client.usable
+
+    async def test_closed_stream_fails_pending_calls(
+        self, agent_pair: tuple[SandboxAgentClient, _AgentPeer]
+    ) -> None:
+        client, peer = agent_pair
+
+        call = asyncio.ensure_future(client.call("ping"))
+        await peer.request()
+        peer.close()
+
+        with pytest.raises(SandboxAgentError):
+            await asyncio.wait_for(call, timeout=5)
+        assert not client.usable
+
+    async def test_serves_calls_from_another_event_loop(
+        self, agent_pair: tuple[SandboxAgentClient, _AgentPeer]
+    ) -> None:
+        # Each Celery task runs on a loop of its own
+        client, peer = agent_pair
+
+        async def answer() -> None:
+            request = await peer.request()
+            await peer.reply(request["id"], ok=True, result={"pong": True})
+
+        answering = asyncio.ensure_future(answer())
+        result = await asyncio.to_thread(asyncio.run, client.call("ping"))
+        await answering
+
+        assert result == {"pong": True}
+        assert client.usable
+
+
+class TestAgentRead:
+    async def test_reads_large_files_in_chunks(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        provider = LocalDockerProvider(DockerConfig())
+        content = b"x" * (AGENT_READ_CHUNK_SIZE + 10)
+        requests: list[dict[str, Any]] = []
+
+        async def agent_call(
+            sandbox_id: str, op: str, params: dict[str, Any]
+        ) -> dict[str, Any]:
+            requests.append(params)
+            offset = params["offset"]
+            window = content[offset : offset + params["length"]]
+            return {"content": encode_content(window)}
+
+        monkeypatch.setattr(provider, "_agent_call", agent_call)
+
+        assert await provider._agent_read("sandbox", "/home/user/big") == content
+        assert [params["offset"] for params in requests] == [
+            0,
+            AGENT_READ_CHUNK_SIZE,
+        ]
+
+
+class TestFileTreeFallback:
+    @pytest.mark.parametrize("path", ["src", "/src", "/home/user/src"])
+    async def test_subtree_paths_match_the_agent(
+        self, monkeypatch: pytest.MonkeyPatch, path: str
+    ) -> None:
+        provider = LocalDockerProvider(DockerConfig())
+
+        async def agent_call(
+            sandbox_id: str, op: str, params: dict[str, Any]
+        ) -> dict[str, Any] | None:
+            return None
+
+        async def list_files(sandbox_id: str) -> list[FileMetadata]:
+            return [
+                FileMetadata(path=name, type=kind, size=0, modified=0)
+                for name, kind in [
+                    ("README.md", "file"),
+                    ("src", "directory"),
+                    ("src/app.py", "file"),
+                    ("src/lib", "directory"),
+                    ("src/lib/util.py", "file"),
+                    ("srcs/other.py", "file"),
+                ]
+            ]
+
+        monkeypatch.setattr(provider, "_agent_call", agent_call)
+        monkeypatch.setattr(provider, "list_files", list_files)
+
+        page = await provider.get_file_tree("sandbox", path, depth=1)
+
+        assert [entry.path for entry in page.entries] == ["src/app.py", "src/lib"]
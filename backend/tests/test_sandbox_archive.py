@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import io
+import tarfile
+import time
+import zipfile
+from collections.abc import Iterator
+
+import pytest
+
+from app.services.sandbox.archive import tar_to_zip
+
+
+def _tar_chunks(members: list[tuple[tarfile.TarInfo, bytes]]) -> Iterator[bytes]:
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w") as tar:
+        for info, data in members:
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data) if info.isfile() else None)
+    data = buffer.getvalue()
+    for start in range(0, len(data), 1000):
+        yield data[start : start + 1000]
+
+
+def _file(name: str, mode: int = 0o644, mtime: float = 1700000000) -> tarfile.TarInfo:
+    info = tarfile.TarInfo(name)
+    info.mode = mode
+    info.mtime = mtime
+    return info
+
+
+def _dir(name: str) -> tarfile.TarInfo:
+    info = tarfile.TarInfo(name)
+    info.type = tarfile.DIRTYPE
+    return info
+
+
+def _to_zip(members: list[tuple[tarfile.TarInfo, bytes]]) -> zipfile.ZipFile:
+    return zipfile.ZipFile(io.BytesIO(b"".join(tar_to_zip(_tar_chunks(members)))))
+
+
+@pytest.fixture
+def timezone_west_of_utc(monkeypatch: pytest.MonkeyPatch) -> Iterator[None]:
+    monkeypatch.setenv("TZ", "America/New_York")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+class TestTarToZip:
+    def test_keeps_regular_files_with_contents_and_modes(self) -> None:
+        large = bytes(range(256)) * 4096
+        archive = _to_zip(
+            [
+                (_dir("./src"), b""),
+                (_file("./src/main.py"), b"print('hi')\n"),
+                (_file("./run.sh", mode=0o755), b"#!/bin/sh\n"),
+                (_file("./big.bin"), large),
+            ]
+        )
+
+        assert archive.namelist() == ["src/main.py", "run.sh", "big.bin"]
+        assert archive.read("src/main.py") == b"print('hi')\n"
+        assert archive.read("big.bin") == large
+        assert archive.getinfo("run.sh").external_attr >> 16 == 0o755
+        assert archive.testzip() is None
+
+    @pytest.mark.usefixtures("timezone_west_of_utc")
+    def test_clamps_timestamps_zip_cannot_store(self) -> None:
+        archive = _to_zip(
+            [
+                (_file("old.txt", mtime=0), b"old"),
+                (_file("future.txt", mtime=2**33), b"future"),
+            ]
+        )
+
+        assert archive.getinfo("old.txt").date_time == (1980, 1, 1, 0, 0, 0)
+        assert archive.getinfo("future.txt").date_time == (2107, 12, 31, 23, 59, 58)
+        assert archive.read("old.txt") == b"old"
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+from app.services.sandbox.framing import (
+    STREAM_STDERR,
+    STREAM_STDOUT,
+    AdaptiveReadSize,
+    DockerFrameDemuxer,
+)
+
+
+def _frame(stream_type: int, payload: bytes) -> bytes:
+    return bytes([stream_type, 0, 0, 0]) + len(payload).to_bytes(4, "big") + payload
+
+
+class TestDockerFrameDemuxer:
+    def test_joins_adjacent_frames_of_one_stream(self) -> None:
+        demuxer = DockerFrameDemuxer(max_frame_size=1024)
+
+        chunks = demuxer.feed(
+            _frame(STREAM_STDOUT, b"hello ")
+            + _frame(STREAM_STDOUT, b"world")
+            + _frame(STREAM_STDERR, b"oops")
+        )
+
+        assert chunks == [(STREAM_STDOUT, "hello world"), (STREAM_STDERR, "oops")]
+        assert demuxer.buffered == 0
+
+    def test_header_split_across_reads(self) -> None:
+        demuxer = DockerFrameDemuxer(max_frame_size=1024)
+        data = _frame(STREAM_STDOUT, b"payload")
+
+        assert demuxer.feed(data[:3]) == []
+        assert demuxer.feed(data[3:6]) == []
+        assert demuxer.buffered == 6
+        assert demuxer.feed(data[6:]) == [(STREAM_STDOUT, "payload")]
+        assert demuxer.buffered == 0
+
+    def test_multibyte_character_split_across_frames(self) -> None:
+        demuxer = DockerFrameDemuxer(max_frame_size=1024)
+        encoded = "naïve ✓".encode()
+        split = encoded.index("✓".encode()) + 1
+
+        first = demuxer.feed(_frame(STREAM_STDOUT, encoded[:split]))
+        second = demuxer.feed(_frame(STREAM_STDOUT, encoded[split:]))
+
+        assert first == [(STREAM_STDOUT, "naïve ")]
+        assert second == [(STREAM_STDOUT, "✓")]
+
+    def test_multibyte_streams_decode_independently(self) -> None:
+        demuxer = DockerFrameDemuxer(max_frame_size=1024)
+        check = "✓".encode()
+
+        chunks = demuxer.feed(
+            _frame(STREAM_STDOUT, check[:1])
+            + _frame(STREAM_STDERR, b"err")
+            + _frame(STREAM_STDOUT, check[1:])
+        )
+
+        assert chunks == [(STREAM_STDERR, "err"), (STREAM_STDOUT, "✓")]
+
+    def test_flush_replaces_truncated_character(self) -> None:
+        demuxer = DockerFrameDemuxer(max_frame_size=1024)
+
+        assert demuxer.feed(_frame(STREAM_STDOUT, "✓".encode()[:2])) == []
+        assert demuxer.flush() == [(STREAM_STDOUT, "�")]
+
+    def test_oversized_frame_drops_buffer(self) -> None:
+        demuxer = DockerFrameDemuxer(max_frame_size=16)
+
+        chunks = demuxer.feed(
+            _frame(STREAM_STDOUT, b"ok") + _frame(STREAM_STDOUT, b"x" * 17)
+        )
+
+        assert chunks == [(STREAM_STDOUT, "ok")]
+        assert demuxer.buffered == 0
+        assert demuxer.feed(_frame(STREAM_STDERR, b"next")) == [(STREAM_STDERR, "next")]
+
+
+class TestAdaptiveReadSize:
+    def test_grows_on_full_reads_up_to_maximum(self) -> None:
+        read_size = AdaptiveReadSize(minimum=1024, maximum=4096)
+
+        read_size.update(1024)
+        assert read_size.size == 2048
+        read_size.update(2048)
+        read_size.update(4096)
+        assert read_size.size == 4096
+
+    def test_shrinks_on_small_reads_down_to_minimum(self) -> None:
+        read_size = AdaptiveReadSize(minimum=1024, maximum=4096)
+        read_size.size = 4096
+
+        read_size.update(100)
+        assert read_size.size == 2048
+        read_size.update(100)
+        read_size.update(100)
+        assert read_size.size == 1024
+
+    def test_keeps_size_for_partial_reads(self) -> None:
+        read_size = AdaptiveReadSize(minimum=1024, maximum=4096)
+        read_size.size = 2048
+
+        read_size.update(1024)
+
+        assert read_size.size == 2048
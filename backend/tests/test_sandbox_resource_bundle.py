@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+import io
+import os
+import tarfile
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from app.models.types import EnabledResourceInfo
+from app.services.sandbox import resource_bundle
+from app.services.sandbox.resource_bundle import ResourceBundle, ResourceBundleCache
+
+OWNER = (1000, 1000)
+
+
+def _skill_zip(path: Path, entries: dict[str, tuple[bytes, int]]) -> Path:
+    with zipfile.ZipFile(path, "w") as skill_zip:
+        for name, (data, mode) in entries.items():
+            info = zipfile.ZipInfo(name)
+            info.external_attr = mode << 16
+            skill_zip.writestr(info, data)
+    return path
+
+
+def _command(path: Path, text: str) -> Path:
+    path.write_text(text)
+    return path
+
+
+def _resource(name: str, path: Path) -> EnabledResourceInfo:
+    return {"name": name, "path": str(path)}
+
+
+def _members(data: bytes) -> dict[str, tarfile.TarInfo]:
+    with tarfile.open(fileobj=io.BytesIO(data)) as tar:
+        return {member.name: member for member in tar}
+
+
+@pytest.fixture
+def cache(tmp_path: Path) -> ResourceBundleCache:
+    return ResourceBundleCache(tmp_path / "bundles")
+
+
+class TestResourceBundleCache:
+    def test_builds_bundle_relative_to_home(
+        self, cache: ResourceBundleCache, tmp_path: Path
+    ) -> None:
+        skill = _skill_zip(
+            tmp_path / "skill.zip",
+            {"SKILL.md": (b"# Skill", 0o644), "scripts/run.sh": (b"#!/bin/sh", 0o755)},
+        )
+        command = _command(tmp_path / "deploy.md", "Deploy it")
+
+        bundle = cache.get(
+            [_resource("tidy", skill)], [_resource("deploy", command)], [], OWNER
+        )
+
+        assert bundle is not None
+        members = _members(bundle.data)
+        assert set(members) == {
+            ".claude",
+            ".claude/skills",
+            ".claude/skills/tidy",
+            ".claude/skills/tidy/SKILL.md",
+            ".claude/skills/tidy/scripts",
+            ".claude/skills/tidy/scripts/run.sh",
+            ".claude/commands",
+            ".claude/commands/deploy.md",
+        }
+        assert members[".claude/skills/tidy/scripts/run.sh"].mode == 0o755
+        assert members[".claude/skills/tidy/SKILL.md"].mode == 0o644
+        assert (members[".claude"].uid, members[".claude"].gid) == OWNER
+        assert bundle.directories == [
+            ".claude",
+            ".claude/skills",
+            ".claude/skills/tidy",
+            ".claude/skills/tidy/scripts",
+            ".claude/commands",
+        ]
+
+    def test_skips_skill_entries_outside_the_skill(
+        self, cache: ResourceBundleCache, tmp_path: Path
+    ) -> None:
+        skill = _skill_zip(
+            tmp_path / "skill.zip",
+            {
+                "../escape.md": (b"x", 0o644),
+                "/etc/passwd": (b"x", 0o644),
+                "nested/../../escape.md": (b"x", 0o644),
+                "SKILL.md": (b"# Skill", 0o644),
+            },
+        )
+
+        bundle = cache.get([_resource("tidy", skill)], [], [], OWNER)
+
+        assert bundle is not None
+        assert [
+            name for name, member in _members(bundle.data).items() if member.isfile()
+        ] == [".claude/skills/tidy/SKILL.md"]
+
+    def test_reuses_cached_bundle(
+        self,
+        cache: ResourceBundleCache,
+        tmp_path: Path,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        command = _command(tmp_path / "deploy.md", "Deploy it")
+        first = cache.get([], [_resource("deploy", command)], [], OWNER)
+        assert first is not None
+        bundle_path = next(cache.cache_path.glob("*.tar"))
+        os.utime(bundle_path, (0, 0))
+
+        def build(*args: object) -> bytes:
+            raise AssertionError("Bundle was rebuilt")
+
+        monkeypatch.setattr(cache, "_build", build)
+        second = cache.get([], [_resource("deploy", command)], [], OWNER)
+
+        assert second is not None
+        assert second.data == first.data
+        assert bundle_path.stat().st_mtime > 0
+
+    def test_key_follows_sources_and_owner(
+        self, cache: ResourceBundleCache, tmp_path: Path
+    ) -> None:
+        command = _command(tmp_path / "deploy.md", "Deploy it")
+        commands = [_resource("deploy", command)]
+
+        cache.get([], commands, [], OWNER)
+        cache.get([], commands, [], (0, 0))
+        _command(command, "Deploy it again")
+        bundle = cache.get([], commands, [], OWNER)
+
+        assert bundle is not None
+        assert len(list(cache.cache_path.glob("*.tar"))) == 3
+        with tarfile.open(fileobj=io.BytesIO(bundle.data)) as tar:
+            member = tar.extractfile(".claude/commands/deploy.md")
+            assert member is not None
+            assert member.read() == b"Deploy it again"
+
+    def test_missing_sources_are_skipped(
+        self, cache: ResourceBundleCache, tmp_path: Path
+    ) -> None:
+        missing = [_resource("gone", tmp_path / "gone.md")]
+
+        assert cache.get([], missing, missing, OWNER) is None
+        assert not cache.cache_path.exists()
+
+    def test_prunes_least_recently_used_bundles(
+        self,
+        cache: ResourceBundleCache,
+        tmp_path: Path,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        monkeypatch.setattr(resource_bundle, "RESOURCE_BUNDLE_CACHE_MAX_ENTRIES", 2)
+        commands = [
+            [_resource(name, _command(tmp_path / f"{name}.md", name))]
+            for name in ("one", "two", "three")
+        ]
+
+        cache.get([], commands[0], [], OWNER)
+        cache.get([], commands[1], [], OWNER)
+        for path in cache.cache_path.glob("*.tar"):
+            os.utime(path, (1, 1))
+        # A hit makes the first bundle the most recently used again
+        cache.get([], commands[0], [], OWNER)
+        kept = next(
+            path for path in cache.cache_path.glob("*.tar") if path.stat().st_mtime > 1
+        )
+        cache.get([], commands[2], [], OWNER)
+
+        remaining = list(cache.cache_path.glob("*.tar"))
+        assert len(remaining) == 2
+        assert kept in remaining
+        assert not list(cache.cache_path.glob("*.tmp"))
+
+
+class TestResourceBundle:
+    def test_leaves_out_existing_directories(
+        self, cache: ResourceBundleCache, tmp_path: Path
+    ) -> None:
+        command = _command(tmp_path / "deploy.md", "Deploy it")
+        bundle = cache.get([], [_resource("deploy", command)], [], OWNER)
+        assert bundle is not None
+
+        data = bundle.without_directories({".claude"})
+
+        members = _members(data)
+        assert set(members) == {".claude/commands", ".claude/commands/deploy.md"}
+        with tarfile.open(fileobj=io.BytesIO(data)) as tar:
+            member = tar.extractfile(".claude/commands/deploy.md")
+            assert member is not None
+            assert member.read() == b"Deploy it"
+
+    def test_bundle_without_directory_entries_is_unchanged(self) -> None:
+        buffer = io.BytesIO()
+        with tarfile.open(fileobj=buffer, mode="w") as tar:
+            tar.addfile(tarfile.TarInfo(".claude/agents/a.md"), io.BytesIO(b""))
+        bundle = ResourceBundle(buffer.getvalue())
+
+        assert bundle.directories == []
+        assert bundle.without_directories({".claude"}) is bundle.data
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import asyncio
+
+from app.services.streaming.coalescer import TextEventCoalescer
+from app.services.streaming.events import StreamEvent
+
+
+def _coalescer(
+    emitted: list[StreamEvent], window_seconds: float = 60.0, max_chars: int = 1000
+) -> TextEventCoalescer:
+    async def emit(event: StreamEvent) -> None:
+        emitted.append(event)
+
+    return TextEventCoalescer(emit, window_seconds=window_seconds, max_chars=max_chars)
+
+
+class TestTextEventCoalescer:
+    async def test_merges_chunks_within_window(self) -> None:
+        emitted: list[StreamEvent] = []
+        coalescer = _coalescer(emitted, window_seconds=0.05)
+
+        for chunk in ("Hel", "lo ", "world"):
+            await coalescer.push({"type": "assistant_text", "text": chunk})
+        assert emitted == []
+
+        await asyncio.sleep(0.2)
+
+        assert emitted == [{"type": "assistant_text", "text": "Hello world"}]
+        await coalescer.close()
+
+    async def test_flushes_at_size_cap(self) -> None:
+        emitted: list[StreamEvent] = []
+        coalescer = _coalescer(emitted, max_chars=5)
+
+        await coalescer.push({"type": "assistant_text", "text": "abc"})
+        await coalescer.push({"type": "assistant_text", "text": "def"})
+        await coalescer.push({"type": "assistant_text", "text": "g"})
+
+        assert emitted == [{"type": "assistant_text", "text": "abcdef"}]
+
+        await coalescer.close()
+        assert emitted[-1] == {"type": "assistant_text", "text": "g"}
+
+    async def test_flushes_ahead_of_non_text_event(self) -> None:
+        emitted: list[StreamEvent] = []
+        coalescer = _coalescer(emitted)
+        tool_event: StreamEvent = {"type": "tool_started", "tool": {"id": "toolu_1"}}
+
+        await coalescer.push({"type": "assistant_thinking", "thinking": "plan"})
+        await coalescer.push({"type": "assistant_thinking", "thinking": "ning"})
+        await coalescer.push(tool_event)
+
+        assert emitted == [
+            {"type": "assistant_thinking", "thinking": "planning"},
+            tool_event,
+        ]
+        await coalescer.close()
+
+    async def test_flushes_when_event_type_changes(self) -> None:
+        emitted: list[StreamEvent] = []
+        coalescer = _coalescer(emitted)
+
+        await coalescer.push({"type": "assistant_thinking", "thinking": "hmm"})
+        await coalescer.push({"type": "assistant_text", "text": "answer"})
+        await coalescer.close()
+
+        assert emitted == [
+            {"type": "assistant_thinking", "thinking": "hmm"},
+            {"type": "assistant_text", "text": "answer"},
+        ]
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+import pytest
+from redis.asyncio import Redis
+
+from app.constants import REDIS_KEY_CHAT_CANCEL, REDIS_KEY_CHAT_STREAM
+from app.core.config import get_settings
+from app.services.streaming.hub import (
+    CANCELLED_EVENT,
+    ChatStreamReader,
+    StreamHub,
+    StreamSubscription,
+)
+
+settings = get_settings()
+
+
+async def _collect(
+    subscription: StreamSubscription, last_id: str | None = None
+) -> list[dict[str, Any]]:
+    async def consume() -> list[dict[str, Any]]:
+        return [event async for event in subscription.events(last_id)]
+
+    return await asyncio.wait_for(consume(), timeout=5)
+
+
+def _entry(entry_id: str, event: str = "content") -> dict[str, Any]:
+    return {"id": entry_id, "event": event, "data": entry_id}
+
+
+class TestStreamSubscription:
+    async def test_overflow_keeps_cancellation(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        monkeypatch.setattr(settings, "SSE_SUBSCRIBER_QUEUE_SIZE", 2)
+        subscription = StreamSubscription(ChatStreamReader("chat", "0-0"))
+
+        subscription.offer(_entry("1-0"))
+        subscription.offer(CANCELLED_EVENT)
+        subscription.offer(_entry("2-0"))
+
+        queued = [subscription.queue.get_nowait() for _ in range(2)]
+        assert queued[0]["event"] == "__resync__"
+        assert queued[1] is CANCELLED_EVENT
+        assert subscription.queue.empty()
+
+    async def test_overflow_keeps_incoming_terminal_event(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        monkeypatch.setattr(settings, "SSE_SUBSCRIBER_QUEUE_SIZE", 2)
+        subscription = StreamSubscription(ChatStreamReader("chat", "0-0"))
+
+        subscription.offer(_entry("1-0"))
+        subscription.offer(_entry("2-0"))
+        subscription.offer(CANCELLED_EVENT)
+
+        queued = [subscription.queue.get_nowait() for _ in range(2)]
+        assert queued[0]["event"] == "__resync__"
+        assert queued[1] is CANCELLED_EVENT
+
+    async def test_events_skip_entries_already_replayed(self) -> None:
+        subscription = StreamSubscription(ChatStreamReader("chat", "0-0"))
+        for entry_id in ("1-0", "2-0", "3-0"):
+            subscription.offer(_entry(entry_id))
+        subscription.offer(_entry("2-0"))
+        subscription.offer(_entry("4-0", event="complete"))
+
+        events = await _collect(subscription, last_id="2-0")
+
+        assert [event["id"] for event in events] == ["3-0", "4-0"]
+
+
+class TestStreamHub:
+    async def test_subscribers_share_one_reader(self, redis_client: Redis[str]) -> None:
+        hub = StreamHub()
+        stream_name = REDIS_KEY_CHAT_STREAM.format(chat_id="hub-shared")
+        await redis_client.xadd(stream_name, {"kind": "content", "payload": "old"})
+
+        async with hub.subscribe("hub-shared") as first:
+            async with hub.subscribe("hub-shared") as second:
+                assert hub.reader_count == 1
+
+                await redis_client.xadd(
+                    stream_name, {"kind": "content", "payload": "new"}
+                )
+                await redis_client.xadd(
+                    stream_name, {"kind": "complete", "payload": "{}"}
+                )
+
+                for subscription in (first, second):
+                    events = await _collect(subscription)
+                    assert [event["data"] for event in events] == ["new", "{}"]
+                    assert events[-1]["event"] == "complete"
+
+        assert hub.reader_count == 0
+
+    async def test_chat_joining_running_reader_receives_entries(
+        self, redis_client: Redis[str]
+    ) -> None:
+        hub = StreamHub()
+        first_stream = REDIS_KEY_CHAT_STREAM.format(chat_id="hub-first")
+        second_stream = REDIS_KEY_CHAT_STREAM.format(chat_id="hub-second")
+
+        async with hub.subscribe("hub-first") as first:
+            await asyncio.sleep(0.1)
+            async with hub.subscribe("hub-second") as second:
+                assert hub.reader_count == 2
+
+                await redis_client.xadd(
+                    second_stream, {"kind": "complete", "payload": "second"}
+                )
+                await redis_client.xadd(
+                    first_stream, {"kind": "complete", "payload": "first"}
+                )
+
+                assert [event["data"] for event in await _collect(second)] == ["second"]
+                assert [event["data"] for event in await _collect(first)] == ["first"]
+
+    async def test_cancellation_reaches_subscribers(
+        self, redis_client: Redis[str]
+    ) -> None:
+        hub = StreamHub()
+
+        async with hub.subscribe("hub-cancel") as subscription:
+            async with asyncio.timeout(5):
+                while not await redis_client.pubsub_numpat():
+                    await asyncio.sleep(0.05)
+
+            await redis_client.publish(
+                REDIS_KEY_CHAT_CANCEL.format(chat_id="hub-other"), "cancel"
+            )
+            await redis_client.publish(
+                REDIS_KEY_CHAT_CANCEL.format(chat_id="hub-cancel"), "cancel"
+            )
+
+            assert await _collect(subscription) == [CANCELLED_EVENT]
+
+    async def test_last_subscriber_stops_reader(self, redis_client: Redis[str]) -> None:
+        hub = StreamHub()
+
+        async with hub.subscribe("hub-stop"):
+            assert hub.reader_count == 1
+
+        assert hub.reader_count == 0
+        async with asyncio.timeout(5):
+            while await redis_client.pubsub_numpat():
+                await asyncio.sleep(0.05)
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+from typing import Any
+
+import pytest
+from redis.asyncio import Redis
+
+from app.constants import (
+    REDIS_KEY_SANDBOX_WARM_POOL,
+    REDIS_KEY_SANDBOX_WARM_POOL_REFILL_LOCK,
+)
+from app.core.config import get_settings
+from app.services.sandbox.warm_pool import WarmSandboxPool
+
+settings = get_settings()
+
+
+class _FakeProvider:
+    def __init__(self, live: set[str]) -> None:
+        self.live = live
+        self.deleted: list[str] = []
+        self.ide_starts = 0
+
+    async def connect_sandbox(self, sandbox_id: str, start_ide: bool = True) -> bool:
+        if start_ide:
+            self.ide_starts += 1
+        return sandbox_id in self.live
+
+    async def delete_sandbox(self, sandbox_id: str) -> None:
+        self.deleted.append(sandbox_id)
+        self.live.discard(sandbox_id)
+
+
+class _FakeSandboxService:
+    def __init__(self) -> None:
+        self.provider = _FakeProvider(set())
+        self.created = 0
+
+    async def create_warm_sandbox(self) -> str:
+        self.created += 1
+        sandbox_id = f"warm-{self.created}"
+        self.provider.live.add(sandbox_id)
+        return sandbox_id
+
+
+@pytest.fixture
+def pool_bounds(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "SANDBOX_WARM_POOL_MIN_SIZE", 1)
+    monkeypatch.setattr(settings, "SANDBOX_WARM_POOL_MAX_SIZE", 3)
+
+
+@pytest.mark.usefixtures("pool_bounds")
+class TestWarmSandboxPool:
+    async def test_claim_skips_stale_sandboxes(self, redis_client: Redis[str]) -> None:
+        pool = WarmSandboxPool()
+        provider: Any = _FakeProvider({"live"})
+        await redis_client.rpush(REDIS_KEY_SANDBOX_WARM_POOL, "gone", "live")
+
+        assert await pool.claim(provider) == "live"
+        assert provider.ide_starts == 0
+        assert await redis_client.llen(REDIS_KEY_SANDBOX_WARM_POOL) == 0
+        assert (pool.hits, pool.misses) == (1, 0)
+
+    async def test_claim_from_empty_pool_is_a_miss(
+        self, redis_client: Redis[str]
+    ) -> None:
+        pool = WarmSandboxPool()
+        provider: Any = _FakeProvider(set())
+
+        assert await pool.claim(provider) is None
+        assert (pool.hits, pool.misses) == (0, 1)
+
+    async def test_claim_disabled_pool(
+        self, redis_client: Redis[str], monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        monkeypatch.setattr(settings, "SANDBOX_WARM_POOL_MAX_SIZE", 0)
+        pool = WarmSandboxPool()
+        provider: Any = _FakeProvider({"live"})
+        await redis_client.rpush(REDIS_KEY_SANDBOX_WARM_POOL, "live")
+
+        assert await pool.claim(provider) is None
+        assert await redis_client.llen(REDIS_KEY_SANDBOX_WARM_POOL) == 1
+
+    async def test_refill_tops_up_to_max(self, redis_client: Redis[str]) -> None:
+        pool = WarmSandboxPool()
+        service: Any = _FakeSandboxService()
+        await redis_client.rpush(REDIS_KEY_SANDBOX_WARM_POOL, "existing")
+
+        await pool._refill(service)
+
+        assert await redis_client.lrange(REDIS_KEY_SANDBOX_WARM_POOL, 0, -1) == [
+            "existing",
+            "warm-1",
+            "warm-2",
+        ]
+        assert pool.size == 3
+
+    async def test_refill_fills_empty_pool_without_min(
+        self, redis_client: Redis[str], monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        monkeypatch.setattr(settings, "SANDBOX_WARM_POOL_MIN_SIZE", 0)
+        pool = WarmSandboxPool()
+        service: Any = _FakeSandboxService()
+
+        await pool._refill(service)
+
+        assert service.created == 3
+        assert await redis_client.llen(REDIS_KEY_SANDBOX_WARM_POOL) == 3
+
+    async def test_refill_leaves_pool_above_min(self, redis_client: Redis[str]) -> None:
+        pool = WarmSandboxPool()
+        service: Any = _FakeSandboxService()
+        await redis_client.rpush(REDIS_KEY_SANDBOX_WARM_POOL, "a", "b")
+
+        await pool._refill(service)
+
+        assert service.created == 0
+        assert await redis_client.llen(REDIS_KEY_SANDBOX_WARM_POOL) == 2
+
+    async def test_refill_skipped_while_locked(self, redis_client: Redis[str]) -> None:
+        pool = WarmSandboxPool()
+        service: Any = _FakeSandboxService()
+        await redis_client.set(REDIS_KEY_SANDBOX_WARM_POOL_REFILL_LOCK, "other")
+
+        await pool._refill(service)
+
+        assert service.created == 0
+        assert (
+            await redis_client.get(REDIS_KEY_SANDBOX_WARM_POOL_REFILL_LOCK) == "other"
+        )
+
+    async def test_refill_trims_above_max(self, redis_client: Redis[str]) -> None:
+        pool = WarmSandboxPool()
+        service: Any = _FakeSandboxService()
+        await redis_client.rpush(REDIS_KEY_SANDBOX_WARM_POOL, "a", "b", "c", "d", "e")
+
+        await pool._refill(service)
+
+        assert await redis_client.lrange(REDIS_KEY_SANDBOX_WARM_POOL, 0, -1) == [
+            "a",
+            "b",
+            "c",
+        ]
+        assert service.provider.deleted == ["e", "d"]
+        assert pool.size == 3
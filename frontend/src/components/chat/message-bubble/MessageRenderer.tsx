@@ -3,7 +3,7 @@ import { parseEventLog } from '@/utils/stream';
 import { MarkDown } from '@/components/ui';
 import { ThinkingBlock } from './ThinkingBlock';
 import { ReviewBlock } from './ReviewBlock';
-import { getToolComponent } from '@/components/chat/tools/registry';
+import { ToolRenderer } from '@/components/chat/tools/ToolRenderer';
 import { buildSegments } from './segmentBuilder';
 
 interface MessageRendererProps {
@@ -73,10 +73,9 @@ const MessageRendererInner: React.FC<MessageRendererProps> = ({
             );
           }
           case 'tool': {
-            const Component = getToolComponent(segment.tool.name);
             return (
               <div key={segment.id} className="mb-3 mt-1">
-                <Component tool={segment.tool} chatId={chatId} />
+                <ToolRenderer tool={segment.tool} chatId={chatId} />
               </div>
             );
           }
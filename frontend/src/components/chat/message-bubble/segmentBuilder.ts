@@ -103,6 +103,7 @@ const createToolAggregate = (
   parentId,
   input: (payload.input || null) as Record<string, unknown> | null,
   result: payload.result,
+  resultRef: payload.result_ref,
   error: payload.error,
   children: [],
 });
@@ -261,6 +262,7 @@ const processExistingTool = (
     status: toolStatus,
     input: payload.input ? (payload.input as Record<string, unknown>) : existingAggregate.input,
     result: payload.result !== undefined ? payload.result : existingAggregate.result,
+    resultRef: payload.result_ref ?? existingAggregate.resultRef,
     error: payload.error || existingAggregate.error,
   };
 
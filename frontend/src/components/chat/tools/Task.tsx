@@ -2,13 +2,14 @@ import React, { useState, useEffect } from 'react';
 import { Bot } from 'lucide-react';
 import type { ToolAggregate } from '@/types';
 import { ToolCard, CollapsibleButton } from './common';
-import { getToolComponent } from './registry';
+import { ToolRenderer } from './ToolRenderer';
 
 interface TaskProps {
   tool: ToolAggregate;
+  chatId?: string;
 }
 
-export const Task: React.FC<TaskProps> = ({ tool }) => {
+export const Task: React.FC<TaskProps> = ({ tool, chatId }) => {
   const [promptExpanded, setPromptExpanded] = useState(false);
   const [toolsExpanded, setToolsExpanded] = useState(false);
 
@@ -83,17 +84,14 @@ export const Task: React.FC<TaskProps> = ({ tool }) => {
                 />
                 {toolsExpanded && (
                   <div className="space-y-2">
-                    {tool.children.map((childTool) => {
-                      const Component = getToolComponent(childTool.name);
-                      return (
-                        <div
-                          key={childTool.id}
-                          className="border-l border-border/60 pl-2 dark:border-border-dark/60"
-                        >
-                          <Component tool={childTool} />
-                        </div>
-                      );
-                    })}
+                    {tool.children.map((childTool) => (
+                      <div
+                        key={childTool.id}
+                        className="border-l border-border/60 pl-2 dark:border-border-dark/60"
+                      >
+                        <ToolRenderer tool={childTool} chatId={chatId} />
+                      </div>
+                    ))}
                   </div>
                 )}
               </div>
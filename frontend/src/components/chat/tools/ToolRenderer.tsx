@@ -0,0 +1,31 @@
+import React, { useCallback, useMemo, useState } from 'react';
+import type { ToolAggregate } from '@/types';
+import { useToolResultQuery } from '@/hooks/queries';
+import { ToolResultRequestContext } from './common';
+import { getToolComponent } from './registry';
+
+interface ToolRendererProps {
+  tool: ToolAggregate;
+  chatId?: string;
+}
+
+// Results above the backend offload threshold arrive as a truncated preview plus
+// a result_ref; the full result is fetched once the tool card is expanded, so
+// tool components see the real value without every large result loading with history.
+export const ToolRenderer: React.FC<ToolRendererProps> = ({ tool, chatId }) => {
+  const Component = getToolComponent(tool.name);
+  const [fullResultRequested, setFullResultRequested] = useState(false);
+  const requestFullResult = useCallback(() => setFullResultRequested(true), []);
+  const { data: fullResult } = useToolResultQuery(chatId, tool, { enabled: fullResultRequested });
+
+  const resolvedTool = useMemo(
+    () => (fullResult === undefined ? tool : { ...tool, result: fullResult }),
+    [tool, fullResult],
+  );
+
+  return (
+    <ToolResultRequestContext.Provider value={tool.resultRef ? requestFullResult : null}>
+      <Component tool={resolvedTool} chatId={chatId} />
+    </ToolResultRequestContext.Provider>
+  );
+};
@@ -1,6 +1,7 @@
 import React, { JSX, memo, useState } from 'react';
 import { CheckCircle2, ChevronDown, ChevronRight, Circle, X } from 'lucide-react';
 import type { ToolEventStatus } from '@/types';
+import { useRequestFullResult } from './toolResultContext';
 
 const statusIcon: Record<ToolEventStatus, JSX.Element> = {
   completed: <CheckCircle2 className="h-4 w-4 text-success-600 dark:text-success-400" />,
@@ -44,6 +45,7 @@ const ToolCardInner: React.FC<ToolCardProps> = ({
 
   const hasExpandableContent = expandable && children;
   const showChildren = !expandable || expanded;
+  useRequestFullResult(Boolean(hasExpandableContent) && expanded);
 
   const headerContent = (
     <>
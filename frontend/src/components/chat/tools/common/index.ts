@@ -3,3 +3,4 @@ export * from './ExpandableSection';
 export * from './DiffViewer';
 export * from './CollapsibleButton';
 export * from './ReviewInput';
+export * from './toolResultContext';
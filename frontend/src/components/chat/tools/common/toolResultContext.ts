@@ -0,0 +1,13 @@
+import { createContext, useContext, useEffect } from 'react';
+
+// Offloaded tool results are only downloaded once a card shows them: an expanded
+// ToolCard asks the enclosing ToolRenderer for the full result through this context.
+export const ToolResultRequestContext = createContext<(() => void) | null>(null);
+
+export function useRequestFullResult(active: boolean) {
+  const requestFullResult = useContext(ToolResultRequestContext);
+
+  useEffect(() => {
+    if (active) requestFullResult?.();
+  }, [active, requestFullResult]);
+}
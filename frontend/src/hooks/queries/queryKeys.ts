@@ -3,6 +3,8 @@ export const queryKeys = {
   chat: (chatId: string) => ['chat', chatId] as const,
   messages: (chatId: string) => ['messages', chatId] as const,
   contextUsage: (chatId: string) => ['chat', chatId, 'context-usage'] as const,
+  toolResult: (chatId: string, toolUseId: string) =>
+    ['chat', chatId, 'tool-result', toolUseId] as const,
   auth: {
     user: 'auth-user',
     usage: 'auth-usage',
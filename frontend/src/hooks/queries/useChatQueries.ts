@@ -7,6 +7,7 @@ import type {
   CreateChatRequest,
   ForkChatResponse,
   PaginatedChats,
+  ToolAggregate,
 } from '@/types';
 import { queryKeys } from './queryKeys';
 
@@ -65,6 +66,21 @@ export const useContextUsageQuery = (
   });
 };
 
+export const useToolResultQuery = (
+  chatId: string | undefined,
+  tool: ToolAggregate,
+  options?: { enabled?: boolean },
+) => {
+  const resultRef = tool.resultRef;
+
+  return useQuery({
+    queryKey: queryKeys.toolResult(chatId ?? '', tool.id),
+    queryFn: () => chatService.getToolResult(chatId!, tool.id, resultRef!.is_json),
+    enabled: !!chatId && !!resultRef && (options?.enabled ?? true),
+    staleTime: Infinity,
+  });
+};
+
 export const useCreateChatMutation = (
   options?: UseMutationOptions<Chat, Error, CreateChatRequest>,
 ) => {
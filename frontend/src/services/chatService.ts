@@ -198,6 +198,17 @@ async function forkChat(chatId: string, messageId: string): Promise<ForkChatResp
   });
 }
 
+async function getToolResult(chatId: string, toolUseId: string, isJson: boolean): Promise<unknown> {
+  validateId(chatId, 'Chat ID');
+  validateRequired(toolUseId, 'Tool use ID');
+
+  return serviceCall(async () => {
+    const blob = await apiClient.getBlob(`/chat/chats/${chatId}/tool-results/${toolUseId}`);
+    const text = await blob.text();
+    return isJson ? JSON.parse(text) : text;
+  });
+}
+
 async function getContextUsage(chatId: string): Promise<ContextUsage> {
   validateId(chatId, 'Chat ID');
 
@@ -297,6 +308,7 @@ export const chatService = {
   deleteAllChats,
   restoreToCheckpoint,
   forkChat,
+  getToolResult,
   getContextUsage,
   enhancePrompt,
   pinChat,
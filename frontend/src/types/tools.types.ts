@@ -1,5 +1,11 @@
 export type ToolEventStatus = 'started' | 'completed' | 'failed';
 
+export interface ToolResultRef {
+  url: string;
+  size: number;
+  is_json: boolean;
+}
+
 export interface ToolEventPayload {
   id: string;
   name: string;
@@ -8,6 +14,7 @@ export interface ToolEventPayload {
   parent_id?: string | null;
   input?: Record<string, unknown> | null;
   result?: unknown;
+  result_ref?: ToolResultRef;
   error?: string;
 }
 
@@ -19,6 +26,7 @@ export interface ToolAggregate {
   parentId?: string | null;
   input?: Record<string, unknown> | null;
   result?: unknown;
+  resultRef?: ToolResultRef;
   error?: string;
   children: ToolAggregate[];
 }
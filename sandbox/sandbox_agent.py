@@ -0,0 +1,676 @@
+#!/usr/bin/env python3
+import asyncio
+import base64
+import bisect
+import collections
+import ctypes
+import ctypes.util
+import errno
+import fnmatch
+import itertools
+import json
+import os
+import signal
+import stat
+import struct
+import sys
+import time
+
+# Requests and responses are newline-delimited JSON on stdin/stdout:
+#   {"id": 1, "op": "exec", "params": {...}}
+#   {"id": 1, "ok": true, "result": {...}}
+#   {"id": 1, "ok": false, "error": "...", "code": "ENOENT"}
+# Each request runs in its own task, so responses may arrive out of order.
+PROTOCOL_VERSION = 1
+HOME = os.environ.get("HOME", "/home/user")
+MAX_LINE_BYTES = 256 * 1024 * 1024
+# Base64 grows a read by a third; larger reads are cut short and the caller
+# asks again from the new offset
+MAX_READ_BYTES = 64 * 1024 * 1024
+
+# File index: changes kept for delta requests, and the rescan interval used
+# when inotify is unavailable or out of watches
+CHANGE_LOG_SIZE = 10000
+POLL_INTERVAL_SECONDS = 2.0
+MAX_CHANGES_WAIT_SECONDS = 60.0
+# Indexes for exclude sets nobody asked about for a while are closed, which
+# frees their inotify watches
+MAX_INDEXES = 4
+INDEX_IDLE_SECONDS = 600.0
+
+IN_MODIFY = 0x2
+IN_ATTRIB = 0x4
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_FROM = 0x40
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_DELETE_SELF = 0x400
+IN_MOVE_SELF = 0x800
+IN_Q_OVERFLOW = 0x4000
+IN_IGNORED = 0x8000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = (
+    IN_MODIFY
+    | IN_ATTRIB
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_DELETE_SELF
+    | IN_MOVE_SELF
+)
+INOTIFY_EVENT = struct.Struct("iIII")
+INOTIFY_READ_SIZE = 64 * 1024
+
+background_tasks: set[asyncio.Task] = set()
+
+
+class RequestError(Exception):
+    def __init__(self, message: str, code: str) -> None:
+        super().__init__(message)
+        self.code = code
+
+
+def spawn(coro) -> asyncio.Task:
+    # Keeps a reference so the task is not collected while it runs
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
+
+
+def encode(data: bytes) -> str:
+    return base64.b64encode(data).decode("ascii")
+
+
+def resolve(path: str) -> str:
+    return path if os.path.isabs(path) else os.path.join(HOME, path)
+
+
+async def op_ping(params: dict) -> dict:
+    return {"version": PROTOCOL_VERSION, "pid": os.getpid()}
+
+
+async def op_exec(params: dict) -> dict:
+    command = params["command"]
+    env = {**os.environ, **(params.get("env") or {})}
+    cwd = params.get("cwd") or HOME
+
+    if params.get("background"):
+        process = await asyncio.create_subprocess_exec(
+            "bash",
+            "-c",
+            command,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.DEVNULL,
+            cwd=cwd,
+            env=env,
+            start_new_session=True,
+        )
+        # Reap the child once it exits so it does not linger as a zombie
+        spawn(process.wait())
+        return {"exit_code": 0, "output": encode(b"Background process started")}
+
+    process = await asyncio.create_subprocess_exec(
+        "bash",
+        "-c",
+        command,
+        stdin=asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        cwd=cwd,
+        env=env,
+        start_new_session=True,
+    )
+    timeout = params.get("timeout")
+    try:
+        stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+    except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        await process.wait()
+        if isinstance(e, asyncio.CancelledError):
+            raise
+        raise RequestError(f"Command timed out after {timeout}s", "timeout")
+    return {"exit_code": process.returncode, "output": encode(stdout + stderr)}
+
+
+async def op_read(params: dict) -> dict:
+    path = resolve(params["path"])
+    offset = params.get("offset") or 0
+    length = min(params.get("length") or MAX_READ_BYTES, MAX_READ_BYTES)
+    with open(path, "rb") as f:
+        if offset:
+            f.seek(offset)
+        data = f.read(length)
+    return {"content": encode(data)}
+
+
+async def op_write(params: dict) -> dict:
+    path = resolve(params["path"])
+    data = base64.b64decode(params.get("content") or "")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Readers never see a half-written file
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        if "mode" in params:
+            os.chmod(tmp_path, params["mode"])
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    return {"size": len(data)}
+
+
+def file_type(mode: int) -> str:
+    # Same letters as find -printf %y
+    if stat.S_ISDIR(mode):
+        return "d"
+    if stat.S_ISREG(mode):
+        return "f"
+    if stat.S_ISLNK(mode):
+        return "l"
+    return "o"
+
+
+async def op_stat(params: dict) -> dict:
+    path = resolve(params["path"])
+    st = os.stat(path) if params.get("follow") else os.lstat(path)
+    return {
+        "type": file_type(st.st_mode),
+        "size": st.st_size,
+        "mtime": st.st_mtime,
+        "mode": st.st_mode & 0o7777,
+    }
+
+
+def is_excluded(path: str, patterns: list[str]) -> bool:
+    # Mirrors the provider's find filters: "*.ext" matches the name (-name),
+    # anything else the whole path (-path), where "*" also matches "/"
+    name = os.path.basename(path)
+    for pattern in patterns:
+        target = name if pattern.startswith("*.") else path
+        if fnmatch.fnmatchcase(target, pattern):
+            return True
+    return False
+
+
+def is_pruned(path: str, patterns: list[str]) -> bool:
+    # A path pattern ending in "*" that matches "dir/" also matches anything
+    # below dir, so there is no need to descend (e.g. "*/node_modules/*")
+    return any(
+        not pattern.startswith("*.")
+        and pattern.endswith("*")
+        and fnmatch.fnmatchcase(path + "/", pattern)
+        for pattern in patterns
+    )
+
+
+def walk(root: str, patterns: list[str], on_directory=None) -> list[list]:
+    entries: list[list] = []
+
+    def add(path: str, st: os.stat_result) -> None:
+        if not is_excluded(path, patterns):
+            kind = file_type(st.st_mode)
+            entries.append([path, kind, st.st_size, st.st_mtime])
+
+    add(root, os.lstat(root))
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        if is_pruned(directory, patterns):
+            continue
+        if on_directory is not None:
+            # Called before listing, so nothing created afterwards is missed
+            on_directory(directory)
+        try:
+            with os.scandir(directory) as it:
+                children = list(it)
+        except OSError:
+            continue
+        for entry in children:
+            try:
+                st = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            add(entry.path, st)
+            if entry.is_dir(follow_symlinks=False):
+                stack.append(entry.path)
+    return entries
+
+
+async def op_list(params: dict) -> dict:
+    root = resolve(params.get("path") or HOME).rstrip("/") or "/"
+    patterns = params.get("excludes") or []
+    loop = asyncio.get_running_loop()
+    entries = await loop.run_in_executor(None, walk, root, patterns)
+    return {"entries": entries}
+
+
+class Inotify:
+    def __init__(self) -> None:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._rm_watch = libc.inotify_rm_watch
+        self._rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._paths: dict[int, str] = {}
+
+    def watch(self, path: str) -> None:
+        wd = self._add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), path)
+        self._paths[wd] = path
+
+    def unwatch_tree(self, path: str) -> None:
+        prefix = path + "/"
+        for wd, watched in list(self._paths.items()):
+            if watched == path or watched.startswith(prefix):
+                self._rm_watch(self.fd, wd)
+                self._paths.pop(wd, None)
+
+    def read(self) -> list[tuple[int, str]]:
+        try:
+            data = os.read(self.fd, INOTIFY_READ_SIZE)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset + INOTIFY_EVENT.size <= len(data):
+            wd, mask, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+            offset += INOTIFY_EVENT.size
+            name = os.fsdecode(data[offset : offset + length].rstrip(b"\0"))
+            offset += length
+            if mask & IN_IGNORED:
+                self._paths.pop(wd, None)
+                continue
+            directory = self._paths.get(wd)
+            if mask & IN_Q_OVERFLOW or directory is None:
+                events.append((mask, ""))
+            elif name:
+                events.append((mask, os.path.join(directory, name)))
+            else:
+                events.append((mask, directory))
+        return events
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class FileIndex:
+    # Snapshot of the files under HOME, kept current by inotify (or by
+    # periodic rescans when inotify is unavailable). Every change bumps the
+    # version and is kept in a bounded log so clients can ask for deltas.
+    def __init__(self, patterns: list[str]) -> None:
+        self.id = os.urandom(6).hex()
+        self.version = 0
+        self._patterns = patterns
+        self._entries: dict[str, list] = {}
+        self._sorted: list[str] | None = None
+        self._log: collections.deque = collections.deque(maxlen=CHANGE_LOG_SIZE)
+        self._dropped_through = 0
+        self._changed = asyncio.Event()
+        self._inotify: Inotify | None = None
+        # The instance registered with the loop, kept until polling takes over
+        self._reader: Inotify | None = None
+        self._poll_task: asyncio.Task | None = None
+        # New directories being walked, with the paths that changed meanwhile
+        self._pending: dict[str, set[str]] = {}
+        self.last_used = time.monotonic()
+
+    async def start(self) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            inotify = Inotify()
+        except (OSError, AttributeError):
+            inotify = None
+
+        def scan() -> list[list]:
+            if inotify is None:
+                return walk(HOME, self._patterns)
+            return walk(HOME, self._patterns, self._watch_with(inotify))
+
+        self._entries = snapshot(await loop.run_in_executor(None, scan))
+        if self._inotify is None and inotify is not None:
+            inotify.close()
+        if self._inotify is not None:
+            self._reader = self._inotify
+            loop.add_reader(self._reader.fd, self._on_events)
+        else:
+            self._poll_task = asyncio.create_task(self._poll())
+
+    def _watch_with(self, inotify: Inotify):
+        self._inotify = inotify
+
+        def on_directory(path: str) -> None:
+            if self._inotify is None:
+                return
+            try:
+                inotify.watch(path)
+            except OSError as e:
+                # Usually the per-user watch limit; rescanning still works
+                if e.errno in (errno.ENOSPC, errno.ENOMEM):
+                    self._inotify = None
+        return on_directory
+
+    def _on_events(self) -> None:
+        inotify = self._reader
+        if inotify is None:
+            return
+        paths: set[str] = set()
+        overflow = False
+        while events := inotify.read():
+            for mask, path in events:
+                if not path:
+                    overflow = True
+                elif not mask & (IN_DELETE_SELF | IN_MOVE_SELF) or path == HOME:
+                    paths.add(path)
+        if overflow:
+            spawn(self._rescan())
+            return
+        for path in sorted(paths):
+            self._refresh(path)
+        if self._inotify is None:
+            self._start_polling()
+
+    def _start_polling(self) -> None:
+        # Ran out of watches while following new directories
+        self._stop_watching()
+        if self._poll_task is None:
+            self._poll_task = asyncio.create_task(self._poll())
+
+    def _stop_watching(self) -> None:
+        self._inotify = None
+        inotify, self._reader = self._reader, None
+        if inotify is not None:
+            asyncio.get_running_loop().remove_reader(inotify.fd)
+            inotify.close()
+
+    def _refresh(self, path: str) -> None:
+        if path == HOME:
+            return
+        for directory, changed in self._pending.items():
+            if path.startswith(directory + "/"):
+                # Applied once the walk of that directory has landed
+                changed.add(path)
+                return
+        try:
+            st = os.lstat(path)
+        except OSError:
+            self._remove_tree(path)
+            return
+        if is_excluded(path, self._patterns):
+            return
+        entry = [file_type(st.st_mode), st.st_size, st.st_mtime]
+        if entry[0] == "d" and path not in self._entries:
+            if path not in self._pending:
+                self._pending[path] = set()
+                spawn(self._index_directory(path))
+        else:
+            self._set(path, entry)
+
+    async def _index_directory(self, path: str) -> None:
+        # A new or moved-in directory: index (and watch) its contents off the
+        # loop, then replay whatever changed below it during the walk
+        watcher = self._watch_with(self._inotify) if self._inotify else None
+        loop = asyncio.get_running_loop()
+        try:
+            entries = await loop.run_in_executor(
+                None, walk, path, self._patterns, watcher
+            )
+        except OSError:
+            entries = []
+        if self._inotify is None and self._reader is not None:
+            self._start_polling()
+        changed = self._pending.pop(path, set())
+        for child in entries:
+            self._set(child[0], child[1:])
+        for child in sorted(changed):
+            self._refresh(child)
+        if not entries:
+            self._refresh(path)
+
+    async def _rescan(self) -> None:
+        loop = asyncio.get_running_loop()
+        entries = await loop.run_in_executor(None, walk, HOME, self._patterns)
+        current = snapshot(entries)
+        for path in [path for path in self._entries if path not in current]:
+            self._remove(path)
+        for path, entry in current.items():
+            self._set(path, entry)
+
+    def close(self) -> None:
+        self._stop_watching()
+        if self._poll_task is not None:
+            self._poll_task.cancel()
+        # Long polls on this index return; their next request sees a reset
+        self._changed.set()
+
+    async def _poll(self) -> None:
+        while True:
+            await asyncio.sleep(POLL_INTERVAL_SECONDS)
+            try:
+                await self._rescan()
+            except OSError:
+                pass
+
+    def _set(self, path: str, entry: list) -> None:
+        if self._entries.get(path) == entry:
+            return
+        if path not in self._entries:
+            self._sorted = None
+        self._entries[path] = entry
+        self._record(path, entry)
+
+    def _remove(self, path: str) -> None:
+        if self._entries.pop(path, None) is not None:
+            self._sorted = None
+            self._record(path, None)
+
+    def _remove_tree(self, path: str) -> None:
+        prefix = path + "/"
+        for child in [p for p in self._entries if p.startswith(prefix)]:
+            self._remove(child)
+        self._remove(path)
+        if self._inotify is not None:
+            self._inotify.unwatch_tree(path)
+
+    def _record(self, path: str, entry: list | None) -> None:
+        self.version += 1
+        if len(self._log) == self._log.maxlen:
+            self._dropped_through = self._log[0][0]
+        self._log.append((self.version, path, entry))
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def tree(self, root: str, after: str | None, limit: int, depth: int | None) -> dict:
+        if self._sorted is None:
+            self._sorted = sorted(self._entries)
+        keys = self._sorted
+        prefix = root.rstrip("/") + "/"
+        start = bisect.bisect_right(keys, resolve(after)) if after else 0
+        start = max(start, bisect.bisect_left(keys, prefix))
+        base_depth = prefix.count("/")
+
+        entries = []
+        next_cursor = None
+        for path in itertools.islice(keys, start, None):
+            if not path.startswith(prefix):
+                break
+            if depth is not None and path.count("/") - base_depth >= depth:
+                continue
+            if len(entries) == limit:
+                next_cursor = entries[-1][0]
+                break
+            entries.append([relative(path), *self._entries[path]])
+        return {
+            "index": self.id,
+            "version": self.version,
+            "entries": entries,
+            "next": next_cursor,
+        }
+
+    async def changes(
+        self, index: str | None, since: int, wait: float, limit: int
+    ) -> dict:
+        if index != self.id or since > self.version or since < self._dropped_through:
+            return {"index": self.id, "version": self.version, "reset": True}
+        if since == self.version and wait > 0:
+            try:
+                await asyncio.wait_for(self._changed.wait(), wait)
+            except asyncio.TimeoutError:
+                pass
+
+        changes = []
+        for version, path, entry in self._log:
+            if version <= since:
+                continue
+            if len(changes) == limit:
+                break
+            changes.append([version, relative(path), entry])
+        version = changes[-1][0] if len(changes) == limit else self.version
+        return {
+            "index": self.id,
+            "version": version,
+            "reset": False,
+            "changes": changes,
+        }
+
+
+def snapshot(entries: list[list]) -> dict[str, list]:
+    # The index covers what is below HOME, not HOME itself
+    return {entry[0]: entry[1:] for entry in entries if entry[0] != HOME}
+
+
+# Least recently used first
+indexes: dict[tuple, FileIndex] = {}
+index_lock = asyncio.Lock()
+
+
+def relative(path: str) -> str:
+    return os.path.relpath(path, HOME)
+
+
+async def get_index(params: dict) -> FileIndex:
+    key = tuple(params.get("excludes") or [])
+    async with index_lock:
+        index = indexes.pop(key, None)
+        if index is None:
+            index = FileIndex(list(key))
+            await index.start()
+        index.last_used = time.monotonic()
+        indexes[key] = index
+        evict_indexes()
+    return index
+
+
+def evict_indexes() -> None:
+    now = time.monotonic()
+    for key, index in list(indexes.items()):
+        if len(indexes) > MAX_INDEXES or now - index.last_used > INDEX_IDLE_SECONDS:
+            del indexes[key]
+            index.close()
+
+
+async def op_tree(params: dict) -> dict:
+    index = await get_index(params)
+    known = params.get("if_none_match")
+    if known and known == [index.id, index.version]:
+        return {"index": index.id, "version": index.version, "not_modified": True}
+    limit = params.get("limit")
+    return index.tree(
+        resolve(params.get("path") or HOME),
+        params.get("after"),
+        limit if limit is not None else len(index._entries),
+        params.get("depth"),
+    )
+
+
+async def op_changes(params: dict) -> dict:
+    index = await get_index(params)
+    return await index.changes(
+        params.get("index"),
+        params.get("since") or 0,
+        min(params.get("wait") or 0, MAX_CHANGES_WAIT_SECONDS),
+        params.get("limit") or CHANGE_LOG_SIZE,
+    )
+
+
+HANDLERS = {
+    "ping": op_ping,
+    "exec": op_exec,
+    "read": op_read,
+    "write": op_write,
+    "stat": op_stat,
+    "list": op_list,
+    "tree": op_tree,
+    "changes": op_changes,
+}
+
+
+async def handle(line: bytes, writer: asyncio.StreamWriter) -> None:
+    request_id = None
+    try:
+        request = json.loads(line)
+        request_id = request.get("id")
+        handler = HANDLERS.get(request.get("op"))
+        if handler is None:
+            raise RequestError(f"Unknown op: {request.get('op')}", "EINVAL")
+        result = await handler(request.get("params") or {})
+        response = {"id": request_id, "ok": True, "result": result}
+    except asyncio.CancelledError:
+        raise
+    except RequestError as e:
+        response = {"id": request_id, "ok": False, "error": str(e), "code": e.code}
+    except OSError as e:
+        code = errno.errorcode.get(e.errno or 0, "EIO")
+        response = {"id": request_id, "ok": False, "error": str(e), "code": code}
+    except Exception as e:
+        response = {"id": request_id, "ok": False, "error": str(e), "code": "EIO"}
+
+    writer.write(json.dumps(response, separators=(",", ":")).encode() + b"\n")
+    await writer.drain()
+
+
+async def main() -> None:
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=MAX_LINE_BYTES)
+    await loop.connect_read_pipe(
+        lambda: asyncio.StreamReaderProtocol(reader), sys.stdin
+    )
+    transport, protocol = await loop.connect_write_pipe(
+        asyncio.streams.FlowControlMixin, sys.stdout
+    )
+    writer = asyncio.StreamWriter(transport, protocol, reader, loop)
+
+    tasks: set[asyncio.Task] = set()
+    # The backend closing its end of the exec stream shuts the agent down
+    while line := await reader.readline():
+        if not line.strip():
+            continue
+        task = asyncio.create_task(handle(line, writer))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    for task in list(tasks):
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())